@@ -0,0 +1,330 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from app.broadcast import add_listener, get_broadcast
+from app.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.db.crud import get_approval_policies, get_task_user_id, bulk_create_approval_audits
+from app.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Tools a "*" policy may cover: they only read, so running one unasked is low risk.
+# Anything else needs a policy naming the tool explicitly.
+READ_ONLY_TOOLS = {
+    "web_search", "web_search_news", "read_webpage", "read_webpages", "read_csv_file", "analyze_csv_data", "browser_get_text",
+}
+URL_PARAMETERS = ("url", "image_url", "urls")
+# Broadcast channel (task id) for events that belong to no task
+SYSTEM_CHANNEL = 0
+
+
+def _host_allowed(url: str, domains: List[str]) -> bool:
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return False
+    host = parsed.hostname.lower()
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class _CompiledPolicy:
+    __slots__ = ("id", "tool_name", "patterns", "domains", "max_calls_per_hour")
+
+    def __init__(self, policy):
+        self.id = policy.id
+        self.tool_name = policy.tool_name
+        patterns = json.loads(policy.argument_patterns_json) if policy.argument_patterns_json else {}
+        self.patterns = {name: re.compile(pattern) for name, pattern in patterns.items()}
+        domains = json.loads(policy.allowed_domains_json) if policy.allowed_domains_json else []
+        self.domains = [d.lower().lstrip(".") for d in domains]
+        self.max_calls_per_hour = policy.max_calls_per_hour
+
+    def matches(self, tool_name: str, kwargs: dict) -> bool:
+        if self.tool_name == "*":
+            if tool_name not in READ_ONLY_TOOLS:
+                return False
+        elif self.tool_name != tool_name:
+            return False
+        for name, pattern in self.patterns.items():
+            if not pattern.fullmatch(str(kwargs.get(name, ""))):
+                return False
+        if self.domains:
+            urls = [
+                u.strip() for p in URL_PARAMETERS if kwargs.get(p)
+                for u in str(kwargs[p]).replace("\n", ",").split(",") if u.strip()
+            ]
+            if not urls or not all(_host_allowed(url, self.domains) for url in urls):
+                return False
+        return True
+
+
+PARAMETER_PREVIEW_CHARS = 200
+# Argument, JSON-key, header and query-parameter names whose values are never stored
+SENSITIVE_NAME = re.compile(
+    r"(^|[-_ ])(pass(word|wd|phrase)?|secret|token|api[-_]?key|auth(orization)?|credentials?|cookie|session)([-_ ]|$)",
+    re.I,
+)
+# A form field (browser_fill_form's `selector`) whose filled-in value is never stored
+SENSITIVE_FIELD = re.compile(r"pass|pwd|secret|token|otp|cvv|card.?num|ssn", re.I)
+REDACTED = "[redacted]"
+
+
+def parameter_summary(kwargs: dict) -> dict:
+    """Tool arguments as shown for confirmation: without task_id, each value cut to 200 chars."""
+    return {k: str(v)[:PARAMETER_PREVIEW_CHARS] for k, v in kwargs.items() if k != "task_id"}
+
+
+def _redact_json(value):
+    if isinstance(value, dict):
+        return {k: REDACTED if SENSITIVE_NAME.search(str(k)) else _redact_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact_json(v) for v in value]
+    return value
+
+
+def _redact_value(name: str, value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(_redact_json(value))
+    if not isinstance(value, str):
+        return value
+    if name.endswith("_json"):
+        # e.g. make_api_call's headers_json: {"Authorization": "Bearer ..."}
+        try:
+            return json.dumps(_redact_json(json.loads(value)))
+        except ValueError:
+            return value
+    if name == "url" and "?" in value:
+        base, _, query = value.partition("?")
+        pairs = [
+            (k, REDACTED if SENSITIVE_NAME.search(k) else v)
+            for k, v in parse_qsl(query, keep_blank_values=True)
+        ]
+        return f"{base}?{urlencode(pairs, safe='[]')}"
+    return value
+
+
+def redact_parameters(kwargs: dict) -> dict:
+    """parameter_summary for storage: credentials, secret form inputs and sensitive
+    JSON keys or URL query parameters are replaced before values are cut."""
+    secret_field = bool(SENSITIVE_FIELD.search(str(kwargs.get("selector", ""))))
+    redacted = {
+        k: REDACTED if SENSITIVE_NAME.search(k) or (k == "value" and secret_field) else _redact_value(k, v)
+        for k, v in kwargs.items()
+    }
+    return parameter_summary(redacted)
+
+
+class ApprovalAuditLog:
+    """Write-behind buffer for ApprovalAudit rows, shared by every task in the process.
+
+    Rows are written with one bulk INSERT when `approval_audit_batch_size` rows
+    are buffered, `approval_audit_flush_seconds` after the first buffered row, and on
+    `close()`. As with agent messages, a crash loses at most the current buffer.
+    Rows that fail to insert are kept for the next flush; rows that cannot be
+    kept (over 10 batches of backlog, or at shutdown) are logged at error level.
+    """
+
+    def __init__(self, max_batch: int, max_delay: float):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._buffer: List[dict] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self.flushed_count = 0
+        self.dropped_count = 0
+
+    async def add(self, row: dict):
+        self._buffer.append({**row, "created_at": datetime.utcnow()})
+        if len(self._buffer) >= self.max_batch:
+            try:
+                await self.flush()
+            except Exception as e:
+                # The rows stay buffered; the tool call itself goes ahead
+                logger.error(f"Approval audit flush failed: {e}")
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.max_delay)
+            self._timer = None
+            await self.flush()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Approval audit flush failed: {e}")
+
+    def _drop(self, rows: List[dict], reason: str):
+        self.dropped_count += len(rows)
+        logger.error(f"Approval audit rows not written ({reason}): {json.dumps(rows, default=str)}")
+
+    async def flush(self):
+        async with self._lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+            try:
+                async with AsyncSessionLocal() as db:
+                    await bulk_create_approval_audits(db, rows)
+            except Exception:
+                # Keep the rows for the next attempt, but never grow without bound
+                self._buffer[:0] = rows
+                overflow = len(self._buffer) - 10 * self.max_batch
+                if overflow > 0:
+                    self._drop(self._buffer[:overflow], "backlog full")
+                    del self._buffer[:overflow]
+                if self._timer is None:
+                    self._timer = asyncio.create_task(self._flush_later())
+                raise
+            self.flushed_count += len(rows)
+
+    async def close(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            self._drop(self._buffer, f"shutdown: {e}")
+            self._buffer = []
+        finally:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+
+class ApprovalPolicyEngine:
+    """Decides whether a tool call can run without a confirmation interaction.
+
+    A call is auto-approved when one of the task owner's enabled policies
+    matches it: the tool name (or "*" for a read-only tool), every argument
+    pattern, and, if the policy lists domains, the host of the call's URL. A
+    policy's `max_calls_per_hour` cap is counted per process. Calls over the cap
+    fall back to a normal confirmation. Each decision is audited in bulk.
+    Policies are cached per user for `approval_policy_cache_seconds`; a change
+    made through the API drops that user's cache in every process (see
+    `policies_changed`).
+    """
+
+    def __init__(self):
+        self._policies: Dict[int, Tuple[float, List[_CompiledPolicy]]] = {}
+        self._task_users: "OrderedDict[int, int]" = OrderedDict()
+        self._calls: Dict[int, Deque[float]] = {}
+        self.audit = ApprovalAuditLog(settings.approval_audit_batch_size, settings.approval_audit_flush_seconds)
+        self.stats = {"auto_approved": 0, "rate_limited": 0, "not_matched": 0}
+
+    def invalidate(self, user_id: int):
+        self._policies.pop(user_id, None)
+
+    async def _user_for_task(self, task_id: int) -> Optional[int]:
+        user_id = self._task_users.get(task_id)
+        if user_id is None:
+            async with AsyncSessionLocal() as db:
+                user_id = await get_task_user_id(db, task_id)
+            if user_id is None:
+                return None
+            self._task_users[task_id] = user_id
+            if len(self._task_users) > 1000:
+                self._task_users.popitem(last=False)
+        return user_id
+
+    async def _policies_for(self, user_id: int) -> List[_CompiledPolicy]:
+        cached = self._policies.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        async with AsyncSessionLocal() as db:
+            rows = await get_approval_policies(db, user_id, enabled_only=True)
+        compiled = []
+        for row in rows:
+            try:
+                compiled.append(_CompiledPolicy(row))
+            except (ValueError, re.error) as e:
+                logger.warning(f"Skipping invalid approval policy {row.id}: {e}")
+        self._policies[user_id] = (time.monotonic() + settings.approval_policy_cache_seconds, compiled)
+        return compiled
+
+    def _within_cap(self, policy: _CompiledPolicy) -> bool:
+        if not policy.max_calls_per_hour:
+            return True
+        now = time.monotonic()
+        calls = self._calls.setdefault(policy.id, deque())
+        while calls and calls[0] <= now - 3600:
+            calls.popleft()
+        if len(calls) >= policy.max_calls_per_hour:
+            return False
+        calls.append(now)
+        return True
+
+    async def auto_approve(self, task_id: int, tool_name: str, kwargs: dict) -> bool:
+        if not settings.auto_approval_enabled:
+            return False
+        user_id = await self._user_for_task(task_id)
+        if user_id is None:
+            return False
+
+        matched = [p for p in await self._policies_for(user_id) if p.matches(tool_name, kwargs)]
+        if not matched:
+            self.stats["not_matched"] += 1
+            return False
+
+        policy = next((p for p in matched if self._within_cap(p)), None)
+        decision = "auto_approved" if policy else "rate_limited"
+        self.stats[decision] += 1
+        await self.audit.add({
+            "user_id": user_id,
+            "task_id": task_id,
+            "policy_id": (policy or matched[0]).id,
+            "tool_name": tool_name,
+            "decision": decision,
+            "parameters_json": json.dumps(redact_parameters(kwargs)),
+        })
+        return policy is not None
+
+
+approval_engine = ApprovalPolicyEngine()
+
+
+async def policies_changed(user_id: int):
+    """Drop the user's cached policies here and, through the broadcast backend, in every
+    other process, so a disabled or deleted policy stops approving calls on workers too."""
+    approval_engine.invalidate(user_id)
+    backend = get_broadcast()
+    if backend:
+        frame = json.dumps({"type": "approval_policies_changed", "user_id": user_id}, separators=(",", ":"))
+        await backend.publish(SYSTEM_CHANNEL, 0, frame)
+
+
+def _on_broadcast(task_id: int, seq: int, frame: str):
+    if task_id != SYSTEM_CHANNEL or '"type":"approval_policies_changed"' not in frame:
+        return
+    try:
+        approval_engine.invalidate(json.loads(frame)["user_id"])
+    except (ValueError, KeyError):
+        logger.warning("Malformed approval_policies_changed event")
+
+
+add_listener(_on_broadcast)
+
+
+def get_approval_stats() -> dict:
+    return {
+        **approval_engine.stats,
+        "audited": approval_engine.audit.flushed_count,
+        "audit_dropped": approval_engine.audit.dropped_count,
+    }
+
+
+register_stats("auto_approval", get_approval_stats)
+
+
+async def shutdown_approval_audit():
+    """Write any buffered audit rows."""
+    await approval_engine.audit.close()
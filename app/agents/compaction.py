@@ -0,0 +1,237 @@
+import hashlib
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from autogen_core.model_context import UnboundedChatCompletionContext
+from autogen_core.models import (
+    AssistantMessage, FunctionExecutionResult, FunctionExecutionResultMessage, LLMMessage, UserMessage,
+)
+
+from app.config import get_settings
+from app.metrics import register_stats
+
+settings = get_settings()
+
+# Markers whose messages are never elided (the Reviewer must see the final report)
+_KEEP_MARKERS = ("PLAN_COMPLETE", "EXECUTION_COMPLETE", "NEEDS_REVISION", "TASK_COMPLETE")
+
+PREVIEW_CHARS = 300
+IMAGE_TOKENS = 255
+
+# Full text of elided outputs, per task, for the recall_context tool
+_stores: Dict[int, Dict[str, str]] = {}
+
+_totals = {"tasks": 0, "tokens_sent": 0, "tokens_saved": 0, "elided_outputs": 0, "dropped_messages": 0, "recalls": 0}
+_recent_tasks: Deque[dict] = deque(maxlen=20)
+
+
+def _estimate_tokens(message: LLMMessage) -> int:
+    """Rough token count (~4 chars per token); cheap enough to run on every turn."""
+    content = message.content
+    if isinstance(content, str):
+        return len(content) // 4 + 4
+    tokens = 4
+    for part in content:
+        if isinstance(part, str):
+            tokens += len(part) // 4
+        elif isinstance(part, FunctionExecutionResult):
+            tokens += len(part.content) // 4 + 4
+        elif hasattr(part, "arguments"):
+            tokens += (len(part.name) + len(part.arguments)) // 4 + 4
+        else:
+            tokens += IMAGE_TOKENS
+    return tokens
+
+
+def _count(messages: List[LLMMessage]) -> int:
+    return sum(_estimate_tokens(m) for m in messages)
+
+
+def remember_output(task_id: Optional[int], text: str) -> str:
+    """Store an elided output and return its reference (stable for identical text)."""
+    ref = "ctx-" + hashlib.sha1(text.encode()).hexdigest()[:10]
+    if task_id is not None:
+        _stores.setdefault(task_id, {})[ref] = text
+    return ref
+
+
+def recall_output(task_id: Optional[int], ref: str) -> Optional[str]:
+    text = _stores.get(task_id, {}).get(ref.strip().strip("[]"))
+    if text is not None:
+        _totals["recalls"] += 1
+    return text
+
+
+class CompactingChatCompletionContext(UnboundedChatCompletionContext):
+    """Model context that keeps recent turns verbatim and compacts older ones.
+
+    All messages are kept; only the view sent to the model is compacted:
+      * the last `keep_recent` messages are sent as they are;
+      * older tool outputs (function results, and Executor messages, which carry
+        tool results into the other agents' contexts) longer than `elide_chars`
+        are replaced by a short preview and a reference. With `recallable`, the
+        agent can expand a reference again with the `recall_context` tool;
+      * if the view is still over `token_budget`, the recent window shrinks, and
+        then the oldest messages after the task message are dropped, keeping each
+        tool call together with its results.
+    Messages carrying a workflow marker (PLAN_COMPLETE, EXECUTION_COMPLETE, ...)
+    are never elided.
+    """
+
+    def __init__(
+        self,
+        task_id: Optional[int],
+        agent_name: str,
+        token_budget: int,
+        keep_recent: int,
+        elide_chars: int,
+        recallable: bool = False,
+    ):
+        super().__init__()
+        self.task_id = task_id
+        self.agent_name = agent_name
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.elide_chars = elide_chars
+        self.recallable = recallable
+        self.stats = {"turns": 0, "tokens_full": 0, "tokens_sent": 0, "dropped_messages": 0}
+
+    def _stub(self, text: str, label: str) -> str:
+        ref = remember_output(self.task_id, text)
+        preview = " ".join(text[:PREVIEW_CHARS].split())
+        stub = f"[{ref}: {label}, {len(text)} chars elided. Preview: {preview}...]"
+        if self.recallable:
+            stub += f" (call recall_context('{ref}') for the full text)"
+        return stub
+
+    def _elide(self, message: LLMMessage) -> Optional[LLMMessage]:
+        """Compacted copy of `message`, or None if it is kept as is."""
+        if isinstance(message, FunctionExecutionResultMessage):
+            results, changed = [], False
+            for result in message.content:
+                if len(result.content) > self.elide_chars:
+                    result = result.model_copy(update={"content": self._stub(result.content, f"{result.name} output")})
+                    changed = True
+                results.append(result)
+            return message.model_copy(update={"content": results}) if changed else None
+        if (
+            isinstance(message, UserMessage)
+            and message.source == "Executor"
+            and isinstance(message.content, str)
+            and len(message.content) > self.elide_chars
+            and not any(marker in message.content for marker in _KEEP_MARKERS)
+        ):
+            return message.model_copy(update={"content": self._stub(message.content, "Executor output")})
+        return None
+
+    def _compact(self, messages: List[LLMMessage], keep_recent: int) -> List[LLMMessage]:
+        cutoff = len(messages) - keep_recent
+        view = []
+        for i, message in enumerate(messages):
+            compacted = self._elide(message) if 0 < i < cutoff else None
+            view.append(compacted or message)
+        return view
+
+    @staticmethod
+    def _drop_oldest(view: List[LLMMessage], budget: int) -> tuple[List[LLMMessage], int]:
+        """Drop messages after the first until under budget, never splitting a tool call from its results."""
+        head, tail = view[:1], view[1:]
+        dropped = 0
+        total = _count(view)
+        while len(tail) > 1 and total > budget:
+            unit = 2 if isinstance(tail[0], AssistantMessage) and isinstance(tail[0].content, list) else 1
+            if unit >= len(tail):
+                break
+            for message in tail[:unit]:
+                total -= _estimate_tokens(message)
+            tail = tail[unit:]
+            dropped += unit
+        while tail and isinstance(tail[0], FunctionExecutionResultMessage):
+            total -= _estimate_tokens(tail[0])
+            tail = tail[1:]
+            dropped += 1
+        if dropped:
+            note = UserMessage(content=f"[{dropped} earlier messages omitted to fit the context budget]", source="System")
+            head = head + [note]
+        return head + tail, dropped
+
+    async def get_messages(self) -> List[LLMMessage]:
+        messages = self._messages
+        full = _count(messages)
+        view = self._compact(messages, self.keep_recent)
+        sent = _count(view)
+
+        # Over budget: elide all but the latest turn, then drop the oldest turns
+        if sent > self.token_budget and self.keep_recent > 1:
+            view = self._compact(messages, 1)
+            sent = _count(view)
+        if sent > self.token_budget:
+            view, dropped = self._drop_oldest(view, self.token_budget)
+            sent = _count(view)
+            self.stats["dropped_messages"] += dropped
+
+        self.stats["turns"] += 1
+        self.stats["tokens_full"] += full
+        self.stats["tokens_sent"] += sent
+        return view
+
+
+class TaskContextCompactor:
+    """Creates one compacting context per agent for a task and reports what it saved."""
+
+    def __init__(self, task_id: int):
+        self.task_id = task_id
+        self.contexts: Dict[str, CompactingChatCompletionContext] = {}
+
+    def context_for(self, agent_name: str, recallable: bool = False) -> Optional[CompactingChatCompletionContext]:
+        if not settings.context_compaction_enabled:
+            return None
+        context = CompactingChatCompletionContext(
+            self.task_id,
+            agent_name,
+            # Parallel sub-agents (Executor_2, ...) share their role's budget
+            token_budget=settings.context_token_budgets.get(
+                agent_name.split("_")[0], settings.context_token_budget
+            ),
+            keep_recent=settings.context_keep_recent_messages,
+            elide_chars=settings.context_elide_chars,
+            recallable=recallable,
+        )
+        self.contexts[agent_name] = context
+        return context
+
+    def summary(self) -> dict:
+        """Tokens sent vs. the uncompacted transcript, per agent and for the task."""
+        agents = {}
+        for name, context in self.contexts.items():
+            stats = context.stats
+            agents[name] = {
+                "turns": stats["turns"],
+                "tokens_sent": stats["tokens_sent"],
+                "tokens_saved": stats["tokens_full"] - stats["tokens_sent"],
+                "dropped_messages": stats["dropped_messages"],
+            }
+        summary = {
+            "task_id": self.task_id,
+            "tokens_sent": sum(a["tokens_sent"] for a in agents.values()),
+            "tokens_saved": sum(a["tokens_saved"] for a in agents.values()),
+            "elided_outputs": len(_stores.get(self.task_id, {})),
+            "agents": agents,
+        }
+        _totals["tasks"] += 1
+        _totals["tokens_sent"] += summary["tokens_sent"]
+        _totals["tokens_saved"] += summary["tokens_saved"]
+        _totals["elided_outputs"] += summary["elided_outputs"]
+        _totals["dropped_messages"] += sum(a["dropped_messages"] for a in agents.values())
+        _recent_tasks.append({k: summary[k] for k in ("task_id", "tokens_sent", "tokens_saved")})
+        return summary
+
+    def close(self):
+        _stores.pop(self.task_id, None)
+
+
+def get_context_compaction_stats() -> dict:
+    return {**_totals, "recent_tasks": list(_recent_tasks)}
+
+
+register_stats("context_compaction", get_context_compaction_stats)
@@ -11,12 +11,12 @@ You have these tools available - USE THEM to produce real results:
 ### Research & Data Tools:
 1. **web_search(query, max_results)** - Search the internet. Use for general research tasks.
 2. **web_search_news(query, max_results)** - Search for recent news and current events. Use for anything time-sensitive.
-3. **read_webpage(url, max_length)** - Fetch full content from a URL. Use after finding URLs via search.
+3. **read_webpage(url, max_length)** - Fetch full content from a URL. Use after finding URLs via search. To read several URLs, pass them together to **read_webpages(urls, max_length)** (comma-separated) - they are fetched in parallel.
 4. **create_file(task_id, filename, content)** - Save a file to the workspace. Use for deliverables.
-5. **execute_python_code(code, timeout_seconds)** - Run Python code. Use for calculations, data processing.
+5. **execute_python_code(code, timeout_seconds)** - Run Python code. Use for calculations, data processing. A CSV already read with read_csv_file/analyze_csv_data is available as `df = load_dataset("file.csv")` (no re-parsing).
 6. **make_api_call(url, method, headers_json, body_json)** - Call REST APIs.
 7. **read_csv_file(task_id, filename)** - Read a CSV from the workspace.
-8. **analyze_csv_data(task_id, filename, operation)** - Analyze CSV data.
+8. **analyze_csv_data(task_id, filename, operation, query)** - Analyze CSV data. operation="query" with a JSON query runs filters, group-by/aggregates, sorting, top-n and describe without writing code, e.g. query='{"filter": [["country", "==", "US"]], "group_by": ["region"], "aggregate": {"sales": "sum"}, "sort": [["sales_sum", "desc"]], "limit": 5}'. Prefer it over execute_python_code for these.
 
 ### Communication Tools:
 9. **send_email(to_address, subject, body)** - Send an email.
@@ -55,7 +55,8 @@ You have these tools available - USE THEM to produce real results:
 - ALWAYS use tools when the task requires real-world actions (searching, file creation, etc.)
 - Do NOT simulate or pretend to use tools - actually call them.
 - Handle tool errors gracefully - if a tool fails, report the error and try alternatives.
-- ALL tools require user confirmation before executing. The user will see what you're about to do and must approve it.
+- Older long tool outputs are shortened to a preview with a reference like [ctx-1a2b3c4d5e: ...]. Call **recall_context(ref)** only if you need the full text again; it needs no confirmation.
+- ALL other tools require user confirmation before executing. The user will see what you're about to do and must approve it.
 - For tools that need user input (like send_email), the user will be asked to provide the details through the UI.
 
 ## Desktop Automation Best Practices:
@@ -127,11 +128,19 @@ This will pause the workflow and ask the user for guidance. Do NOT keep retrying
 After completing all subtasks, say "EXECUTION_COMPLETE" to signal you're done."""
 
 
-def create_executor_agent(model_client) -> AssistantAgent:
-    """Create and return the Executor agent with tools."""
+def create_executor_agent(
+    model_client, model_context=None, name: str = "Executor", max_tool_iterations: int = 1
+) -> AssistantAgent:
+    """Create and return the Executor agent with tools.
+
+    Parallel plan execution creates extra Executors (`Executor_2`, ...) that keep
+    calling tools until they can answer, since they run outside the group chat.
+    """
     return AssistantAgent(
-        name="Executor",
+        name=name,
         model_client=model_client,
+        model_context=model_context,
         system_message=EXECUTOR_SYSTEM_PROMPT,
         tools=get_executor_tools(),
+        max_tool_iterations=max_tool_iterations,
     )
@@ -1,21 +1,112 @@
 import asyncio
 import json
-from typing import Dict, Optional
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
 
+from app.broadcast import add_listener
+from app.config import get_settings
 from app.db.database import AsyncSessionLocal
 from app.db.crud import (
-    create_interaction_request, get_pending_interaction,
-    update_task_status, get_task
+    create_interaction_request, get_interaction_response, expire_interaction_request,
+    update_task_status, get_task_status
 )
 from app.db.models import TaskStatus, InteractionType
 
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
 
 class InteractionManager:
-    """Manages pause/resume of tool execution for user interactions."""
+    """Manages pause/resume of tool execution for user interactions.
+
+    The interaction row is the source of truth: `POST /interactions/{id}/respond`
+    writes the response on whichever API process receives it, then publishes an
+    `interaction_resolved` event. The process running the tool is woken by that
+    event and reads the response from the database. If the event is lost, a
+    fallback poll finds the response anyway. It backs off from
+    `interaction_poll_min_seconds` to `interaction_poll_max_seconds`.
+    """
 
     _events: Dict[int, asyncio.Event] = {}
-    _responses: Dict[int, dict] = {}
+    # Parallel sub-agents can wait on several interactions of one task at once;
+    # the task's status is restored when the last of them is resolved
     _task_status_before: Dict[int, str] = {}
+    _outstanding: Dict[int, int] = {}
+
+    @classmethod
+    @asynccontextmanager
+    async def _pausing(cls, task_id: int):
+        """Session for creating an interaction, counted as outstanding unless creating it fails.
+
+        The status to restore is remembered by the first of the task's interactions.
+        """
+        async with AsyncSessionLocal() as db:
+            current = await get_task_status(db, task_id)
+            if current and task_id not in cls._task_status_before:
+                cls._task_status_before[task_id] = current.value if current != TaskStatus.AWAITING_INPUT else "executing"
+            cls._outstanding[task_id] = cls._outstanding.get(task_id, 0) + 1
+            try:
+                yield db
+            except BaseException:
+                cls._release(task_id)
+                raise
+
+    @classmethod
+    def _release(cls, task_id: int) -> Optional[str]:
+        """Count one interaction as resolved; returns the status to restore once none are left."""
+        remaining = cls._outstanding.pop(task_id, 1) - 1
+        if remaining > 0:
+            cls._outstanding[task_id] = remaining
+            return None
+        return cls._task_status_before.pop(task_id, "executing")
+
+    @classmethod
+    async def _wait_and_resume(cls, task_id: int, request_id: int, timeout: float) -> Optional[dict]:
+        """Wait for the response, then restore the task's status if no other interaction is pending."""
+        try:
+            response = await cls._wait_for_response(request_id, timeout)
+        except BaseException:
+            cls._release(task_id)
+            raise
+        prev = cls._release(task_id)
+        if prev:
+            async with AsyncSessionLocal() as db:
+                await update_task_status(db, task_id, TaskStatus(prev))
+            from app.api.websocket import send_status_update
+            await send_status_update(task_id, prev)
+        return response
+
+    @classmethod
+    async def _wait_for_response(cls, request_id: int, timeout: float) -> Optional[dict]:
+        """Block until the request is answered (response dict) or times out (None)."""
+        event = asyncio.Event()
+        cls._events[request_id] = event
+        deadline = time.monotonic() + timeout
+        interval = settings.interaction_poll_min_seconds
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    try:
+                        await asyncio.wait_for(event.wait(), timeout=min(interval, remaining))
+                    except asyncio.TimeoutError:
+                        interval = min(interval * 2, settings.interaction_poll_max_seconds)
+                    event.clear()
+
+                async with AsyncSessionLocal() as db:
+                    status, response_json = await get_interaction_response(db, request_id)
+                    if status == "responded":
+                        return json.loads(response_json) if response_json else {}
+                    if status != "pending":
+                        return None
+                    if time.monotonic() >= deadline:
+                        if await expire_interaction_request(db, request_id):
+                            return None
+                        # Answered between the read and the expiry: use that response
+        finally:
+            cls._events.pop(request_id, None)
 
     @classmethod
     async def request_input(
@@ -27,11 +118,7 @@ class InteractionManager:
         timeout: float = 300.0
     ) -> Optional[dict]:
         """Pause tool execution and request input from user."""
-        async with AsyncSessionLocal() as db:
-            task = await get_task(db, task_id)
-            if task and task_id not in cls._task_status_before:
-                cls._task_status_before[task_id] = task.status.value if task.status != TaskStatus.AWAITING_INPUT else "executing"
-
+        async with cls._pausing(task_id) as db:
             interaction = await create_interaction_request(
                 db, task_id,
                 InteractionType.INPUT_NEEDED,
@@ -44,24 +131,8 @@ class InteractionManager:
         await send_status_update(task_id, "awaiting_input")
         await send_input_request(task_id, interaction.id, tool_name, prompt_message, fields)
 
-        event = asyncio.Event()
-        cls._events[interaction.id] = event
-
-        try:
-            await asyncio.wait_for(event.wait(), timeout=timeout)
-            response = cls._responses.pop(interaction.id, None)
-        except asyncio.TimeoutError:
-            response = None
-        finally:
-            cls._events.pop(interaction.id, None)
-
-        # Restore previous task status
-        async with AsyncSessionLocal() as db:
-            prev = cls._task_status_before.pop(task_id, "executing")
-            await update_task_status(db, task_id, TaskStatus(prev))
-        await send_status_update(task_id, prev)
-
-        return response
+        # Restores the previous task status
+        return await cls._wait_and_resume(task_id, interaction.id, timeout)
 
     @classmethod
     async def request_confirmation(
@@ -73,11 +144,7 @@ class InteractionManager:
         timeout: float = 300.0
     ) -> bool:
         """Pause tool execution and request confirmation from user."""
-        async with AsyncSessionLocal() as db:
-            task = await get_task(db, task_id)
-            if task and task_id not in cls._task_status_before:
-                cls._task_status_before[task_id] = task.status.value if task.status != TaskStatus.AWAITING_INPUT else "executing"
-
+        async with cls._pausing(task_id) as db:
             preview = {
                 "tool": tool_name,
                 "description": action_description,
@@ -95,24 +162,41 @@ class InteractionManager:
         await send_status_update(task_id, "awaiting_input")
         await send_confirmation_request(task_id, interaction.id, tool_name, action_description, parameters)
 
-        event = asyncio.Event()
-        cls._events[interaction.id] = event
+        response = await cls._wait_and_resume(task_id, interaction.id, timeout)
+        return bool(response and response.get("confirmed", False))
 
-        try:
-            await asyncio.wait_for(event.wait(), timeout=timeout)
-            response = cls._responses.pop(interaction.id, {})
-            confirmed = response.get("confirmed", False)
-        except asyncio.TimeoutError:
-            confirmed = False
-        finally:
-            cls._events.pop(interaction.id, None)
+    @classmethod
+    async def request_batch_confirmation(
+        cls,
+        task_id: int,
+        items: List[dict],
+        timeout: float = 300.0
+    ) -> List[bool]:
+        """Ask the user to approve or deny several tool calls in one interaction.
 
-        async with AsyncSessionLocal() as db:
-            prev = cls._task_status_before.pop(task_id, "executing")
-            await update_task_status(db, task_id, TaskStatus(prev))
-        await send_status_update(task_id, prev)
+        `items` are `{"tool", "description", "parameters"}` dicts. The response
+        may carry per-item `decisions`; otherwise `confirmed` applies to all.
+        """
+        description = f"Execute {len(items)} actions: " + ", ".join(f"**{item['tool']}**" for item in items)
+        async with cls._pausing(task_id) as db:
+            preview = {"tool": "batch", "description": description, "items": items}
+            interaction = await create_interaction_request(
+                db, task_id,
+                InteractionType.CONFIRMATION,
+                "batch", description,
+                None, json.dumps(preview)
+            )
+            await update_task_status(db, task_id, TaskStatus.AWAITING_INPUT)
 
-        return confirmed
+        from app.api.websocket import send_status_update, send_confirmation_request
+        await send_status_update(task_id, "awaiting_input")
+        await send_confirmation_request(task_id, interaction.id, "batch", description, {}, items=items)
+
+        response = await cls._wait_and_resume(task_id, interaction.id, timeout) or {}
+        decisions = response.get("decisions")
+        if decisions is None:
+            decisions = [bool(response.get("confirmed", False))] * len(items)
+        return [bool(d) for d in decisions[:len(items)]] + [False] * (len(items) - len(decisions))
 
     @classmethod
     async def request_guidance(
@@ -124,11 +208,7 @@ class InteractionManager:
         timeout: float = 600.0
     ) -> Optional[dict]:
         """Pause the entire workflow and ask the user for guidance when agent is stuck."""
-        async with AsyncSessionLocal() as db:
-            task = await get_task(db, task_id)
-            if task and task_id not in cls._task_status_before:
-                cls._task_status_before[task_id] = task.status.value if task.status != TaskStatus.AWAITING_INPUT else "executing"
-
+        async with cls._pausing(task_id) as db:
             fields = [
                 {"name": "guidance", "label": "What should the agent do?", "type": "textarea", "required": True}
             ]
@@ -145,29 +225,94 @@ class InteractionManager:
         from app.api.websocket import send_status_update
         await send_status_update(task_id, "awaiting_input")
 
-        event = asyncio.Event()
-        cls._events[interaction.id] = event
-
-        try:
-            await asyncio.wait_for(event.wait(), timeout=timeout)
-            response = cls._responses.pop(interaction.id, None)
-        except asyncio.TimeoutError:
+        response = await cls._wait_and_resume(task_id, interaction.id, timeout)
+        if response is None:
             response = {"values": {"guidance": "cancel"}}
-        finally:
-            cls._events.pop(interaction.id, None)
-
-        async with AsyncSessionLocal() as db:
-            prev = cls._task_status_before.pop(task_id, "executing")
-            await update_task_status(db, task_id, TaskStatus(prev))
-        from app.api.websocket import send_status_update as send_update
-        await send_update(task_id, prev)
-
         return response
 
     @classmethod
-    def resolve(cls, request_id: int, response_data: dict):
-        """Called by API endpoint when user responds. Unblocks the waiting tool."""
-        cls._responses[request_id] = response_data
+    async def resolve(cls, task_id: int, request_id: int):
+        """Called by the API after the response is stored. Unblocks the waiting tool on any node."""
+        cls._wake(request_id)
+        from app.api.websocket import send_interaction_resolved
+        await send_interaction_resolved(task_id, request_id)
+
+    @classmethod
+    def _wake(cls, request_id: int):
         event = cls._events.get(request_id)
         if event:
             event.set()
+
+    @classmethod
+    def _on_broadcast(cls, task_id: int, seq: int, frame: str):
+        # Cheap pre-check: most frames are agent messages
+        if '"type":"interaction_resolved"' not in frame or not cls._events:
+            return
+        try:
+            cls._wake(json.loads(frame)["request_id"])
+        except (ValueError, KeyError):
+            logger.warning(f"Malformed interaction_resolved event for task {task_id}")
+
+
+class ConfirmationBatcher:
+    """Collects a task's concurrent tool confirmations into one interaction.
+
+    Tool calls from one model turn run concurrently, so their confirmations
+    arrive together. The first request opens a batch for the task and waits
+    `confirmation_batch_window_seconds` for the others. A batch of one is sent
+    as a normal confirmation; a larger batch is sent as one interaction with
+    per-item approve/deny. All its tools are then released at once. A task has at most
+    one confirmation outstanding: requests made while the user is deciding
+    (e.g. from parallel subtask Executors) form the next batch.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._pending: Dict[int, List[Tuple[dict, asyncio.Future]]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._dispatchers: set = set()
+
+    async def confirm(self, task_id: int, tool_name: str, action_description: str, parameters: dict) -> bool:
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.get(task_id)
+        if batch is None:
+            batch = self._pending[task_id] = []
+            dispatcher = asyncio.create_task(self._dispatch(task_id))
+            self._dispatchers.add(dispatcher)
+            dispatcher.add_done_callback(self._dispatchers.discard)
+        batch.append(({"tool": tool_name, "description": action_description, "parameters": parameters}, future))
+        return await future
+
+    async def _dispatch(self, task_id: int):
+        await asyncio.sleep(self.window)
+        lock = self._locks.setdefault(task_id, asyncio.Lock())
+        async with lock:
+            batch = self._pending.pop(task_id)
+            items = [item for item, _ in batch]
+            try:
+                if len(items) == 1:
+                    item = items[0]
+                    decisions = [await InteractionManager.request_confirmation(
+                        task_id=task_id,
+                        tool_name=item["tool"],
+                        action_description=item["description"],
+                        parameters=item["parameters"],
+                    )]
+                else:
+                    decisions = await InteractionManager.request_batch_confirmation(task_id, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                if task_id not in self._pending:
+                    self._locks.pop(task_id, None)
+            for (_, future), decision in zip(batch, decisions):
+                if not future.done():
+                    future.set_result(decision)
+
+
+confirmation_batcher = ConfirmationBatcher(settings.confirmation_batch_window_seconds)
+
+add_listener(InteractionManager._on_broadcast)
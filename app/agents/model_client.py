@@ -0,0 +1,433 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, Dict, List, Literal, Mapping, Optional, Sequence, Tuple, Union
+
+import httpx
+import openai
+from autogen_core import CancellationToken
+from autogen_core.models import (
+    ChatCompletionClient, CreateResult, LLMMessage, ModelCapabilities, ModelInfo, RequestUsage,
+)
+from autogen_core.tools import Tool, ToolSchema
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+from pydantic import BaseModel
+
+from app.config import get_settings
+from app.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Lanes in priority order: a user waiting on the dashboard beats a scheduled run
+LANES = ("interactive", "scheduled")
+
+# Rough completion allowance reserved from the token budget before a call;
+# the difference is settled once the real usage is known
+COMPLETION_TOKEN_ESTIMATE = 500
+
+RETRYABLE_ERRORS = (openai.APIConnectionError, openai.InternalServerError)
+
+
+class RateLimiter:
+    """Token buckets for requests/min and tokens/min, shared by every task.
+
+    Callers wait in one priority queue (lane, then arrival), so the head of the
+    queue is always served first. `pause()` holds everyone back after a 429.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.rpm = max(1, requests_per_minute)
+        self.tpm = max(1, tokens_per_minute)
+        self._requests = float(self.rpm)
+        self._tokens = float(self.tpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int]] = []
+        self._counter = itertools.count()
+        self._cond = asyncio.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def settle(self, reserved: int, used: int):
+        """Correct the token bucket once a call's real usage is known."""
+        self._tokens -= used - reserved
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, tokens: int, priority: int) -> float:
+        """Wait for one request and `tokens` tokens of budget. Returns seconds waited."""
+        tokens = min(tokens, self.tpm)
+        ticket = (priority, next(self._counter))
+        start = time.monotonic()
+        async with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    delay = None
+                    if self._waiters[0] == ticket:
+                        self._refill()
+                        now = time.monotonic()
+                        if now < self._paused_until:
+                            delay = self._paused_until - now
+                        elif self._requests < 1:
+                            delay = (1 - self._requests) * 60 / self.rpm
+                        elif self._tokens < tokens:
+                            delay = (tokens - self._tokens) * 60 / self.tpm
+                        else:
+                            heapq.heappop(self._waiters)
+                            self._requests -= 1
+                            self._tokens -= tokens
+                            self._cond.notify_all()
+                            return time.monotonic() - start
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+
+class _LaneStats:
+    def __init__(self):
+        self.requests = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=500)
+        self.waits: Deque[float] = deque(maxlen=500)
+
+    def snapshot(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "avg_latency_seconds": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "p95_latency_seconds": round(latencies[int(len(latencies) * 0.95) - 1], 3) if latencies else None,
+            "avg_wait_seconds": round(sum(self.waits) / len(self.waits), 3) if self.waits else None,
+        }
+
+
+def _estimate_tokens(messages: Sequence[LLMMessage]) -> int:
+    chars = sum(len(str(getattr(m, "content", ""))) for m in messages)
+    return chars // 4 + COMPLETION_TOKEN_ESTIMATE
+
+
+def _request_key(
+    messages: Sequence[LLMMessage],
+    tools: Sequence[Tool | ToolSchema],
+    tool_choice: Any,
+    json_output: Any,
+    extra_create_args: Mapping[str, Any],
+) -> str:
+    payload = {
+        "messages": [m.model_dump(mode="json") for m in messages],
+        "tools": [t.schema if isinstance(t, Tool) else t for t in tools],
+        "tool_choice": tool_choice.name if isinstance(tool_choice, Tool) else tool_choice,
+        "json_output": json_output if isinstance(json_output, (bool, type(None))) else repr(json_output),
+        "extra": dict(extra_create_args),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ModelClientManager:
+    """Process-wide owner of the OpenAI client, its connection pool and rate budget.
+
+    Every task gets a lightweight `PooledChatCompletionClient` from
+    `get_model_client()`, and all of them share:
+      * one `OpenAIChatCompletionClient` backed by one keep-alive httpx pool
+      * one `RateLimiter` for RPM/TPM, with interactive calls ahead of scheduled ones
+      * 429 handling: honour Retry-After (or back off exponentially) and pause
+        the whole limiter, instead of every task retrying on its own
+      * coalescing: identical concurrent requests share a single API call
+    """
+
+    def __init__(self):
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_connections,
+            ),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+        )
+        client_args: Dict[str, Any] = {
+            "model": settings.llm_model,
+            "api_key": settings.openai_api_key,
+            "http_client": self._http_client,
+            "max_retries": 0,  # Retries are coordinated here
+        }
+        if settings.openai_base_url:
+            client_args["base_url"] = settings.openai_base_url
+        self.client = OpenAIChatCompletionClient(**client_args)
+        self.limiter = RateLimiter(settings.llm_requests_per_minute, settings.llm_tokens_per_minute)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats: Dict[str, _LaneStats] = {lane: _LaneStats() for lane in LANES}
+
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                pass
+        if retry_after is None:
+            retry_after = min(60.0, 2 ** attempt) * (0.5 + random.random() / 2)
+        return retry_after
+
+    async def _call(self, lane: str, messages: Sequence[LLMMessage], call) -> CreateResult:
+        """Run `call()` under the rate limiter, retrying 429s and transient errors."""
+        stats = self._stats[lane]
+        reserved = _estimate_tokens(messages)
+        attempt = 0
+        while True:
+            stats.waits.append(await self.limiter.acquire(reserved, LANES.index(lane)))
+            started = time.monotonic()
+            try:
+                result = await call()
+            except openai.RateLimitError as e:
+                self.limiter.settle(reserved, 0)
+                stats.rate_limited += 1
+                if attempt >= settings.llm_max_retries:
+                    stats.errors += 1
+                    raise
+                delay = self._backoff(e, attempt)
+                logger.warning(f"LLM rate limited ({lane}); pausing all calls for {delay:.1f}s")
+                self.limiter.pause(delay)
+            except RETRYABLE_ERRORS as e:
+                self.limiter.settle(reserved, 0)
+                if attempt >= settings.llm_max_retries:
+                    stats.errors += 1
+                    raise
+                await asyncio.sleep(self._backoff(e, attempt))
+            except Exception:
+                stats.errors += 1
+                raise
+            else:
+                stats.requests += 1
+                stats.latencies.append(time.monotonic() - started)
+                stats.prompt_tokens += result.usage.prompt_tokens
+                stats.completion_tokens += result.usage.completion_tokens
+                self.limiter.settle(reserved, result.usage.prompt_tokens + result.usage.completion_tokens)
+                return result
+            attempt += 1
+            stats.retries += 1
+
+    async def create(
+        self,
+        lane: str,
+        messages: Sequence[LLMMessage],
+        tools: Sequence[Tool | ToolSchema],
+        tool_choice: Any,
+        json_output: Any,
+        extra_create_args: Mapping[str, Any],
+        cancellation_token: Optional[CancellationToken],
+    ) -> CreateResult:
+        key = _request_key(messages, tools, tool_choice, json_output, extra_create_args)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                result = await asyncio.shield(pending)
+                self._stats[lane].coalesced += 1
+                return result
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The task that owned the call was cancelled; make our own
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._call(lane, messages, lambda: self.client.create(
+                messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            ))
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't log it as never retrieved
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def create_stream(
+        self,
+        lane: str,
+        messages: Sequence[LLMMessage],
+        **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        stats = self._stats[lane]
+        reserved = _estimate_tokens(messages)
+        stats.waits.append(await self.limiter.acquire(reserved, LANES.index(lane)))
+        started = time.monotonic()
+        try:
+            async for chunk in self.client.create_stream(messages, **kwargs):
+                if isinstance(chunk, CreateResult):
+                    stats.requests += 1
+                    stats.latencies.append(time.monotonic() - started)
+                    stats.prompt_tokens += chunk.usage.prompt_tokens
+                    stats.completion_tokens += chunk.usage.completion_tokens
+                    self.limiter.settle(reserved, chunk.usage.prompt_tokens + chunk.usage.completion_tokens)
+                yield chunk
+        except openai.RateLimitError as e:
+            stats.rate_limited += 1
+            stats.errors += 1
+            self.limiter.pause(self._backoff(e, 0))
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "model": settings.llm_model,
+            "waiting": self.limiter.waiting,
+            "inflight": len(self._inflight),
+            "lanes": {lane: stats.snapshot() for lane, stats in self._stats.items()},
+        }
+
+    async def close(self):
+        await self.client.close()
+        await self._http_client.aclose()
+
+
+class PooledChatCompletionClient(ChatCompletionClient):
+    """Per-task view of the shared client: fixed lane, own usage counters."""
+
+    def __init__(self, manager: ModelClientManager, lane: str = "interactive"):
+        self._manager = manager
+        self.lane = lane if lane in LANES else "interactive"
+        self._usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self.call_count = 0
+        self.call_seconds = 0.0
+
+    def _record(self, usage: RequestUsage, seconds: float):
+        self.call_count += 1
+        self.call_seconds += seconds
+        self._usage = RequestUsage(
+            prompt_tokens=self._usage.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=self._usage.completion_tokens + usage.completion_tokens,
+        )
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        started = time.monotonic()
+        result = await self._manager.create(
+            self.lane, messages, tools, tool_choice, json_output, extra_create_args, cancellation_token
+        )
+        self._record(result.usage, time.monotonic() - started)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        started = time.monotonic()
+        async for chunk in self._manager.create_stream(
+            self.lane,
+            messages,
+            tools=tools,
+            tool_choice=tool_choice,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        ):
+            if isinstance(chunk, CreateResult):
+                self._record(chunk.usage, time.monotonic() - started)
+            yield chunk
+
+    async def close(self) -> None:
+        pass  # The shared client is closed by shutdown_model_clients()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._usage
+
+    def total_usage(self) -> RequestUsage:
+        return self._usage
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._manager.client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._manager.client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self._manager.client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._manager.client.model_info
+
+
+_manager: Optional[ModelClientManager] = None
+
+
+def get_model_client(lane: str = "interactive") -> PooledChatCompletionClient:
+    """Return a client for one task that shares this process's pool and rate budget."""
+    global _manager
+    if _manager is None:
+        _manager = ModelClientManager()
+    return PooledChatCompletionClient(_manager, lane)
+
+
+def get_model_client_stats() -> Optional[dict]:
+    return _manager.stats() if _manager else None
+
+
+register_stats("model_client", get_model_client_stats)
+
+
+async def shutdown_model_clients():
+    global _manager
+    if _manager:
+        await _manager.close()
+        _manager = None
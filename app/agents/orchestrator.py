@@ -1,9 +1,10 @@
 import asyncio
+import logging
 from pathlib import Path
 from typing import Optional
 from autogen_agentchat.teams import SelectorGroupChat
 from autogen_agentchat.conditions import TextMentionTermination
-from autogen_ext.models.openai import OpenAIChatCompletionClient
+from autogen_agentchat.messages import TextMessage
 
 from app.config import get_settings
 from app.agents.planner import create_planner_agent
@@ -12,12 +13,22 @@ from app.agents.reviewer import create_reviewer_agent
 from app.db.database import AsyncSessionLocal
 from app.db.crud import (
     update_task_status, update_task_plan, update_task_execution,
-    update_task_review, create_agent_message, get_task, create_task_file
+    update_task_review, get_task_header, create_task_file
 )
+from app.db.message_sink import MessageSink
 from app.db.models import TaskStatus
 from app.agents.tools._context import set_current_task_id
+from app.agents.tools.browser_pool import close_browser_session
+from app.agents.tools.dataset_cache import release_task_datasets
 from app.agents.interaction_manager import InteractionManager
-
+from app.agents.model_client import get_model_client
+from app.agents.phase_router import PhaseRouter
+from app.agents.response_cache import with_response_cache
+from app.agents.compaction import TaskContextCompactor
+from app.agents.plan import parse_plan
+from app.agents.parallel_executor import execute_plan
+
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 # Thresholds for stuck detection
@@ -55,10 +66,12 @@ async def process_task(task_id: int):
     """Process a task through the multi-agent workflow with stuck detection."""
     async with AsyncSessionLocal() as db:
         # Get the task
-        task = await get_task(db, task_id)
+        task = await get_task_header(db, task_id)
         if not task:
             return
 
+        sink = MessageSink(task_id)
+        compactor = TaskContextCompactor(task_id)
         try:
             # Set task ID context for tool confirmation flow
             set_current_task_id(task_id)
@@ -70,26 +83,37 @@ async def process_task(task_id: int):
             from app.api.websocket import send_status_update, send_agent_message
             await send_status_update(task_id, "planning")
 
-            # Create model client
-            model_client = OpenAIChatCompletionClient(
-                model="gpt-4o-mini",
-                api_key=settings.openai_api_key,
-            )
+            # Per-task view of the process-wide client (shared pool and rate limits);
+            # scheduled runs yield to tasks a user is waiting on
+            lane = "scheduled" if task.is_scheduled else "interactive"
+            model_client = get_model_client(lane)
 
             # Create agents
-            planner = create_planner_agent(model_client)
-            executor = create_executor_agent(model_client)
-            reviewer = create_reviewer_agent(model_client)
+            # Plans and reviews for a repeated objective are served from the cache.
+            # Each agent's context keeps recent turns verbatim and elides old tool output.
+            planner = create_planner_agent(
+                with_response_cache(model_client, "Planner", task.user_id, task_id), compactor.context_for("Planner")
+            )
+            executor = create_executor_agent(model_client, compactor.context_for("Executor", recallable=True))
+            reviewer = create_reviewer_agent(
+                with_response_cache(model_client, "Reviewer", task.user_id, task_id), compactor.context_for("Reviewer")
+            )
 
             # Create termination condition
             termination = TextMentionTermination("TASK_COMPLETE")
+            if settings.parallel_subtasks_enabled:
+                termination = termination | TextMentionTermination("PLAN_COMPLETE", sources=["Planner"])
 
-            # Create the selector group chat
+            # Create the selector group chat. The selector gets its own client view so
+            # the cost of LLM speaker selection can be measured separately.
+            selector_client = get_model_client(lane)
+            router = PhaseRouter(selector_client) if settings.speaker_selection == "router" else None
             team = SelectorGroupChat(
                 participants=[planner, executor, reviewer],
-                model_client=model_client,
+                model_client=selector_client,
                 termination_condition=termination,
                 selector_prompt=SELECTOR_PROMPT,
+                selector_func=router,
             )
 
             # Initial message with the task objective and task ID for tool usage
@@ -114,149 +138,168 @@ Please begin by creating a detailed plan to accomplish this objective."""
             empty_message_count = 0
             user_cancelled = False
 
-            async for message in team.run_stream(task=initial_message):
-                if user_cancelled:
-                    break
-
-                # Extract message content based on type
-                if hasattr(message, 'source') and hasattr(message, 'content'):
-                    agent_name = message.source
-                    content = message.content
-
-                    # Save message to database
-                    await create_agent_message(db, task_id, agent_name, content)
-
-                    # Broadcast message to connected clients
-                    await send_agent_message(task_id, agent_name, content)
-
-                    # === STUCK DETECTION ===
-
-                    # 1. Check for explicit stuck signals from agents
-                    if any(signal in content for signal in STUCK_SIGNALS):
-                        # Extract reason from agent message
-                        reason = _extract_stuck_reason(content)
-                        guidance = await InteractionManager.request_guidance(
-                            task_id=task_id,
-                            reason=f"Agent '{agent_name}' reported it cannot proceed",
-                            context=reason,
-                        )
-                        if guidance and not guidance.get("cancelled"):
-                            user_instruction = guidance.get("values", {}).get("guidance", "")
-                            if user_instruction.lower() in ("cancel", "stop", "abort"):
-                                user_cancelled = True
-                                continue
-                            # Inject user guidance as a system message
-                            await create_agent_message(db, task_id, "User", f"User guidance: {user_instruction}")
-                            await send_agent_message(task_id, "User", f"User guidance: {user_instruction}")
-                        else:
-                            user_cancelled = True
+            # Guidance requests from parallel sub-agents are asked one at a time
+            checks_lock = asyncio.Lock()
+
+            async def ask_guidance(reason: str, context: str) -> bool:
+                """Ask the user how to go on; False when they stop the task."""
+                guidance = await InteractionManager.request_guidance(
+                    task_id=task_id,
+                    reason=reason,
+                    context=context,
+                )
+                if not guidance or guidance.get("cancelled"):
+                    return False
+                user_instruction = guidance.get("values", {}).get("guidance", "")
+                if user_instruction.lower() in ("cancel", "stop", "abort"):
+                    return False
+                # Inject user guidance as a system message
+                await sink.add("User", f"User guidance: {user_instruction}")
+                await send_agent_message(task_id, "User", f"User guidance: {user_instruction}")
+                return True
+
+            async def check_message(agent_name: str, content) -> bool:
+                """Stuck detection for one agent message; False when the user stops the task."""
+                nonlocal tool_denial_count, consecutive_error_count, revision_count, empty_message_count
+
+                # 1. Check for explicit stuck signals from agents
+                if any(signal in content for signal in STUCK_SIGNALS):
+                    # Extract reason from agent message
+                    reason = _extract_stuck_reason(content)
+                    if not await ask_guidance(f"Agent '{agent_name}' reported it cannot proceed", reason):
+                        return False
+
+                # 2. Track tool denials
+                if "was denied by user" in content or "cancelled by user" in content:
+                    tool_denial_count += 1
+                    consecutive_error_count = 0  # Reset error count on denial (different issue)
+
+                    if tool_denial_count >= MAX_TOOL_DENIALS:
+                        denials, tool_denial_count = tool_denial_count, 0  # Reset after asking
+                        if not await ask_guidance(
+                            f"You have denied {denials} tool actions",
+                            "The agent keeps trying actions you don't approve. Please tell the agent what approach to take instead.",
+                        ):
+                            return False
+
+                # 3. Track tool errors
+                if "Failed to" in content or "Error:" in content:
+                    consecutive_error_count += 1
+                    if consecutive_error_count >= MAX_CONSECUTIVE_ERRORS:
+                        errors, consecutive_error_count = consecutive_error_count, 0
+                        if not await ask_guidance(f"Agent encountered {errors} consecutive errors", content[:500]):
+                            return False
+                else:
+                    consecutive_error_count = 0  # Reset on success
+
+                # 4. Track revision loops
+                if agent_name == "Reviewer" and "NEEDS_REVISION" in content:
+                    revision_count += 1
+                    if revision_count >= MAX_REVISION_ROUNDS:
+                        rounds, revision_count = revision_count, 0
+                        if not await ask_guidance(
+                            f"Task has been sent back for revision {rounds} times",
+                            "The Reviewer keeps finding issues. The agent might be going in circles. You can provide specific instructions, simplify the task, or cancel it.",
+                        ):
+                            return False
+
+                # 5. Track empty/very short messages (agent confused)
+                if len(content.strip()) < 20:
+                    empty_message_count += 1
+                    if empty_message_count >= MAX_EMPTY_MESSAGES:
+                        empty_message_count = 0
+                        if not await ask_guidance(
+                            "Agent appears to be confused or stuck in a loop",
+                            "The agent has produced several empty or very short responses. It may not understand the task.",
+                        ):
+                            return False
+                else:
+                    empty_message_count = 0
+                return True
+
+            async def record(agent_name: str, content) -> bool:
+                """Save and broadcast an agent message, then run stuck detection on it.
+
+                Used for the team's messages and the parallel sub-agents' alike;
+                returns False once the user has stopped the task.
+                """
+                nonlocal user_cancelled
+                # Save message to database
+                await sink.add(agent_name, content)
+                # Broadcast message to connected clients
+                await send_agent_message(task_id, agent_name, content)
+                async with checks_lock:
+                    if user_cancelled:
+                        return False
+                    if not await check_message(agent_name, content):
+                        user_cancelled = True
+                return not user_cancelled
+
+            # With parallel subtasks, the team pauses when the plan is complete; the
+            # plan's independent subtasks then run concurrently and their merged report
+            # resumes the team as the Executor's turn. Otherwise it resumes unchanged.
+            next_task = initial_message
+            last_agent, last_content = None, ""
+            while True:
+                async for message in team.run_stream(task=next_task):
+                    if user_cancelled:
+                        break
+
+                    # Extract message content based on type
+                    if hasattr(message, 'source') and hasattr(message, 'content'):
+                        agent_name = message.source
+                        content = message.content
+                        last_agent, last_content = agent_name, content
+
+                        # Save, broadcast and run stuck detection
+                        if not await record(agent_name, content):
                             continue
 
-                    # 2. Track tool denials
-                    if "was denied by user" in content or "cancelled by user" in content:
-                        tool_denial_count += 1
-                        consecutive_error_count = 0  # Reset error count on denial (different issue)
-
-                        if tool_denial_count >= MAX_TOOL_DENIALS:
-                            guidance = await InteractionManager.request_guidance(
-                                task_id=task_id,
-                                reason=f"You have denied {tool_denial_count} tool actions",
-                                context="The agent keeps trying actions you don't approve. Please tell the agent what approach to take instead.",
-                            )
-                            tool_denial_count = 0  # Reset after asking
-                            if guidance and not guidance.get("cancelled"):
-                                user_instruction = guidance.get("values", {}).get("guidance", "")
-                                if user_instruction.lower() in ("cancel", "stop", "abort"):
-                                    user_cancelled = True
-                                    continue
-                                await create_agent_message(db, task_id, "User", f"User guidance: {user_instruction}")
-                                await send_agent_message(task_id, "User", f"User guidance: {user_instruction}")
-                            else:
-                                user_cancelled = True
-                                continue
-
-                    # 3. Track tool errors
-                    if "Failed to" in content or "Error:" in content:
-                        consecutive_error_count += 1
-                        if consecutive_error_count >= MAX_CONSECUTIVE_ERRORS:
-                            guidance = await InteractionManager.request_guidance(
-                                task_id=task_id,
-                                reason=f"Agent encountered {consecutive_error_count} consecutive errors",
-                                context=content[:500],
-                            )
-                            consecutive_error_count = 0
-                            if guidance and not guidance.get("cancelled"):
-                                user_instruction = guidance.get("values", {}).get("guidance", "")
-                                if user_instruction.lower() in ("cancel", "stop", "abort"):
-                                    user_cancelled = True
-                                    continue
-                                await create_agent_message(db, task_id, "User", f"User guidance: {user_instruction}")
-                                await send_agent_message(task_id, "User", f"User guidance: {user_instruction}")
-                            else:
-                                user_cancelled = True
-                                continue
-                    else:
-                        consecutive_error_count = 0  # Reset on success
-
-                    # 4. Track revision loops
-                    if agent_name == "Reviewer" and "NEEDS_REVISION" in content:
-                        revision_count += 1
-                        if revision_count >= MAX_REVISION_ROUNDS:
-                            guidance = await InteractionManager.request_guidance(
-                                task_id=task_id,
-                                reason=f"Task has been sent back for revision {revision_count} times",
-                                context="The Reviewer keeps finding issues. The agent might be going in circles. You can provide specific instructions, simplify the task, or cancel it.",
-                            )
-                            revision_count = 0
-                            if guidance and not guidance.get("cancelled"):
-                                user_instruction = guidance.get("values", {}).get("guidance", "")
-                                if user_instruction.lower() in ("cancel", "stop", "abort"):
-                                    user_cancelled = True
-                                    continue
-                                await create_agent_message(db, task_id, "User", f"User guidance: {user_instruction}")
-                                await send_agent_message(task_id, "User", f"User guidance: {user_instruction}")
-                            else:
-                                user_cancelled = True
-                                continue
-
-                    # 5. Track empty/very short messages (agent confused)
-                    if len(content.strip()) < 20:
-                        empty_message_count += 1
-                        if empty_message_count >= MAX_EMPTY_MESSAGES:
-                            guidance = await InteractionManager.request_guidance(
-                                task_id=task_id,
-                                reason="Agent appears to be confused or stuck in a loop",
-                                context="The agent has produced several empty or very short responses. It may not understand the task.",
-                            )
-                            empty_message_count = 0
-                            if guidance and not guidance.get("cancelled"):
-                                user_instruction = guidance.get("values", {}).get("guidance", "")
-                                if user_instruction.lower() in ("cancel", "stop", "abort"):
-                                    user_cancelled = True
-                                    continue
-                                await create_agent_message(db, task_id, "User", f"User guidance: {user_instruction}")
-                                await send_agent_message(task_id, "User", f"User guidance: {user_instruction}")
-                            else:
-                                user_cancelled = True
-                                continue
-                    else:
-                        empty_message_count = 0
+                        # === PHASE TRACKING (existing logic) ===
+                        if agent_name == "Planner":
+                            plan_content.append(content)
+                            if "PLAN_COMPLETE" in content and current_phase == "planning":
+                                current_phase = "executing"
+                                await sink.flush()
+                                await update_task_status(db, task_id, TaskStatus.EXECUTING)
+                                await send_status_update(task_id, "executing")
+                        elif agent_name == "Executor":
+                            execution_content.append(content)
+                            if "EXECUTION_COMPLETE" in content and current_phase == "executing":
+                                current_phase = "reviewing"
+                                await sink.flush()
+                                await update_task_status(db, task_id, TaskStatus.REVIEWING)
+                                await send_status_update(task_id, "reviewing")
+                        elif agent_name == "Reviewer":
+                            review_content.append(content)
+
+                plan_ready = (
+                    settings.parallel_subtasks_enabled
+                    and last_agent == "Planner"
+                    and isinstance(last_content, str)
+                    and "PLAN_COMPLETE" in last_content
+                )
+                if user_cancelled or not plan_ready:
+                    break
 
-                    # === PHASE TRACKING (existing logic) ===
-                    if agent_name == "Planner":
-                        plan_content.append(content)
-                        if "PLAN_COMPLETE" in content and current_phase == "planning":
-                            current_phase = "executing"
-                            await update_task_status(db, task_id, TaskStatus.EXECUTING)
-                            await send_status_update(task_id, "executing")
-                    elif agent_name == "Executor":
-                        execution_content.append(content)
-                        if "EXECUTION_COMPLETE" in content and current_phase == "executing":
-                            current_phase = "reviewing"
-                            await update_task_status(db, task_id, TaskStatus.REVIEWING)
-                            await send_status_update(task_id, "reviewing")
-                    elif agent_name == "Reviewer":
-                        review_content.append(content)
+                next_task = None
+                plan = parse_plan(last_content)
+                if plan and plan.max_parallelism() > 1:
+                    # Sub-agent messages go through the same stuck detection; stopping
+                    # the task cancels the subtasks still running
+                    report = await execute_plan(task_id, task.objective, plan, lane, compactor, record)
+                    if report is None:
+                        break
+                    next_task = TextMessage(content=report, source="Executor")
+                last_agent, last_content = None, ""
+
+            # Persist the remaining transcript before the final results
+            await sink.flush()
+
+            if router:
+                logger.info(f"Task {task_id} speaker selection: {router.summary()}")
+            if compactor.contexts:
+                logger.info(f"Task {task_id} context compaction: {compactor.summary()}")
 
             # Update task with results
             if plan_content:
@@ -290,8 +333,9 @@ Please begin by creating a detailed plan to accomplish this objective."""
                         pass
 
             if user_cancelled:
+                await sink.add("System", "Task stopped by user.")
+                await sink.flush()
                 await update_task_status(db, task_id, TaskStatus.FAILED)
-                await create_agent_message(db, task_id, "System", "Task stopped by user.")
                 await send_status_update(task_id, "failed")
                 await send_agent_message(task_id, "System", "Task stopped by user.")
             else:
@@ -301,13 +345,29 @@ Please begin by creating a detailed plan to accomplish this objective."""
 
         except Exception as e:
             # Mark task as failed
+            await sink.add("System", f"Error: {str(e)}")
+            try:
+                await sink.flush()
+            except Exception:
+                pass
             await update_task_status(db, task_id, TaskStatus.FAILED)
-            await create_agent_message(db, task_id, "System", f"Error: {str(e)}")
 
             from app.api.websocket import send_status_update, send_agent_message
             await send_status_update(task_id, "failed")
             await send_agent_message(task_id, "System", f"Error: {str(e)}")
 
+        finally:
+            compactor.close()
+            try:
+                await close_browser_session(task_id)
+            except Exception:
+                pass
+            release_task_datasets(task_id)
+            try:
+                await sink.close()
+            except Exception:
+                pass
+
 
 def _extract_stuck_reason(content: str) -> str:
     """Extract the reason from an agent's stuck message."""
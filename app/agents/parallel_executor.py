@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from autogen_agentchat.messages import BaseChatMessage
+
+from app.config import get_settings
+from app.agents.executor import create_executor_agent
+from app.agents.compaction import TaskContextCompactor
+from app.agents.model_client import get_model_client
+from app.agents.plan import Plan, Subtask
+from app.agents.tools._context import set_current_agent_name
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+DEPENDENCY_RESULT_CHARS = 4000
+
+SUBTASK_PROMPT = """## Task Objective
+
+Task ID: {task_id}
+
+{objective}
+
+## Your Assignment
+
+You are one of several Executors working on this plan in parallel. Execute ONLY this subtask:
+
+**{number}. {name}** (Priority: {priority})
+- Description: {description}
+- Expected Output: {expected_output}
+{tools}
+{dependency_results}
+Report the result in the usual format. Do not work on other subtasks and do not say EXECUTION_COMPLETE."""
+
+
+def _subtask_prompt(task_id: int, objective: str, subtask: Subtask, results: Dict[int, str]) -> str:
+    dependency_results = ""
+    if subtask.dependencies:
+        parts = ["\n## Results of Prerequisite Subtasks\n"]
+        for number in subtask.dependencies:
+            parts.append(f"### Subtask {number}\n{results.get(number, '')[:DEPENDENCY_RESULT_CHARS]}\n")
+        dependency_results = "\n".join(parts)
+    return SUBTASK_PROMPT.format(
+        task_id=task_id,
+        objective=objective,
+        number=subtask.number,
+        name=subtask.name,
+        priority=subtask.priority,
+        description=subtask.description or subtask.name,
+        expected_output=subtask.expected_output or "-",
+        tools=f"- Tools: {subtask.tools}" if subtask.tools else "",
+        dependency_results=dependency_results,
+    )
+
+
+async def execute_plan(
+    task_id: int,
+    objective: str,
+    plan: Plan,
+    lane: str,
+    compactor: TaskContextCompactor,
+    on_message: Callable[[str, str], Awaitable[bool]],
+) -> Optional[str]:
+    """Run the plan's subtasks on Executor sub-agents, as many at once as the DAG allows.
+
+    A subtask starts as soon as all its dependencies have finished (not when a
+    whole wave has), with at most `parallel_subtask_limit` running at a time, and
+    receives its dependencies' results in its prompt. Each sub-agent has its own
+    model context and works until it answers without a tool call. Sub-agent
+    messages are passed to `on_message` as they arrive; when it returns False
+    (the task was stopped), the subtasks still running are cancelled and None
+    is returned. Otherwise returns one Executor report with every subtask's
+    result, in plan order, ending with EXECUTION_COMPLETE so the Reviewer runs
+    next.
+    """
+    semaphore = asyncio.Semaphore(settings.parallel_subtask_limit)
+    finished: Dict[int, asyncio.Event] = {s.number: asyncio.Event() for s in plan.subtasks}
+    results: Dict[int, str] = {}
+    failed: set = set()
+    started = time.monotonic()
+    busy_seconds = 0.0
+    runs: List[asyncio.Task] = []
+    stopped = False
+
+    def stop():
+        nonlocal stopped
+        stopped = True
+        for run in runs:
+            if run is not asyncio.current_task():
+                run.cancel()
+
+    async def run_subtask(subtask: Subtask):
+        nonlocal busy_seconds
+        try:
+            for number in subtask.dependencies:
+                await finished[number].wait()
+            blocked = [n for n in subtask.dependencies if n in failed]
+            if blocked:
+                failed.add(subtask.number)
+                results[subtask.number] = f"Skipped: prerequisite subtask(s) {blocked} did not complete."
+                return
+
+            async with semaphore:
+                subtask_started = time.monotonic()
+                name = f"Executor_{subtask.number}"
+                # Its tool calls (e.g. its own browser page) are told apart from its siblings'
+                set_current_agent_name(name)
+                agent = create_executor_agent(
+                    get_model_client(lane),
+                    compactor.context_for(name, recallable=True),
+                    name=name,
+                    max_tool_iterations=settings.parallel_subtask_max_tool_iterations,
+                )
+                label = f"**[Subtask {subtask.number}: {subtask.name}]**"
+                last_text = ""
+                try:
+                    prompt = _subtask_prompt(task_id, objective, subtask, results)
+                    async for message in agent.run_stream(task=prompt):
+                        if isinstance(message, BaseChatMessage) and message.source == name:
+                            last_text = message.to_text()
+                            if not await on_message("Executor", f"{label}\n\n{last_text}"):
+                                stop()
+                                return
+                    results[subtask.number] = last_text or "No result reported."
+                except Exception as e:
+                    failed.add(subtask.number)
+                    results[subtask.number] = f"Failed to complete subtask: {e}"
+                    if not await on_message("Executor", f"{label}\n\nFailed to complete subtask: {e}"):
+                        stop()
+                        return
+                busy_seconds += time.monotonic() - subtask_started
+        finally:
+            finished[subtask.number].set()
+
+    runs.extend(asyncio.create_task(run_subtask(s)) for s in plan.subtasks)
+    # Cancelled siblings of a stopped plan end with CancelledError
+    outcomes = await asyncio.gather(*runs, return_exceptions=True)
+    if stopped:
+        logger.info(f"Task {task_id} was stopped during its parallel subtasks")
+        return None
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Task {task_id} ran {len(plan.subtasks)} subtasks in parallel: "
+        f"{elapsed:.1f}s wall, {busy_seconds:.1f}s of subtask time, {len(failed)} failed"
+    )
+
+    sections = [
+        f"### Executing: {s.name}\n\n{results.get(s.number, 'No result reported.')}\n\n---"
+        for s in plan.subtasks
+    ]
+    return "\n\n".join(sections) + "\n\nEXECUTION_COMPLETE"
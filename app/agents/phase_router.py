@@ -0,0 +1,99 @@
+import logging
+from collections import deque
+from typing import Deque, Optional, Sequence, Tuple
+
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage
+
+from app.agents.model_client import PooledChatCompletionClient
+from app.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+# (seconds, tokens) of recent LLM speaker selections, across tasks; used to
+# estimate what each rule-based decision saved
+_recent_llm_selections: Deque[Tuple[float, int]] = deque(maxlen=200)
+
+_totals = {"tasks": 0, "routed": 0, "llm_fallbacks": 0, "saved_seconds": 0.0, "saved_tokens": 0}
+
+
+class PhaseRouter:
+    """Rule-based `selector_func` for the Planner -> Executor -> Reviewer workflow.
+
+    Picks the next speaker from the same markers the orchestrator tracks:
+      * start of the run          -> Planner
+      * Planner with PLAN_COMPLETE -> Executor
+      * Executor with EXECUTION_COMPLETE -> Reviewer
+      * Reviewer with NEEDS_REVISION -> Executor
+    Any other turn is ambiguous (e.g. a plan or execution still in progress) and
+    returns None, so SelectorGroupChat falls back to its LLM selector.
+
+    `selector_client` should be the client given only to SelectorGroupChat, so
+    its call count and latency measure the fallback selections alone.
+    """
+
+    def __init__(self, selector_client: Optional[PooledChatCompletionClient] = None):
+        self.selector_client = selector_client
+        self.routed = 0
+        self.fallbacks = 0
+
+    def __call__(self, thread: Sequence[BaseAgentEvent | BaseChatMessage]) -> Optional[str]:
+        speaker = self._route(thread)
+        if speaker is None:
+            self.fallbacks += 1
+        else:
+            self.routed += 1
+        return speaker
+
+    @staticmethod
+    def _route(thread: Sequence[BaseAgentEvent | BaseChatMessage]) -> Optional[str]:
+        last = None
+        for message in reversed(thread):
+            if isinstance(message, BaseChatMessage) and message.source != "user":
+                last = message
+                break
+        if last is None:
+            return "Planner"
+
+        content = last.to_text()
+        if last.source == "Planner" and "PLAN_COMPLETE" in content:
+            return "Executor"
+        if last.source == "Executor" and "EXECUTION_COMPLETE" in content:
+            return "Reviewer"
+        if last.source == "Reviewer" and "NEEDS_REVISION" in content:
+            return "Executor"
+        return None
+
+    def summary(self) -> dict:
+        """Selector calls avoided this run, and their estimated latency/token cost."""
+        client = self.selector_client
+        if client and client.call_count:
+            usage = client.total_usage()
+            tokens = usage.prompt_tokens + usage.completion_tokens
+            _recent_llm_selections.append((client.call_seconds / client.call_count, tokens // client.call_count))
+
+        if _recent_llm_selections:
+            avg_seconds = sum(s for s, _ in _recent_llm_selections) / len(_recent_llm_selections)
+            avg_tokens = sum(t for _, t in _recent_llm_selections) / len(_recent_llm_selections)
+        else:
+            avg_seconds = avg_tokens = None
+
+        summary = {
+            "routed": self.routed,
+            "llm_fallbacks": self.fallbacks,
+            "llm_selector_seconds": round(client.call_seconds, 3) if client else None,
+            "saved_seconds": round(self.routed * avg_seconds, 3) if avg_seconds is not None else None,
+            "saved_tokens": int(self.routed * avg_tokens) if avg_tokens is not None else None,
+        }
+        _totals["tasks"] += 1
+        _totals["routed"] += self.routed
+        _totals["llm_fallbacks"] += self.fallbacks
+        _totals["saved_seconds"] += summary["saved_seconds"] or 0.0
+        _totals["saved_tokens"] += summary["saved_tokens"] or 0
+        return summary
+
+
+def get_phase_router_stats() -> dict:
+    return {**_totals, "saved_seconds": round(_totals["saved_seconds"], 3)}
+
+
+register_stats("speaker_selection", get_phase_router_stats)
@@ -0,0 +1,122 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+_SUBTASK_HEADER = re.compile(r"^\s*(\d+)\.\s+\*\*\[?(.+?)\]?\*\*(.*)$")
+_FIELD = re.compile(r"^\s*[-*]\s*\**(Description|Dependencies|Expected Output|Tools?)\**\s*:\s*(.*)$", re.IGNORECASE)
+_PRIORITY = re.compile(r"Priority:\s*(High|Medium|Low)", re.IGNORECASE)
+_NO_DEPENDENCIES = {"", "none", "n/a", "na", "-", "no", "nothing"}
+
+
+@dataclass
+class Subtask:
+    number: int
+    name: str
+    priority: str = "Medium"
+    description: str = ""
+    expected_output: str = ""
+    tools: str = ""
+    dependencies: List[int] = field(default_factory=list)
+    raw_dependencies: str = ""
+
+
+@dataclass
+class Plan:
+    """Subtasks parsed from the Planner's `### Subtasks` section, as a dependency DAG."""
+
+    subtasks: List[Subtask]
+
+    def get(self, number: int) -> Optional[Subtask]:
+        return next((s for s in self.subtasks if s.number == number), None)
+
+    def waves(self) -> Optional[List[List[Subtask]]]:
+        """Subtasks grouped so each wave depends only on earlier waves; None if there is a cycle."""
+        remaining = {s.number: set(s.dependencies) for s in self.subtasks}
+        done: set = set()
+        waves = []
+        while remaining:
+            ready = sorted(n for n, deps in remaining.items() if deps <= done)
+            if not ready:
+                return None
+            waves.append([self.get(n) for n in ready])
+            done.update(ready)
+            for n in ready:
+                del remaining[n]
+        return waves
+
+    def max_parallelism(self) -> int:
+        waves = self.waves()
+        return max((len(w) for w in waves), default=0) if waves else 0
+
+
+def _resolve_dependencies(text: str, subtask: Subtask, names: Dict[int, str]) -> List[int]:
+    cleaned = text.strip().strip(".").strip()
+    if cleaned.lower() in _NO_DEPENDENCIES or cleaned.lower().startswith("none"):
+        return []
+    numbers = {int(n) for n in re.findall(r"\b(\d+)\b", cleaned)}
+    if not numbers:
+        # Dependencies given by name, e.g. "Research competitors"
+        lowered = cleaned.lower()
+        numbers = {n for n, name in names.items() if name.lower() in lowered}
+    return sorted(n for n in numbers if n in names and n != subtask.number)
+
+
+def parse_plan(text: str) -> Optional[Plan]:
+    """Parse the Planner's markdown plan; None if it has no numbered subtasks.
+
+    Each `1. **Name** (Priority: High)` header starts a subtask, and its
+    `- Dependencies:` line may list prerequisite subtask numbers (or names).
+    """
+    subtasks: List[Subtask] = []
+    in_subtasks = "### Subtasks" not in text
+    current: Optional[Subtask] = None
+    last_field = None
+
+    for line in text.splitlines():
+        if line.startswith("### "):
+            in_subtasks = line.strip().lower() == "### subtasks"
+            current = None
+            continue
+        if not in_subtasks:
+            continue
+
+        header = _SUBTASK_HEADER.match(line)
+        if header:
+            priority = _PRIORITY.search(header.group(3))
+            current = Subtask(
+                number=int(header.group(1)),
+                name=header.group(2).strip(),
+                priority=priority.group(1).capitalize() if priority else "Medium",
+            )
+            subtasks.append(current)
+            last_field = None
+            continue
+        if current is None:
+            continue
+
+        match = _FIELD.match(line)
+        if match:
+            last_field = match.group(1).lower()
+            value = match.group(2).strip()
+        elif last_field and line.strip():
+            value = line.strip()
+        else:
+            continue
+
+        if last_field == "description":
+            current.description = f"{current.description} {value}".strip()
+        elif last_field == "dependencies":
+            current.raw_dependencies = f"{current.raw_dependencies} {value}".strip()
+        elif last_field == "expected output":
+            current.expected_output = f"{current.expected_output} {value}".strip()
+        else:
+            current.tools = f"{current.tools} {value}".strip()
+
+    if not subtasks:
+        return None
+    names = {s.number: s.name for s in subtasks}
+    if len(names) != len(subtasks):
+        return None  # duplicate numbering; not a plan we can schedule
+    for subtask in subtasks:
+        subtask.dependencies = _resolve_dependencies(subtask.raw_dependencies, subtask, names)
+    return Plan(subtasks)
@@ -20,12 +20,12 @@ When creating a plan, structure your response as follows:
 ### Subtasks
 1. **[Subtask Name]** (Priority: High/Medium/Low)
    - Description: [What needs to be done]
-   - Dependencies: [Any prerequisite subtasks]
+   - Dependencies: [None, or the numbers of prerequisite subtasks, e.g. "1, 3"]
    - Expected Output: [What success looks like]
 
 2. **[Subtask Name]** (Priority: High/Medium/Low)
    - Description: [What needs to be done]
-   - Dependencies: [Any prerequisite subtasks]
+   - Dependencies: [None, or the numbers of prerequisite subtasks, e.g. "1, 3"]
    - Expected Output: [What success looks like]
 
 [Continue for all subtasks...]
@@ -36,7 +36,7 @@ When creating a plan, structure your response as follows:
 ## Available Executor Tools:
 When creating your plan, the Executor has these real-world tools available:
 
-**Research & Data:** web_search, web_search_news, read_webpage, create_file, execute_python_code, make_api_call, read_csv_file, analyze_csv_data
+**Research & Data:** web_search, web_search_news, read_webpage, read_webpages, create_file, execute_python_code, make_api_call, read_csv_file, analyze_csv_data
 **Communication:** send_email
 **Browser Automation:** browser_navigate, browser_fill_form, browser_click, browser_screenshot, browser_get_text, browser_close
 **Desktop Automation:** desktop_screenshot, desktop_click, desktop_double_click, desktop_type_text, desktop_hotkey, desktop_move_to
@@ -61,6 +61,7 @@ Design your subtasks to leverage these tools when appropriate. For example:
 - Keep subtasks focused and achievable
 - Provide clear success criteria
 - Specify which tools the Executor should use for each subtask
+- Only list a dependency when a subtask needs another's output; subtasks with no dependencies between them are executed in parallel
 
 ## When You're Stuck:
 If you cannot create a plan because:
@@ -75,10 +76,11 @@ This will pause the workflow and ask the user for guidance. Do NOT guess or make
 After creating your plan, say "PLAN_COMPLETE" to signal you're done planning."""
 
 
-def create_planner_agent(model_client) -> AssistantAgent:
+def create_planner_agent(model_client, model_context=None) -> AssistantAgent:
     """Create and return the Planner agent."""
     return AssistantAgent(
         name="Planner",
         model_client=model_client,
+        model_context=model_context,
         system_message=PLANNER_SYSTEM_PROMPT,
     )
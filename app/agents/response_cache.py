@@ -0,0 +1,294 @@
+import hashlib
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Dict, Literal, Mapping, Optional, Sequence, Tuple, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import (
+    ChatCompletionClient, CreateResult, LLMMessage, ModelCapabilities, ModelInfo, RequestUsage, SystemMessage,
+)
+from autogen_core.tools import Tool, ToolSchema
+from pydantic import BaseModel
+
+from app.config import get_settings
+from app.metrics import register_stats
+
+settings = get_settings()
+
+# Per-task details that must not defeat the cache for a rerun or scheduled repeat
+_VOLATILE = [
+    (re.compile(r"Task ID:\s*\d+"), "Task ID: #"),
+    (re.compile(r"task_\d+"), "task_#"),
+    (re.compile(r"\s+"), " "),
+]
+# Stands in for the task id in stored answers; the id of the task served the hit is put back
+_TASK_ID_PLACEHOLDER = "\x00task-id\x00"
+
+VECTOR_DIMENSIONS = 512
+
+
+def _normalize(text: str) -> str:
+    for pattern, replacement in _VOLATILE:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def _mask_task_id(text: str, task_id: int) -> str:
+    return re.sub(rf"(Task ID:\s*|task_){task_id}\b", rf"\g<1>{_TASK_ID_PLACEHOLDER}", text)
+
+
+def _unmask_task_id(result: CreateResult, task_id: int) -> CreateResult:
+    if not isinstance(result.content, str) or _TASK_ID_PLACEHOLDER not in result.content:
+        return result
+    return result.model_copy(update={"content": result.content.replace(_TASK_ID_PLACEHOLDER, str(task_id))})
+
+
+def _vectorize(text: str) -> Dict[int, float]:
+    """Hashed bag-of-words vector (unit length) for local similarity search."""
+    counts: Dict[int, float] = {}
+    for word in re.findall(r"\w+", text):
+        bucket = int(hashlib.blake2b(word.encode(), digest_size=4).hexdigest(), 16) % VECTOR_DIMENSIONS
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {k: v / norm for k, v in counts.items()}
+
+
+def _cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class _Entry:
+    __slots__ = ("result", "scope", "vector", "expires_at")
+
+    def __init__(self, result: CreateResult, scope: str, vector: Dict[int, float], expires_at: float):
+        self.result = result
+        self.scope = scope
+        self.vector = vector
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """Process-wide cache of text completions, keyed by user and prompt content.
+
+    The exact key is sha256(user id, system prompt hash, model, normalized
+    conversation), where normalization drops task ids and collapses whitespace
+    so a rerun or scheduled repeat of the same objective hits; one user's
+    answers are never served to another. The task id in a stored answer is
+    replaced by the id of the task that gets the hit. With a similarity
+    threshold > 0, a miss also compares a hashed bag-of-words vector against
+    entries of the same scope (user, system prompt, model and turn count) and
+    accepts the best match at or above the threshold. Entries expire after `ttl_seconds`, and the least
+    recently used are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _agent_stats(self, agent: str) -> Dict[str, int]:
+        return self._stats.setdefault(agent, {"exact_hits": 0, "similar_hits": 0, "misses": 0, "stores": 0})
+
+    @staticmethod
+    def keys(user_id: int, model: str, messages: Sequence[LLMMessage]) -> Tuple[str, str, str]:
+        """(exact key, similarity scope, normalized conversation text)."""
+        system = "\n".join(str(m.content) for m in messages if isinstance(m, SystemMessage))
+        system_hash = hashlib.sha256(system.encode()).hexdigest()
+        turns = [m for m in messages if not isinstance(m, SystemMessage)]
+        conversation = "\n".join(
+            f"{getattr(m, 'source', type(m).__name__)}: {_normalize(str(m.content))}" for m in turns
+        )
+        scope = f"{user_id}:{system_hash}:{model}:{len(turns)}"
+        exact = hashlib.sha256(f"{scope}\n{conversation}".encode()).hexdigest()
+        return exact, scope, conversation
+
+    def lookup(
+        self, agent: str, user_id: int, task_id: int, model: str, messages: Sequence[LLMMessage]
+    ) -> Optional[CreateResult]:
+        stats = self._agent_stats(agent)
+        exact, scope, conversation = self.keys(user_id, model, messages)
+        now = time.monotonic()
+
+        entry = self._entries.get(exact)
+        if entry and entry.expires_at > now:
+            self._entries.move_to_end(exact)
+            stats["exact_hits"] += 1
+            return _unmask_task_id(entry.result, task_id)
+
+        if self.similarity_threshold > 0:
+            vector = _vectorize(conversation)
+            best_key, best_score = None, self.similarity_threshold
+            for key, candidate in self._entries.items():
+                if candidate.scope != scope or candidate.expires_at <= now:
+                    continue
+                score = _cosine(vector, candidate.vector)
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key:
+                self._entries.move_to_end(best_key)
+                stats["similar_hits"] += 1
+                return _unmask_task_id(self._entries[best_key].result, task_id)
+
+        stats["misses"] += 1
+        return None
+
+    def store(
+        self, agent: str, user_id: int, task_id: int, model: str, messages: Sequence[LLMMessage], result: CreateResult
+    ):
+        exact, scope, conversation = self.keys(user_id, model, messages)
+        vector = _vectorize(conversation) if self.similarity_threshold > 0 else {}
+        result = result.model_copy(update={"content": _mask_task_id(result.content, task_id)})
+        self._entries[exact] = _Entry(result, scope, vector, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(exact)
+        self._agent_stats(agent)["stores"] += 1
+        self._evict()
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+            "agents": {agent: dict(stats) for agent, stats in self._stats.items()},
+        }
+
+
+class CachingChatCompletionClient(ChatCompletionClient):
+    """Wraps an agent's model client and serves repeated text completions from `ResponseCache`.
+
+    Only plain text answers (no tools, JSON mode or extra arguments) are cached,
+    so a hit never replays a tool call.
+    """
+
+    def __init__(self, inner: ChatCompletionClient, agent_name: str, user_id: int, task_id: int, cache: "ResponseCache"):
+        self._inner = inner
+        self.agent_name = agent_name
+        self.user_id = user_id
+        self.task_id = task_id
+        self._cache = cache
+
+    @staticmethod
+    def _cacheable(tools, json_output, extra_create_args) -> bool:
+        return not tools and not json_output and not extra_create_args
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        cacheable = self._cacheable(tools, json_output, extra_create_args)
+        if cacheable:
+            hit = self._cache.lookup(self.agent_name, self.user_id, self.task_id, settings.llm_model, messages)
+            if hit is not None:
+                return hit
+
+        result = await self._inner.create(
+            messages,
+            tools=tools,
+            tool_choice=tool_choice,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        )
+        if cacheable and isinstance(result.content, str) and result.finish_reason == "stop":
+            cached = result.model_copy(update={
+                "cached": True,
+                "usage": RequestUsage(prompt_tokens=0, completion_tokens=0),
+            })
+            self._cache.store(self.agent_name, self.user_id, self.task_id, settings.llm_model, messages, cached)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        if self._cacheable(tools, json_output, extra_create_args):
+            hit = self._cache.lookup(self.agent_name, self.user_id, self.task_id, settings.llm_model, messages)
+            if hit is not None:
+                yield hit.content
+                yield hit
+                return
+        async for chunk in self._inner.create_stream(
+            messages,
+            tools=tools,
+            tool_choice=tool_choice,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        ):
+            yield chunk
+
+    async def close(self) -> None:
+        await self._inner.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._inner.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self._inner.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._inner.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._inner.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self._inner.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._inner.model_info
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(
+            settings.response_cache_max_entries,
+            settings.response_cache_ttl_seconds,
+            settings.response_cache_similarity_threshold,
+        )
+    return _cache
+
+
+def with_response_cache(client: ChatCompletionClient, agent_name: str, user_id: int, task_id: int) -> ChatCompletionClient:
+    """Wrap an agent's client in the shared response cache, if enabled, scoped to the task's user."""
+    if not settings.response_cache_enabled:
+        return client
+    return CachingChatCompletionClient(client, agent_name, user_id, task_id, get_response_cache())
+
+
+def get_response_cache_stats() -> Optional[dict]:
+    return _cache.stats() if _cache else None
+
+
+register_stats("response_cache", get_response_cache_stats)
@@ -85,10 +85,11 @@ After your review, if approved say "TASK_COMPLETE" to end the workflow.
 If revisions are needed, clearly list what the Executor must fix."""
 
 
-def create_reviewer_agent(model_client) -> AssistantAgent:
+def create_reviewer_agent(model_client, model_context=None) -> AssistantAgent:
     """Create and return the Reviewer agent."""
     return AssistantAgent(
         name="Reviewer",
         model_client=model_client,
+        model_context=model_context,
         system_message=REVIEWER_SYSTEM_PROMPT,
     )
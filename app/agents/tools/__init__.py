@@ -1,7 +1,7 @@
 from autogen_core.tools import FunctionTool
 
 from app.agents.tools.web_search import web_search, web_search_news
-from app.agents.tools.web_reader import read_webpage
+from app.agents.tools.web_reader import read_webpage, read_webpages
 from app.agents.tools.email_sender import send_email
 from app.agents.tools.file_manager import create_file
 from app.agents.tools.code_executor import execute_python_code
@@ -18,6 +18,7 @@ from app.agents.tools.desktop_automation import (
     desktop_find_window, desktop_click, desktop_double_click,
     desktop_type_text, desktop_hotkey, desktop_move_to
 )
+from app.agents.tools.context_recall import recall_context
 from app.agents.tools.confirmed_tool import make_confirmed_tool
 
 
@@ -28,12 +29,13 @@ def get_executor_tools() -> list:
         FunctionTool(make_confirmed_tool(web_search, "web_search"), description="Search the internet using DuckDuckGo. Returns titles, URLs, and snippets."),
         FunctionTool(make_confirmed_tool(web_search_news, "web_search_news"), description="Search for recent news articles. Use this for current events, latest updates, and real-time information."),
         FunctionTool(make_confirmed_tool(read_webpage, "read_webpage"), description="Fetch and extract text content from a URL. Intelligently extracts main article content."),
+        FunctionTool(make_confirmed_tool(read_webpages, "read_webpages"), description="Fetch several URLs at once (comma-separated) and extract the main text of each."),
         FunctionTool(make_confirmed_tool(send_email, "send_email"), description="Send an email via SMTP to a specified address. Will ask the user for email details."),
         FunctionTool(make_confirmed_tool(create_file, "create_file"), description="Create a file (txt, md, csv, json, html) in the task workspace."),
         FunctionTool(make_confirmed_tool(execute_python_code, "execute_python_code"), description="Execute Python code in a sandboxed subprocess and return output."),
         FunctionTool(make_confirmed_tool(make_api_call, "make_api_call"), description="Make an HTTP request to an external REST API."),
         FunctionTool(make_confirmed_tool(read_csv_file, "read_csv_file"), description="Read and display contents of a CSV file from the task workspace."),
-        FunctionTool(make_confirmed_tool(analyze_csv_data, "analyze_csv_data"), description="Perform basic analysis on a CSV file."),
+        FunctionTool(make_confirmed_tool(analyze_csv_data, "analyze_csv_data"), description="Analyze a CSV file: summary, columns, row_count, unique_values, stats, or a JSON query (filter, group-by, aggregate, sort, top-n, describe)."),
         # Browser automation tools (with confirmation)
         FunctionTool(make_confirmed_tool(browser_navigate, "browser_navigate"), description="Open a URL in a headless browser and return the page title."),
         FunctionTool(make_confirmed_tool(browser_fill_form, "browser_fill_form"), description="Fill a form field on the current browser page using CSS selector."),
@@ -59,4 +61,6 @@ def get_executor_tools() -> list:
         FunctionTool(make_confirmed_tool(post_to_twitter, "post_to_twitter"), description="Post a tweet to Twitter/X via API v2."),
         FunctionTool(make_confirmed_tool(post_to_linkedin, "post_to_linkedin"), description="Post a text update to LinkedIn via UGC API."),
         FunctionTool(make_confirmed_tool(post_to_facebook, "post_to_facebook"), description="Post a message to a Facebook Page via Graph API."),
+        # Reads back the agent's own earlier output, so it needs no confirmation
+        FunctionTool(recall_context, description="Return the full text of an earlier tool output that was elided from the conversation (by its ctx-... reference)."),
     ]
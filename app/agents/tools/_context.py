@@ -1,6 +1,8 @@
 import contextvars
 
 _current_task_id: contextvars.ContextVar[int] = contextvars.ContextVar('current_task_id', default=None)
+# Set for parallel sub-agents (Executor_2, ...); None for the task's main agents
+_current_agent_name: contextvars.ContextVar[str] = contextvars.ContextVar('current_agent_name', default=None)
 
 
 def set_current_task_id(task_id: int):
@@ -9,3 +11,11 @@ def set_current_task_id(task_id: int):
 
 def get_current_task_id() -> int:
     return _current_task_id.get()
+
+
+def set_current_agent_name(name: str):
+    _current_agent_name.set(name)
+
+
+def get_current_agent_name() -> str:
+    return _current_agent_name.get()
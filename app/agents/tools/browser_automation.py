@@ -1,17 +1,12 @@
 from pathlib import Path
 
-_browser = None
-_page = None
+from app.agents.tools.browser_pool import get_browser_pool
+from app.agents.tools._context import get_current_agent_name, get_current_task_id
 
 
-async def _get_page():
-    global _browser, _page
-    if _page is None:
-        from playwright.async_api import async_playwright
-        pw = await async_playwright().start()
-        _browser = await pw.chromium.launch(headless=True)
-        _page = await _browser.new_page()
-    return _page
+def _task_page():
+    """The current agent's own page in the shared browser."""
+    return get_browser_pool().page(get_current_task_id(), get_current_agent_name())
 
 
 async def browser_navigate(url: str) -> str:
@@ -21,10 +16,10 @@ async def browser_navigate(url: str) -> str:
         url: The full URL to navigate to (e.g., https://google.com).
     """
     try:
-        page = await _get_page()
-        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-        title = await page.title()
-        return f"Navigated to: {title} ({url})"
+        async with _task_page() as page:
+            await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            title = await page.title()
+            return f"Navigated to: {title} ({url})"
     except Exception as e:
         return f"Navigation failed: {str(e)}"
 
@@ -37,9 +32,9 @@ async def browser_fill_form(selector: str, value: str) -> str:
         value: The value to fill in the field.
     """
     try:
-        page = await _get_page()
-        await page.fill(selector, value)
-        return f"Filled '{selector}' with value."
+        async with _task_page() as page:
+            await page.fill(selector, value)
+            return f"Filled '{selector}' with value."
     except Exception as e:
         return f"Fill form failed: {str(e)}"
 
@@ -51,9 +46,9 @@ async def browser_click(selector: str) -> str:
         selector: CSS selector for the element to click (e.g., 'button[type=submit]').
     """
     try:
-        page = await _get_page()
-        await page.click(selector)
-        return f"Clicked element: {selector}"
+        async with _task_page() as page:
+            await page.click(selector)
+            return f"Clicked element: {selector}"
     except Exception as e:
         return f"Click failed: {str(e)}"
 
@@ -66,11 +61,11 @@ async def browser_screenshot(task_id: str, filename: str = "screenshot.png") ->
         filename: Name of the screenshot file (default: screenshot.png).
     """
     try:
-        page = await _get_page()
-        path = Path("workspace") / f"task_{task_id}" / filename
-        path.parent.mkdir(parents=True, exist_ok=True)
-        await page.screenshot(path=str(path), full_page=True)
-        return f"Screenshot saved: {path}"
+        async with _task_page() as page:
+            path = Path("workspace") / f"task_{task_id}" / filename
+            path.parent.mkdir(parents=True, exist_ok=True)
+            await page.screenshot(path=str(path), full_page=True)
+            return f"Screenshot saved: {path}"
     except Exception as e:
         return f"Screenshot failed: {str(e)}"
 
@@ -82,8 +77,8 @@ async def browser_get_text(selector: str = "body") -> str:
         selector: CSS selector for the element (default: 'body' for full page text).
     """
     try:
-        page = await _get_page()
-        text = await page.inner_text(selector)
+        async with _task_page() as page:
+            text = await page.inner_text(selector)
         if len(text) > 5000:
             text = text[:5000] + "\n\n[Content truncated...]"
         return text
@@ -93,12 +88,8 @@ async def browser_get_text(selector: str = "body") -> str:
 
 async def browser_close() -> str:
     """Close the browser session."""
-    global _browser, _page
     try:
-        if _browser:
-            await _browser.close()
-            _browser = None
-            _page = None
+        await get_browser_pool().close(get_current_task_id(), get_current_agent_name())
         return "Browser closed."
     except Exception as e:
         return f"Close failed: {str(e)}"
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+from app.config import get_settings
+from app.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+REAP_INTERVAL_SECONDS = 30
+
+# (task id, agent name): parallel sub-agents get their own page, the task's main agents share one
+SessionKey = Tuple[int, Optional[str]]
+
+
+class _Session:
+    """One agent's isolated BrowserContext and its page."""
+
+    __slots__ = ("context", "page", "last_used", "lock")
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+
+
+class BrowserPool:
+    """One shared Chromium process with an isolated BrowserContext per task.
+
+    Contexts share nothing (cookies, storage, tabs), so concurrent tasks no
+    longer drive the same page. Parallel sub-agents of a task (Executor_2, ...)
+    each get their own context too. A context is created on the agent's first
+    browser tool call and closed by browser_close (that agent's only), when
+    process_task finishes (all of the task's), or once idle for
+    `browser_idle_seconds`. At most `browser_max_contexts` exist at a time; a
+    new one waits for a free slot rather than closing a context another task
+    may still be using, and fails after `browser_context_wait_seconds`. Calls
+    for one context are serialized on its page. If Chromium dies it is
+    relaunched on the next call.
+    """
+
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+        self._launch_lock = asyncio.Lock()
+        self._sessions: Dict[SessionKey, _Session] = {}
+        self._session_lock = asyncio.Lock()
+        self._reaper: Optional[asyncio.Task] = None
+        self.stats = {"launches": 0, "contexts_created": 0, "reaped": 0, "waited_for_slot": 0}
+
+    async def _ensure_browser(self):
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._browser is not None:
+                logger.warning("Chromium disconnected; relaunching")
+                self._sessions.clear()
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self.stats["launches"] += 1
+            if self._reaper is None:
+                self._reaper = asyncio.create_task(self._reap_idle())
+            return self._browser
+
+    async def warm(self):
+        """Launch Chromium ahead of the first browser tool call."""
+        await self._ensure_browser()
+
+    async def _session(self, key: SessionKey) -> _Session:
+        browser = await self._ensure_browser()
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+        async with self._session_lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                return session
+            if len(self._sessions) >= settings.browser_max_contexts:
+                # Closing an idle context here could pull the page from under an agent
+                # between two calls, so wait for one to be closed or reaped instead
+                self.stats["waited_for_slot"] += 1
+                try:
+                    async with asyncio.timeout(settings.browser_context_wait_seconds):
+                        while len(self._sessions) >= settings.browser_max_contexts:
+                            await asyncio.sleep(0.1)
+                except TimeoutError:
+                    raise RuntimeError(f"all {settings.browser_max_contexts} browser sessions are in use; try again later")
+            context = await browser.new_context()
+            session = _Session(context, await context.new_page())
+            self._sessions[key] = session
+            self.stats["contexts_created"] += 1
+            return session
+
+    @asynccontextmanager
+    async def page(self, task_id: Optional[int], agent: Optional[str] = None):
+        """The agent's page, held exclusively for the duration of the block."""
+        key = (task_id or 0, agent)
+        while True:
+            session = await self._session(key)
+            async with session.lock:
+                if self._sessions.get(key) is not session:
+                    continue  # Closed while we waited for it; open a new one
+                try:
+                    yield session.page
+                finally:
+                    session.last_used = time.monotonic()
+                return
+
+    async def _close_session(self, session: _Session):
+        try:
+            await session.context.close()
+        except Exception as e:
+            logger.debug(f"Closing browser context failed: {e}")
+
+    async def close(self, task_id: Optional[int], agent: Optional[str] = None) -> bool:
+        """Close the agent's context; False if it had none."""
+        session = self._sessions.pop((task_id or 0, agent), None)
+        if session is None:
+            return False
+        async with session.lock:
+            await self._close_session(session)
+        return True
+
+    async def close_task(self, task_id: int):
+        """Close every context of the task (its main agents' and its sub-agents')."""
+        for key in [key for key in self._sessions if key[0] == task_id]:
+            await self.close(*key)
+
+    async def _reap_idle(self):
+        while True:
+            await asyncio.sleep(REAP_INTERVAL_SECONDS)
+            cutoff = time.monotonic() - settings.browser_idle_seconds
+            for key, session in list(self._sessions.items()):
+                if session.last_used < cutoff and not session.lock.locked():
+                    if self._sessions.get(key) is session:
+                        del self._sessions[key]
+                        self.stats["reaped"] += 1
+                        await self._close_session(session)
+
+    async def shutdown(self):
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+        for session in list(self._sessions.values()):
+            await self._close_session(session)
+        self._sessions.clear()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+    return _pool
+
+
+async def prewarm_browser_pool():
+    """Launch Chromium at startup when `browser_prewarm` is set; failures only log."""
+    if not settings.browser_prewarm:
+        return
+    try:
+        await get_browser_pool().warm()
+    except Exception as e:
+        logger.warning(f"Browser prewarm failed: {e}")
+
+
+async def close_browser_session(task_id: int):
+    """Called when a task finishes, so its contexts do not wait for the idle reaper."""
+    if _pool is not None:
+        await _pool.close_task(task_id)
+
+
+def get_browser_pool_stats() -> Optional[dict]:
+    if _pool is None:
+        return None
+    return {**_pool.stats, "contexts": len(_pool._sessions), "running": _pool._browser is not None}
+
+
+register_stats("browser_pool", get_browser_pool_stats)
+
+
+async def shutdown_browser_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.shutdown()
+        _pool = None
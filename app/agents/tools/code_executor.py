@@ -1,12 +1,23 @@
 import asyncio
+import logging
+import signal
 import sys
 
+from app.config import get_settings
+from app.agents.tools._context import get_current_task_id
+from app.agents.tools.dataset_cache import get_dataset_handles
+from app.agents.tools.sandbox_pool import SandboxUnavailable, get_sandbox_pool
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
 
 async def execute_python_code(code: str, timeout_seconds: int = 30) -> str:
     """Execute Python code in a sandboxed subprocess and return the output.
 
     Args:
-        code: Python code to execute. Must use print() to produce output.
+        code: Python code to execute. Must use print() to produce output. CSVs already
+              read with the CSV tools can be opened with load_dataset("file.csv").
         timeout_seconds: Maximum execution time in seconds (default 30, max 60).
     """
     timeout_seconds = min(timeout_seconds, 60)
@@ -19,6 +30,48 @@ async def execute_python_code(code: str, timeout_seconds: int = 30) -> str:
         if term in code:
             return f"Error: Use of '{term}' is not permitted for security reasons."
 
+    if settings.sandbox_pool_enabled:
+        try:
+            datasets = get_dataset_handles(get_current_task_id())
+            result = await get_sandbox_pool().run(code, timeout_seconds, datasets)
+        except SandboxUnavailable as e:
+            logger.warning(f"Sandbox pool unavailable, running code in a new process: {e}")
+        except Exception as e:
+            return f"Failed to execute code: {str(e)}"
+        else:
+            return _format_pool_result(result, timeout_seconds)
+    return await _run_in_subprocess(code, timeout_seconds)
+
+
+def _format_output(output: str, errors: str) -> str:
+    result_parts = []
+    if output:
+        result_parts.append(f"Output:\n{output}")
+    if errors:
+        result_parts.append(f"Errors:\n{errors}")
+    if not result_parts:
+        result_parts.append("Code executed successfully (no output).")
+
+    return "\n\n".join(result_parts)
+
+
+def _format_pool_result(result: dict, timeout_seconds: int) -> str:
+    if "error" in result:
+        return f"Failed to execute code: {result['error']}"
+    if result["timed_out"]:
+        return f"Error: Code execution timed out after {timeout_seconds} seconds."
+    errors = result["stderr"].strip()
+    if result["signal"] == signal.SIGXCPU:
+        errors = f"{errors}\nCode exceeded the CPU time limit of {settings.sandbox_cpu_seconds} seconds.".strip()
+    elif result["signal"]:
+        errors = f"{errors}\nCode was killed by signal {result['signal']}.".strip()
+    text = _format_output(result["stdout"].strip(), errors)
+    if result["truncated_bytes"]:
+        text += f"\n\n[Output truncated: {result['truncated_bytes']} more bytes]"
+    return text
+
+
+async def _run_in_subprocess(code: str, timeout_seconds: int) -> str:
     try:
         process = await asyncio.create_subprocess_exec(
             sys.executable, "-c", code,
@@ -36,15 +89,6 @@ async def execute_python_code(code: str, timeout_seconds: int = 30) -> str:
 
         output = stdout.decode("utf-8", errors="replace").strip()
         errors = stderr.decode("utf-8", errors="replace").strip()
-
-        result_parts = []
-        if output:
-            result_parts.append(f"Output:\n{output}")
-        if errors:
-            result_parts.append(f"Errors:\n{errors}")
-        if not result_parts:
-            result_parts.append("Code executed successfully (no output).")
-
-        return "\n\n".join(result_parts)
+        return _format_output(output, errors)
     except Exception as e:
         return f"Failed to execute code: {str(e)}"
@@ -1,7 +1,8 @@
 import json
 import inspect
 from typing import Callable
-from app.agents.interaction_manager import InteractionManager
+from app.agents.interaction_manager import InteractionManager, confirmation_batcher
+from app.agents.approval_policy import approval_engine, parameter_summary
 from app.agents.tools._context import get_current_task_id
 
 
@@ -17,6 +18,7 @@ TOOL_INPUT_SPECS = {
     "web_search": {"needs_input": False, "confirm_only": True},
     "web_search_news": {"needs_input": False, "confirm_only": True},
     "read_webpage": {"needs_input": False, "confirm_only": True},
+    "read_webpages": {"needs_input": False, "confirm_only": True},
     "create_file": {"needs_input": False, "confirm_only": True},
     "execute_python_code": {"needs_input": False, "confirm_only": True},
     "make_api_call": {"needs_input": False, "confirm_only": True},
@@ -125,16 +127,15 @@ def make_confirmed_tool(original_func: Callable, tool_name: str) -> Callable:
                 for key, value in user_input.get("values", {}).items():
                     kwargs[key] = value
 
-        # Step 2: Confirmation
-        param_summary = {k: str(v)[:200] for k, v in kwargs.items() if k != "task_id"}
+        # Step 2: Confirmation, unless one of the user's policies auto-approves the call
+        if await approval_engine.auto_approve(task_id, tool_name, kwargs):
+            return await original_func(**kwargs)
+
+        param_summary = parameter_summary(kwargs)
         action_desc = f"Execute **{tool_name}**"
 
-        confirmed = await InteractionManager.request_confirmation(
-            task_id=task_id,
-            tool_name=tool_name,
-            action_description=action_desc,
-            parameters=param_summary,
-        )
+        # Batched with the other tool calls of the same turn into one interaction
+        confirmed = await confirmation_batcher.confirm(task_id, tool_name, action_desc, param_summary)
 
         if not confirmed:
             return f"Tool {tool_name} was denied by user. Please adjust your approach or try a different tool."
@@ -0,0 +1,14 @@
+from app.agents.compaction import recall_output
+from app.agents.tools._context import get_current_task_id
+
+
+async def recall_context(ref: str) -> str:
+    """Return the full text of an earlier tool output that was elided from the conversation.
+
+    Args:
+        ref: The reference shown in the elided message, e.g. 'ctx-1a2b3c4d5e'.
+    """
+    text = recall_output(get_current_task_id(), ref)
+    if text is None:
+        return f"No stored output for reference '{ref}'."
+    return text
@@ -0,0 +1,296 @@
+"""Streaming CSV reading for the CSV tools.
+
+Nothing here loads a whole file: the header and previews read only the lines
+they need, row counts scan raw bytes, and column statistics are computed over
+pandas chunks of `csv_chunk_rows` rows, with bounded sketches for distinct
+values and frequent values, so memory stays flat for multi-GB files.
+"""
+import csv
+import math
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.config import get_settings
+
+settings = get_settings()
+
+BLOCK_BYTES = 1024 * 1024
+# Exact distinct counts up to this many values per column, a HyperLogLog estimate beyond
+EXACT_DISTINCT_LIMIT = 10_000
+# Candidate values kept per column for top-k
+TOP_K_CAPACITY = 1_000
+_QUOTE, _NEWLINE, _CARRIAGE_RETURN = ord('"'), ord("\n"), ord("\r")
+# A quote that opens a field follows a delimiter, a line end or (doubled) another quote;
+# one that closes a field is followed by the same
+_BEFORE_OPENING_QUOTE = _AFTER_CLOSING_QUOTE = (ord(","), _NEWLINE, _CARRIAGE_RETURN, _QUOTE)
+# Digits after a leading zero (zip codes, account numbers) are identifiers, not numbers
+LEADING_ZERO_PATTERN = r"^[+-]?0[0-9]"
+_INT64_MIN, _INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+def number_key(value) -> str:
+    """How a value of a numeric column is written in `top`: "10" for "10", "10.0", "1e1" and 10.0.
+
+    Takes the text of a CSV field or a number read back from Arrow, so csv_engine
+    and the dataset cache report the same keys. Integers beyond int64 are
+    floats, as in Arrow.
+    """
+    if isinstance(value, str):
+        try:
+            value = int(value)
+            if not _INT64_MIN <= value <= _INT64_MAX:
+                value = float(value)
+        except ValueError:
+            value = float(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def read_header(path: Path) -> List[str]:
+    """Column names from the first line only."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def read_preview(path: Path, limit: int) -> Tuple[List[str], List[dict]]:
+    """Column names and the first `limit` rows, as csv.DictReader returns them."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        rows = list(islice(reader, limit))
+        return list(reader.fieldnames or []), rows
+
+
+def count_rows(path: Path) -> int:
+    """Data rows (non-blank records after the header), as csv.DictReader counts them.
+
+    The header is the first line even when it is blank (DictReader then has no
+    field names but still returns the rows after it).
+
+    Bytes are scanned with numpy over 1 MB blocks: a newline ends a record only
+    when an even number of double quotes precede it, so newlines inside quoted
+    fields are skipped. That only holds while every quote opens a field, closes
+    one, or is doubled; a stray quote (`5 ft 3" tall`) or a bare "\r" line end
+    makes the file fall back to counting with csv.reader.
+    """
+    import numpy as np
+
+    records = 0
+    quotes_odd = False  # Inside a quoted field at the end of the previous block
+    last_break = -1  # File offset of the last record-ending newline
+    last_byte = _NEWLINE  # Byte before the current block (the file starts a line)
+    pending_quote = pending_cr = False  # Block ended on a closing quote / "\r" not yet checked
+    offset = 0
+    with open(path, "rb") as f:
+        # DictReader takes a blank first line as an empty header
+        start = f.read(2)
+        blank_header = start[:1] == b"\n" or start == b"\r\n"
+        f.seek(0)
+        while True:
+            block = f.read(BLOCK_BYTES)
+            if not block:
+                break
+            data = np.frombuffer(block, dtype=np.uint8)
+            if (pending_quote and data[0] not in _AFTER_CLOSING_QUOTE) or (pending_cr and data[0] != _NEWLINE):
+                return _count_rows_parsed(path)
+            quotes = np.flatnonzero(data == _QUOTE)
+            if len(quotes):
+                opening = (np.arange(len(quotes)) + quotes_odd) % 2 == 0
+                before = np.where(quotes > 0, data[np.maximum(quotes - 1, 0)], last_byte)
+                after = data[np.minimum(quotes + 1, len(data) - 1)]
+                closing_inside = ~opening & (quotes < len(data) - 1)
+                if not (np.isin(before[opening], _BEFORE_OPENING_QUOTE).all()
+                        and np.isin(after[closing_inside], _AFTER_CLOSING_QUOTE).all()):
+                    return _count_rows_parsed(path)
+                pending_quote = bool(~opening[-1] and quotes[-1] == len(data) - 1)
+            else:
+                pending_quote = False
+            returns = np.flatnonzero(data == _CARRIAGE_RETURN)
+            returns = returns[(np.searchsorted(quotes, returns) + quotes_odd) % 2 == 0]
+            if len(returns):
+                if (data[returns[returns < len(data) - 1] + 1] != _NEWLINE).any():
+                    return _count_rows_parsed(path)
+                pending_cr = bool(returns[-1] == len(data) - 1)
+            else:
+                pending_cr = False
+
+            newlines = np.flatnonzero(data == _NEWLINE)
+            inside = (np.searchsorted(quotes, newlines) + quotes_odd) % 2 == 1
+            breaks = newlines[~inside] + offset
+            if len(breaks):
+                # A line is blank if it is empty or just "\r"
+                lengths = np.diff(breaks, prepend=last_break) - 1
+                before = np.where(breaks - offset > 0, data[np.maximum(breaks - offset - 1, 0)], last_byte)
+                blank = (lengths == 0) | ((lengths == 1) & (before == _CARRIAGE_RETURN))
+                records += len(breaks) - int(np.count_nonzero(blank))
+                last_break = int(breaks[-1])
+            quotes_odd ^= len(quotes) % 2 == 1
+            last_byte = block[-1]
+            offset += len(block)
+    trailing = offset - last_break - 1
+    if trailing > 1 or (trailing == 1 and last_byte != _CARRIAGE_RETURN):
+        records += 1  # Last line without a trailing newline
+    return records if blank_header else max(records - 1, 0)
+
+
+def _count_rows_parsed(path: Path) -> int:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return sum(1 for row in reader if row)
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit hashes (2**precision one-byte registers)."""
+
+    def __init__(self, precision: int = 14):
+        import numpy as np
+
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        import numpy as np
+
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        # Remaining bits, with a sentinel bit so the rank is at most 64 - p + 1
+        rest = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        high = (rest >> np.uint64(32)).astype(np.float64)
+        low = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        # frexp gives exact bit lengths for 32-bit values
+        bit_length = np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+        rank = (65 - bit_length).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> int:
+        import numpy as np
+
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            return round(self.m * math.log(self.m / zeros))
+        return round(raw)
+
+
+class _ColumnStats:
+    """Running statistics for one column, fed one chunk (a pandas Series of strings) at a time."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.numeric_count = 0
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.exact: Optional[set] = set()
+        self.sketch: Optional[HyperLogLog] = None
+        self.frequent: Dict[str, int] = {}
+
+    def update(self, series):
+        import numpy as np
+        import pandas as pd
+
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        all_numeric_so_far = self.numeric_count == self.count
+        self.count += len(values)
+        if values.empty:
+            return
+
+        # Sorted by count, so its index is also this chunk's distinct values
+        counts = values.value_counts()
+
+        # Once a column has a non-numeric value it is reported as text, so stop parsing numbers.
+        # Only distinct values are parsed; their counts weight the sum.
+        if all_numeric_so_far:
+            numbers = pd.to_numeric(counts.index.to_series(), errors="coerce").to_numpy(dtype=float)
+            parsed = ~np.isnan(numbers) & ~counts.index.str.match(LEADING_ZERO_PATTERN)
+            if parsed.any():
+                numbers, weights = numbers[parsed], counts.to_numpy()[parsed]
+                self.numeric_count += int(weights.sum())
+                self.total += float((numbers * weights).sum())
+                low, high = float(numbers.min()), float(numbers.max())
+                self.minimum = low if self.minimum is None else min(self.minimum, low)
+                self.maximum = high if self.maximum is None else max(self.maximum, high)
+        if self.exact is not None:
+            self.exact.update(counts.index)
+            if len(self.exact) > EXACT_DISTINCT_LIMIT:
+                self.sketch = HyperLogLog()
+                self._add_to_sketch(list(self.exact))
+                self.exact = None
+        else:
+            self._add_to_sketch(counts.index.to_numpy())
+
+        for value, n in counts.head(TOP_K_CAPACITY).items():
+            self.frequent[value] = self.frequent.get(value, 0) + int(n)
+        if len(self.frequent) > TOP_K_CAPACITY * 2:
+            kept = sorted(self.frequent.items(), key=lambda item: item[1], reverse=True)[:TOP_K_CAPACITY]
+            self.frequent = dict(kept)
+
+    def _add_to_sketch(self, values):
+        import numpy as np
+        from pandas.util import hash_array
+
+        self.sketch.add_hashes(hash_array(np.asarray(values, dtype=object), categorize=False))
+
+    def result(self, top_k: int) -> dict:
+        numeric = self.count > 0 and self.numeric_count == self.count
+        frequent = self.frequent
+        if self.exact is None:
+            distinct = self.sketch.estimate()
+        elif numeric:
+            distinct = len({number_key(value) for value in self.exact})
+        else:
+            distinct = len(self.exact)
+        stats = {
+            "column": self.name,
+            "type": "numeric" if numeric else "text",
+            "count": self.count,
+            "nulls": self.nulls,
+            "distinct": distinct,
+            "distinct_estimated": self.exact is None,
+        }
+        if numeric:
+            stats.update(min=self.minimum, max=self.maximum, mean=self.total / self.numeric_count)
+            # "10" and "10.0" are one number
+            frequent = {}
+            for value, n in self.frequent.items():
+                key = number_key(value)
+                frequent[key] = frequent.get(key, 0) + n
+        top = sorted(frequent.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        stats["top"] = dict(top)
+        return stats
+
+
+def column_stats(path: Path, top_k: int = 5) -> Tuple[int, List[dict]]:
+    """Row count and per-column statistics in one chunked pass over the file.
+
+    Empty fields count as nulls. Columns whose non-empty values all parse as
+    numbers, none with a leading zero ("02139"), get min/max/mean, and their
+    values are compared and written as numbers (see `number_key`). Distinct counts are exact up to
+    EXACT_DISTINCT_LIMIT values and HyperLogLog estimates (about 1% error)
+    beyond; top values are exact unless a column has more than
+    TOP_K_CAPACITY distinct values in a chunk, and approximate (heavy hitters
+    per chunk) otherwise. Rows with too many fields are skipped.
+    """
+    import pandas as pd
+
+    columns: Optional[List[_ColumnStats]] = None
+    rows = 0
+    reader = pd.read_csv(
+        path, dtype=object, keep_default_na=False, na_values=[""], encoding="utf-8",
+        chunksize=settings.csv_chunk_rows, on_bad_lines="skip",
+    )
+    with reader:
+        for chunk in reader:
+            if columns is None:
+                columns = [_ColumnStats(str(name)) for name in chunk.columns]
+            rows += len(chunk)
+            for stats, name in zip(columns, chunk.columns):
+                stats.update(chunk[name])
+    return rows, [c.result(top_k) for c in columns or []]
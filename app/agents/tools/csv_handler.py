@@ -1,10 +1,16 @@
+import asyncio
 import csv
 import json
 import logging
 from pathlib import Path
 
+from app.agents.tools import csv_engine, csv_query
+from app.agents.tools.dataset_cache import get_dataset_cache
+
 logger = logging.getLogger(__name__)
 WORKSPACE_DIR = Path("workspace")
+PREVIEW_ROWS = 20
+OPERATIONS = ("summary", "columns", "row_count", "unique_values", "stats", "query")
 
 
 async def read_csv_file(task_id: str, filename: str) -> str:
@@ -19,69 +25,123 @@ async def read_csv_file(task_id: str, filename: str) -> str:
         if not file_path.exists():
             return f"Error: File '{filename}' not found in task {task_id} workspace."
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-
-        if not rows:
+        # Only the preview rows are parsed; the total comes from the dataset
+        # cache or a byte scan, and the cache is filled in the background for
+        # the analyze_csv_data / execute_python_code calls that usually follow
+        columns, preview = await asyncio.to_thread(csv_engine.read_preview, file_path, PREVIEW_ROWS)
+        if not preview:
             return "CSV file is empty."
+        row_count = await _cached_row_count(task_id, file_path)
 
-        preview = rows[:20]
-        result = f"CSV file: {filename} ({len(rows)} rows, {len(rows[0])} columns)\n"
-        result += f"Columns: {', '.join(rows[0].keys())}\n\n"
-        result += "First 20 rows:\n"
+        result = f"CSV file: {filename} ({row_count} rows, {len(columns)} columns)\n"
+        result += f"Columns: {', '.join(columns)}\n\n"
+        result += f"First {PREVIEW_ROWS} rows:\n"
         result += json.dumps(preview, indent=2)
 
-        if len(rows) > 20:
-            result += f"\n\n[{len(rows) - 20} more rows not shown]"
+        if row_count > PREVIEW_ROWS:
+            result += f"\n\n[{row_count - PREVIEW_ROWS} more rows not shown]"
 
         return result
     except Exception as e:
         return f"Failed to read CSV: {str(e)}"
 
 
-async def analyze_csv_data(task_id: str, filename: str, operation: str) -> str:
-    """Perform basic analysis on a CSV file.
+async def analyze_csv_data(task_id: str, filename: str, operation: str, query: str = "") -> str:
+    """Perform analysis on a CSV file.
 
     Args:
         task_id: The task ID whose workspace contains the file.
         filename: Name of the CSV file to analyze.
-        operation: Analysis operation - one of: 'summary', 'columns', 'row_count', 'unique_values'.
+        operation: Analysis operation - one of: 'summary', 'columns', 'row_count', 'unique_values', 'stats', 'query'
+                   ('stats' gives count, nulls, distinct, min/max/mean and top values per column).
+        query: For operation 'query', a JSON object with any of: "filter" ([[column, op, value], ...] with op
+               ==, !=, >, >=, <, <=, in, not in, contains, startswith, is_null, not_null), "group_by" ([columns]),
+               "aggregate" ({column: [count|count_distinct|sum|mean|min|max|stddev|median]}, "*": "count" for rows),
+               "columns" ([columns]), "sort" ([[column, "asc"|"desc"]], aggregates are named column_function),
+               "limit" (n; with sort gives the top n), "describe" (true: summary of the filtered columns).
+               E.g. {"filter": [["country", "==", "US"]], "group_by": ["region"], "aggregate": {"sales": "sum"},
+               "sort": [["sales_sum", "desc"]], "limit": 5}
     """
     try:
         file_path = WORKSPACE_DIR / f"task_{task_id}" / Path(filename).name
         if not file_path.exists():
             return f"Error: File '{filename}' not found in task {task_id} workspace."
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-
-        if not rows:
+        if operation not in OPERATIONS:
+            return f"Unknown operation '{operation}'. Use: {', '.join(OPERATIONS)}"
+        if operation == "query":
+            try:
+                spec = csv_query.parse_query(query)
+            except csv_query.QueryError as e:
+                return f"Invalid query: {e}"
+
+        cache = get_dataset_cache()
+        dataset = None
+        if cache is not None:
+            # Whole-column operations parse the file once into the cache; the
+            # cheap ones use it only if it is already there
+            if operation in ("unique_values", "stats", "query"):
+                dataset = await cache.get(task_id, file_path)
+            else:
+                dataset = cache.peek(file_path)
+                if dataset is None:
+                    cache.prefetch(task_id, file_path)
+        if operation == "query":
+            if dataset is not None and not dataset.num_rows:
+                return "CSV file is empty."
+            # Without a cached dataset the query scans the CSV itself
+            source = dataset.table if dataset is not None else file_path
+            try:
+                return await asyncio.to_thread(csv_query.run_query, source, spec)
+            except csv_query.QueryError as e:
+                return f"Invalid query: {e}"
+
+        if dataset is not None:
+            columns, row_count = dataset.columns, dataset.num_rows
+        else:
+            columns = await asyncio.to_thread(csv_engine.read_header, file_path)
+            row_count = await asyncio.to_thread(csv_engine.count_rows, file_path)
+        if not row_count:
             return "CSV file is empty."
 
         if operation == "summary":
             return (
                 f"File: {filename}\n"
-                f"Rows: {len(rows)}\n"
-                f"Columns ({len(rows[0])}): {', '.join(rows[0].keys())}"
+                f"Rows: {row_count}\n"
+                f"Columns ({len(columns)}): {', '.join(columns)}"
             )
         elif operation == "columns":
-            return f"Columns: {', '.join(rows[0].keys())}"
+            return f"Columns: {', '.join(columns)}"
         elif operation == "row_count":
-            return f"Row count: {len(rows)}"
-        elif operation == "unique_values":
-            result = {}
-            for col in rows[0].keys():
-                vals = set(r[col] for r in rows)
-                result[col] = len(vals)
-            return f"Unique value counts per column:\n{json.dumps(result, indent=2)}"
+            return f"Row count: {row_count}"
+
+        if dataset is not None:
+            stats = await asyncio.to_thread(dataset.column_stats)
         else:
-            return f"Unknown operation '{operation}'. Use: summary, columns, row_count, unique_values"
+            _, stats = await asyncio.to_thread(csv_engine.column_stats, file_path)
+        estimated = [s["column"] for s in stats if s["distinct_estimated"]]
+        if operation == "unique_values":
+            result = {s["column"]: s["distinct"] for s in stats}
+            output = f"Unique value counts per column:\n{json.dumps(result, indent=2)}"
+        else:
+            output = f"Column statistics ({row_count} rows):\n{json.dumps(stats, indent=2, default=str)}"
+        if estimated:
+            output += f"\n\n[Distinct counts for {', '.join(estimated)} are estimates (about 1% error)]"
+        return output
     except Exception as e:
         return f"Failed to analyze CSV: {str(e)}"
 
 
+async def _cached_row_count(task_id: str, file_path: Path) -> int:
+    cache = get_dataset_cache()
+    dataset = cache.peek(file_path) if cache is not None else None
+    if dataset is not None:
+        return dataset.num_rows
+    if cache is not None:
+        cache.prefetch(task_id, file_path)
+    return await asyncio.to_thread(csv_engine.count_rows, file_path)
+
+
 async def edit_csv_file(file_path: str, updates_json: str) -> str:
     """Edit specific cells in a CSV file on the local filesystem.
 
@@ -0,0 +1,298 @@
+"""Declarative queries for analyze_csv_data's "query" operation.
+
+A query is a JSON object; every key is optional:
+
+    {
+      "filter": [["country", "==", "US"], ["amount", ">", 100]],
+      "group_by": ["country"],
+      "aggregate": {"amount": ["sum", "mean"], "*": "count"},
+      "columns": ["id", "amount"],
+      "sort": [["amount_sum", "desc"]],
+      "limit": 10,
+      "describe": true
+    }
+
+Filters are combined with AND. Aggregates are named `<column>_<function>`
+("*": "count" gives `count`). Sorting with a limit is a top-n selection.
+`describe` summarises the filtered columns instead of listing rows. Queries run
+with pyarrow compute kernels over the cached Arrow table (or a scan of the CSV
+that only reads the referenced columns), and results are capped at
+`csv_query_max_rows` rows.
+"""
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from app.config import get_settings
+
+settings = get_settings()
+
+FILTER_OPS = ("==", "!=", ">", ">=", "<", "<=", "in", "not in", "contains", "startswith", "is_null", "not_null")
+AGGREGATES = {
+    "count": "count",
+    "count_distinct": "count_distinct",
+    "sum": "sum",
+    "mean": "mean",
+    "min": "min",
+    "max": "max",
+    "stddev": "stddev",
+    "median": "approximate_median",
+}
+QUERY_KEYS = ("filter", "group_by", "aggregate", "columns", "sort", "limit", "describe")
+MAX_CELL_CHARS = 80
+
+
+class QueryError(ValueError):
+    """A query the LLM can fix; the message says what is wrong."""
+
+
+def _as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def _names(spec: dict, key: str) -> List[str]:
+    """A column name or a list of them."""
+    names = _as_list(spec.get(key, []))
+    if not all(isinstance(name, str) for name in names):
+        raise QueryError(f'{key} must be a column name or a list of column names, e.g. ["country"]; got {spec[key]!r}')
+    return names
+
+
+def parse_query(text: str) -> dict:
+    """Parse and check the query's shape; column names are checked against the data later."""
+    try:
+        spec = json.loads(text) if text else {}
+    except json.JSONDecodeError as e:
+        raise QueryError(f"query is not valid JSON ({e})")
+    if not isinstance(spec, dict):
+        raise QueryError("query must be a JSON object")
+    unknown = set(spec) - set(QUERY_KEYS)
+    if unknown:
+        raise QueryError(f"unknown keys {sorted(unknown)}; use {', '.join(QUERY_KEYS)}")
+
+    filters = spec.get("filter", [])
+    if not isinstance(filters, list):
+        raise QueryError(f'filter must be a list of [column, op, value] conditions, e.g. [["country", "==", "US"]]; got {filters!r}')
+    if filters and isinstance(filters[0], str):
+        filters = [filters]  # A single condition
+    for condition in filters:
+        if (
+            not isinstance(condition, list) or len(condition) not in (2, 3)
+            or not isinstance(condition[0], str) or condition[1] not in FILTER_OPS
+        ):
+            raise QueryError(f"filter {condition!r} must be [column, op, value] with op one of {', '.join(FILTER_OPS)}")
+        if len(condition) == 2 and condition[1] not in ("is_null", "not_null"):
+            raise QueryError(f"filter {condition!r} needs a value")
+    spec["filter"] = filters
+
+    aggregate = spec.get("aggregate", {})
+    if not isinstance(aggregate, dict):
+        raise QueryError('aggregate must be an object like {"amount": ["sum", "mean"]}')
+    spec["aggregate"] = {column: _as_list(functions) for column, functions in aggregate.items()}
+    for column, functions in spec["aggregate"].items():
+        for function in functions:
+            if not isinstance(function, str) or function not in AGGREGATES:
+                raise QueryError(f"unknown aggregate {function!r}; use {', '.join(AGGREGATES)}")
+            if column == "*" and function != "count":
+                raise QueryError('"*" only supports "count"')
+    spec["group_by"] = _names(spec, "group_by")
+    spec["columns"] = _names(spec, "columns")
+
+    sort = []
+    for key in _as_list(spec.get("sort", [])):
+        if isinstance(key, str):
+            key = [key[1:], "desc"] if key.startswith("-") else [key, "asc"]
+        if not isinstance(key, list) or len(key) != 2 or not isinstance(key[0], str) or key[1] not in ("asc", "desc"):
+            raise QueryError(f'sort {key!r} must be a column name or [column, "asc"|"desc"]')
+        sort.append(key)
+    spec["sort"] = sort
+
+    limit = spec.get("limit")
+    if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 1):
+        raise QueryError("limit must be a positive integer")
+    if spec.get("describe") and (spec["group_by"] or spec["aggregate"]):
+        raise QueryError("describe cannot be combined with group_by or aggregate")
+    if spec["group_by"] and not spec["aggregate"]:
+        spec["aggregate"] = {"*": ["count"]}
+    return spec
+
+
+def _check_columns(names: List[str], available: List[str]):
+    missing = [name for name in names if name not in available]
+    if missing:
+        raise QueryError(f"unknown columns {missing}; available: {', '.join(available)}")
+
+
+def _scalar(value, column: str, column_type):
+    """The filter value as a scalar comparable with the column ("100" for a number column works)."""
+    import pyarrow as pa
+
+    try:
+        return pa.scalar(value).cast(column_type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        pass
+    if pa.types.is_integer(column_type) or pa.types.is_floating(column_type):
+        try:
+            return pa.scalar(float(value))  # e.g. 2.5 against an integer column
+        except (TypeError, ValueError):
+            pass
+    raise QueryError(f"value {value!r} does not match column {column} ({column_type})")
+
+
+def _filter_expression(filters: list, schema):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    expression = None
+    for condition in filters:
+        column, op = condition[0], condition[1]
+        field = pc.field(column)
+        column_type = schema.field(column).type
+        if op == "is_null":
+            term = field.is_null()
+        elif op == "not_null":
+            term = field.is_valid()
+        elif op in ("contains", "startswith"):
+            if not pa.types.is_string(column_type) and not pa.types.is_large_string(column_type):
+                raise QueryError(f"{op} needs a text column; {column} is {column_type}")
+            function = pc.match_substring if op == "contains" else pc.starts_with
+            term = function(field, pattern=str(condition[2]), ignore_case=True)
+        else:
+            value = condition[2]
+            values = _as_list(value) if op in ("in", "not in") else [value]
+            values = [_scalar(v, column, column_type) for v in values]
+            if op == "in":
+                term = field.isin(pa.array([v.as_py() for v in values], values[0].type if values else column_type))
+            elif op == "not in":
+                term = ~field.isin(pa.array([v.as_py() for v in values], values[0].type if values else column_type))
+            else:
+                term = {
+                    "==": field == values[0], "!=": field != values[0],
+                    ">": field > values[0], ">=": field >= values[0],
+                    "<": field < values[0], "<=": field <= values[0],
+                }[op]
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def _aggregate(table, group_by: List[str], aggregate: Dict[str, List[str]]):
+    specs, names = [], {}
+    for column, functions in aggregate.items():
+        for function in functions:
+            if column == "*":
+                specs.append(([], "count_all"))
+                names["count_all"] = "count"
+            else:
+                specs.append((column, AGGREGATES[function]))
+                names[f"{column}_{AGGREGATES[function]}"] = f"{column}_{function}"
+    result = table.group_by(group_by).aggregate(specs)
+    result = result.rename_columns([names.get(name, name) for name in result.column_names])
+    return result.select(group_by + list(names.values()))
+
+
+def _describe(table):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    rows = []
+    for name in table.column_names:
+        column = table.column(name)
+        row = {"column": name, "type": str(column.type), "count": len(column) - column.null_count, "nulls": column.null_count}
+        if row["count"] and (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)):
+            quartiles = pc.quantile(column, q=[0.25, 0.5, 0.75]).to_pylist()
+            low_high = pc.min_max(column)
+            row.update(
+                mean=pc.mean(column).as_py(), std=pc.stddev(column, ddof=1).as_py(),
+                min=low_high["min"].as_py(), p25=quartiles[0], p50=quartiles[1], p75=quartiles[2],
+                max=low_high["max"].as_py(),
+            )
+        elif row["count"]:
+            counts = pc.value_counts(column.drop_null())
+            top = pc.index(counts.field("counts"), pc.max(counts.field("counts"))).as_py()
+            row.update(distinct=len(counts), top=counts.field("values")[top].as_py(), top_count=counts.field("counts")[top].as_py())
+        rows.append(row)
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    return pa.Table.from_pylist([{key: row.get(key) for key in keys} for row in rows])
+
+
+def _referenced_columns(spec: dict) -> Optional[List[str]]:
+    """Columns the query reads, or None when it returns whole rows."""
+    if not spec["aggregate"] and not spec["columns"]:
+        return None
+    names = [c[0] for c in spec["filter"]] + spec["group_by"] + spec["columns"]
+    names += [column for column in spec["aggregate"] if column != "*"]
+    return list(dict.fromkeys(names))
+
+
+def execute(source: Union["pyarrow.Table", Path], spec: dict):
+    """Run a parsed query; returns (result table, total result rows before the limit)."""
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    if isinstance(source, Path):
+        from app.agents.tools.dataset_cache import csv_convert_options, csv_parse_options, infer_column_types
+
+        dataset = ds.dataset(source, format=ds.CsvFileFormat(
+            parse_options=csv_parse_options(), convert_options=csv_convert_options(infer_column_types(source)),
+        ))
+    else:
+        dataset = ds.dataset(source)
+    available = dataset.schema.names
+    _check_columns([c[0] for c in spec["filter"]] + spec["group_by"] + spec["columns"], available)
+    _check_columns([column for column in spec["aggregate"] if column != "*"], available)
+
+    # Filter and projection are pushed into the scan
+    table = dataset.to_table(
+        columns=_referenced_columns(spec),
+        filter=_filter_expression(spec["filter"], dataset.schema),
+    )
+    if spec.get("describe"):
+        table = _describe(table.select(spec["columns"]) if spec["columns"] else table)
+    elif spec["aggregate"]:
+        table = _aggregate(table, spec["group_by"], spec["aggregate"])
+    elif spec["columns"]:
+        table = table.select(spec["columns"])
+
+    total = table.num_rows
+    limit = spec.get("limit")
+    if spec["sort"]:
+        _check_columns([key[0] for key in spec["sort"]], table.column_names)
+        sort_keys = [(column, "ascending" if order == "asc" else "descending") for column, order in spec["sort"]]
+        if limit:
+            # Top-n: partial selection instead of a full sort
+            table = table.take(pc.select_k_unstable(table, k=min(limit, total), sort_keys=sort_keys))
+        else:
+            table = table.sort_by(sort_keys)
+    if limit:
+        table = table.slice(0, limit)
+        total = min(total, limit)
+    return table, total
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        value = int(value) if value.is_integer() and abs(value) < 1e15 else round(value, 4)
+    text = str(value).replace("\n", " ").replace("|", "\\|")
+    return text if len(text) <= MAX_CELL_CHARS else text[:MAX_CELL_CHARS - 3] + "..."
+
+
+def format_result(table, total: int, max_rows: int) -> str:
+    """A Markdown table of at most `max_rows` rows."""
+    shown = table.slice(0, max_rows).to_pylist()
+    lines = [
+        f"Query result: {total} row{'' if total == 1 else 's'}",
+        "",
+        "| " + " | ".join(table.column_names) + " |",
+        "|" + "---|" * len(table.column_names),
+    ]
+    lines += ["| " + " | ".join(_cell(row[name]) for name in table.column_names) + " |" for row in shown]
+    if total > len(shown):
+        lines.append(f"\n[{total - len(shown)} more rows not shown; add a limit, filter or aggregate]")
+    return "\n".join(lines)
+
+
+def run_query(source, spec: dict) -> str:
+    table, total = execute(source, spec)
+    return format_result(table, total, settings.csv_query_max_rows)
@@ -0,0 +1,413 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.agents.tools import csv_engine
+from app.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+READ_BLOCK_BYTES = 8 * 1024 * 1024
+INTEGER_PATTERN = r"^[+-]?[0-9]+$"
+NUMBER_PATTERN = r"^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$"
+
+
+def _fingerprint(path: Path) -> Tuple[str, int, int]:
+    stat = path.stat()
+    return str(path.resolve()), stat.st_size, stat.st_mtime_ns
+
+
+@dataclass
+class Dataset:
+    """A task CSV parsed into a memory-mapped Arrow table."""
+
+    task_id: str
+    source: Path
+    fingerprint: Tuple[str, int, int]
+    arrow_path: Path
+    table: object  # pyarrow.Table backed by the mapped file
+    nbytes: int
+    _stats: Dict[int, List[dict]] = field(default_factory=dict)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.table.column_names
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    def column_stats(self, top_k: int = 5) -> List[dict]:
+        """Same shape as csv_engine.column_stats, but exact, computed once per dataset."""
+        if top_k not in self._stats:
+            self._stats[top_k] = [_column_stats(name, self.table.column(name), top_k) for name in self.columns]
+        return self._stats[top_k]
+
+
+def _column_stats(name: str, column, top_k: int) -> dict:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    count = len(column) - column.null_count
+    numeric = count > 0 and (pa.types.is_integer(column.type) or pa.types.is_floating(column.type))
+    stats = {
+        "column": name,
+        "type": "numeric" if numeric else "text",
+        "count": count,
+        "nulls": column.null_count,
+        "distinct": pc.count_distinct(column, mode="only_valid").as_py(),
+        "distinct_estimated": False,
+    }
+    if numeric:
+        low_high = pc.min_max(column)
+        stats.update(
+            min=float(low_high["min"].as_py()),
+            max=float(low_high["max"].as_py()),
+            mean=pc.mean(column).as_py(),
+        )
+    counts = pc.value_counts(column.drop_null())
+    top = pc.select_k_unstable(
+        pa.RecordBatch.from_arrays([counts.field("values"), counts.field("counts")], ["value", "count"]),
+        k=min(top_k, len(counts)),
+        sort_keys=[("count", "descending")],
+    )
+    values, totals = counts.field("values"), counts.field("counts")
+    key = csv_engine.number_key if numeric else str
+    stats["top"] = {key(values[i].as_py()): totals[i].as_py() for i in top.to_pylist()}
+    return stats
+
+
+def _skip_row(row) -> str:
+    return "skip"
+
+
+def csv_parse_options():
+    """pyarrow CSV parsing as the CSV tools do it: quoted newlines allowed, malformed rows skipped."""
+    import pyarrow.csv as pa_csv
+
+    return pa_csv.ParseOptions(newlines_in_values=True, invalid_row_handler=_skip_row)
+
+
+def csv_convert_options(column_types: Optional[dict] = None):
+    """Empty fields are nulls, as in csv_engine; "true"/"NA" etc. stay text."""
+    import pyarrow.csv as pa_csv
+
+    return pa_csv.ConvertOptions(
+        null_values=[""], strings_can_be_null=True, true_values=[], false_values=[],
+        column_types=column_types,
+    )
+
+
+def _open_csv(source: Path, column_types: dict):
+    import pyarrow.csv as pa_csv
+
+    return pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(block_size=READ_BLOCK_BYTES),
+        parse_options=csv_parse_options(),
+        convert_options=csv_convert_options(column_types),
+    )
+
+
+def _text_types(source: Path) -> dict:
+    import pyarrow as pa
+
+    return {name: pa.string() for name in csv_engine.read_header(source)}
+
+
+def _all_match(values, pattern: str) -> bool:
+    import pyarrow.compute as pc
+
+    return pc.all(pc.match_substring_regex(values, pattern)).as_py()
+
+
+def _narrowest_type(values, current):
+    """int64, float64 or string: the first that holds every value in `values` losslessly."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    values = values.drop_null()
+    if not len(values):
+        return current
+    if not re.match(NUMBER_PATTERN, values[0].as_py()):
+        return pa.string()  # Most text columns, without scanning them
+    if pc.any(pc.match_substring_regex(values, csv_engine.LEADING_ZERO_PATTERN)).as_py():
+        return pa.string()
+    # Casts are only attempted once the syntax matches: a failing cast is slow
+    for candidate, pattern in ((pa.int64(), INTEGER_PATTERN), (pa.float64(), NUMBER_PATTERN)):
+        if candidate == pa.int64() and current not in (None, pa.int64()):
+            continue
+        if _all_match(values, pattern):
+            try:
+                pc.cast(values, candidate)
+                return candidate
+            except pa.ArrowInvalid:
+                pass  # e.g. outside the int64 range
+    return pa.string()
+
+
+def infer_column_types(source: Path) -> dict:
+    """Column name -> Arrow type, decided over the whole file as csv_engine decides it.
+
+    pyarrow's own inference looks at the first block only and reads "02139" as
+    2139; here a column is numeric only if every non-empty value parses as a
+    number without a leading zero, and everything else stays text.
+    """
+    import pyarrow as pa
+
+    reader = _open_csv(source, _text_types(source))
+    types = {name: None for name in reader.schema.names}  # None until a value is seen
+    for batch in reader:
+        for name, values in zip(batch.schema.names, batch.columns):
+            if types[name] != pa.string():
+                types[name] = _narrowest_type(values, types[name])
+    return {name: kind or pa.string() for name, kind in types.items()}
+
+
+def _write_arrow(source: Path, target: Path, column_types: dict):
+    import pyarrow as pa
+
+    reader = _open_csv(source, column_types)
+    with pa.OSFile(str(target), "wb") as sink, pa.ipc.new_file(sink, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+
+
+def _build(source: Path, target: Path):
+    """Stream the CSV into an Arrow IPC file, batch by batch."""
+    import pyarrow as pa
+
+    partial = target.with_suffix(".partial")
+    try:
+        _write_arrow(source, partial, infer_column_types(source))
+    except pa.ArrowInvalid:
+        # Rows that parse differently the second time round: keep every column as text
+        _write_arrow(source, partial, _text_types(source))
+    os.replace(partial, target)
+
+
+def _open(target: Path):
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(str(target), "r")).read_all()
+
+
+class DatasetCache:
+    """Parsed copies of task CSVs, shared by the CSV tools and the code sandbox.
+
+    The first tool call on a CSV streams it into an Arrow IPC file under this
+    process's directory in `dataset_cache_dir`; later calls memory-map that
+    file, so row counts and column names are free, column statistics are
+    computed once, and `execute_python_code` can open it without parsing
+    (`load_dataset`). Entries are keyed by (path, size, mtime), so an edited
+    file is parsed again, and the least recently used files are removed once
+    their total passes `dataset_cache_max_mb`. CSVs larger than that, or that
+    pyarrow cannot parse, are not cached and the tools fall back to csv_engine.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        base = Path(directory)
+        self._remove_stale(base)
+        self.directory = base / str(os.getpid())
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dataset]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, int, int], asyncio.Future] = {}
+        self._background: set = set()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="dataset-cache")
+        self.stats = {"hits": 0, "builds": 0, "build_seconds": 0.0, "coalesced": 0, "evictions": 0, "not_cached": 0}
+
+    @staticmethod
+    def _remove_stale(base: Path):
+        """Directories left by processes that are no longer running."""
+        if not base.is_dir():
+            return
+        for child in base.iterdir():
+            if not child.name.isdigit():
+                continue
+            try:
+                os.kill(int(child.name), 0)
+            except ProcessLookupError:
+                shutil.rmtree(child, ignore_errors=True)
+            except PermissionError:
+                pass
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def peek(self, path: Path) -> Optional[Dataset]:
+        """The cached dataset if it is still current, without parsing anything."""
+        try:
+            fingerprint = _fingerprint(path)
+        except OSError:
+            return None
+        entry = self._entries.get(fingerprint[0])
+        if entry is None or entry.fingerprint != fingerprint:
+            return None
+        self._entries.move_to_end(fingerprint[0])
+        self.stats["hits"] += 1
+        return entry
+
+    async def get(self, task_id: str, path: Path) -> Optional[Dataset]:
+        """The parsed dataset, building it if needed; None when it cannot be cached."""
+        entry = self.peek(path)
+        if entry is not None:
+            return entry
+        fingerprint = _fingerprint(path)
+        # After a cancelled start, the first waiter to wake takes over; the rest wait for it
+        while fingerprint in self._inflight:
+            inflight = self._inflight[fingerprint]
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The call that started the build was cancelled: build ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[fingerprint] = future
+        try:
+            entry = await self._load(str(task_id), path, fingerprint)
+            future.set_result(entry)
+            return entry
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            # A caller that took over after a cancelled start owns the entry now
+            if self._inflight.get(fingerprint) is future:
+                del self._inflight[fingerprint]
+
+    def prefetch(self, task_id: str, path: Path):
+        """Start parsing in the background so the next tool call finds it ready."""
+        if self.peek(path) is not None:
+            return
+        task = asyncio.create_task(self.get(task_id, path))
+        self._background.add(task)
+        task.add_done_callback(self._prefetch_done)
+
+    def _prefetch_done(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Dataset prefetch failed: {task.exception()}")
+
+    async def _load(self, task_id: str, path: Path, fingerprint: Tuple[str, int, int]) -> Optional[Dataset]:
+        if fingerprint[1] > self.max_bytes:
+            self.stats["not_cached"] += 1
+            return None
+        target = self.directory / f"{hashlib.sha1(repr(fingerprint).encode()).hexdigest()}.arrow"
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            await loop.run_in_executor(self._executor, _build, path, target)
+            table = await loop.run_in_executor(self._executor, _open, target)
+        except Exception as e:
+            logger.info(f"Not caching {path.name}: {e}")
+            self.stats["not_cached"] += 1
+            target.unlink(missing_ok=True)
+            return None
+        self.stats["builds"] += 1
+        self.stats["build_seconds"] += time.perf_counter() - start
+
+        entry = Dataset(task_id, path, fingerprint, target, table, target.stat().st_size)
+        self._drop(fingerprint[0])  # An older version of the same file
+        if entry.nbytes > self.max_bytes:
+            target.unlink(missing_ok=True)
+            self.stats["not_cached"] += 1
+            return None
+        self._entries[fingerprint[0]] = entry
+        while self.total_bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+        return entry
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            # Readers that already mapped the file keep their mapping
+            entry.arrow_path.unlink(missing_ok=True)
+
+    def handles(self, task_id: str) -> Dict[str, str]:
+        """File name -> Arrow path for the task's current datasets."""
+        handles = {}
+        for entry in self._entries.values():
+            try:
+                current = _fingerprint(entry.source) == entry.fingerprint
+            except OSError:
+                current = False
+            if entry.task_id == str(task_id) and current:
+                handles[entry.source.name] = str(entry.arrow_path.resolve())
+        return handles
+
+    def release_task(self, task_id: str):
+        for key, entry in list(self._entries.items()):
+            if entry.task_id == str(task_id):
+                self._drop(key)
+
+    def close(self):
+        for task in self._background:
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._entries.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_cache: Optional[DatasetCache] = None
+
+
+def get_dataset_cache() -> Optional[DatasetCache]:
+    """The process-wide cache, or None when `dataset_cache_dir` is empty or pyarrow is missing."""
+    global _cache
+    if _cache is None and settings.dataset_cache_dir:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return None
+        _cache = DatasetCache(settings.dataset_cache_dir, settings.dataset_cache_max_mb * 1024 * 1024)
+    return _cache
+
+
+def get_dataset_handles(task_id) -> Dict[str, str]:
+    """Datasets the code sandbox can open with load_dataset for this task."""
+    if _cache is None or task_id is None:
+        return {}
+    return _cache.handles(task_id)
+
+
+def release_task_datasets(task_id):
+    """Called when a task finishes, so its files do not wait for LRU eviction."""
+    if _cache is not None:
+        _cache.release_task(task_id)
+
+
+def get_dataset_cache_stats() -> Optional[dict]:
+    if _cache is None:
+        return None
+    return {**_cache.stats, "datasets": len(_cache._entries), "bytes": _cache.total_bytes}
+
+
+register_stats("dataset_cache", get_dataset_cache_stats)
+
+
+def shutdown_dataset_cache():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
@@ -0,0 +1,175 @@
+"""Main-content text extraction for read_webpage.
+
+Kept free of app imports so it loads quickly in the extraction worker processes.
+"""
+from typing import List, Optional
+
+from lxml import etree
+
+NON_CONTENT_TAGS = {"script", "style", "nav", "footer", "header", "aside",
+                    "form", "iframe", "noscript", "svg", "img", "button"}
+MAIN_CONTENT_SELECTORS = ["article", "main", "[role='main']", ".article-body",
+                          ".post-content", ".entry-content", "#content", ".content"]
+
+# Unless an <article> has been read, keep reading this far for a better main-content element
+CANDIDATE_LOOKAHEAD_CHARS = 256 * 1024
+CHUNK_CHARS = 64 * 1024
+
+
+def _selector_rank(tag: str, attrs) -> Optional[int]:
+    """Position in MAIN_CONTENT_SELECTORS of the best selector the element matches."""
+    classes = set((attrs.get("class") or "").split())
+    matches = [
+        tag == "article",
+        tag == "main",
+        attrs.get("role") == "main",
+        "article-body" in classes,
+        "post-content" in classes,
+        "entry-content" in classes,
+        attrs.get("id") == "content",
+        "content" in classes,
+    ]
+    return matches.index(True) if True in matches else None
+
+
+class _Block:
+    """Text collected for one element (or the whole page), capped at `limit` characters."""
+
+    __slots__ = ("rank", "lines", "chars", "limit", "closed")
+
+    def __init__(self, rank: int, limit: int):
+        self.rank = rank
+        self.lines: List[str] = []
+        self.chars = 0
+        self.limit = limit
+        self.closed = False
+
+    @property
+    def full(self) -> bool:
+        return self.chars > self.limit
+
+    def add(self, line: str):
+        if not self.full:
+            self.lines.append(line)
+            self.chars += len(line) + (1 if self.chars else 0)
+
+    def text(self) -> str:
+        return "\n".join(self.lines)[:self.limit]
+
+
+class StreamingTextExtractor:
+    """Incremental version of the main-content extraction.
+
+    Feed the page in chunks; libxml2's HTML push parser (lxml) tokenizes them
+    and calls back here for each tag and text node, with unclosed and void
+    elements closed for us, so start and end events always pair up. Text
+    inside NON_CONTENT_TAGS is skipped and text inside elements matching
+    MAIN_CONTENT_SELECTORS is collected separately from the page as a whole,
+    one line per text node. `done` becomes true, so callers can stop reading,
+    once an `<article>` (the top-ranked selector) has closed or holds more
+    than `max_length` characters. A lower-ranked element (e.g. a `.content`
+    teaser) may still be followed by a better one, so for those reading goes
+    on for CANDIDATE_LOOKAHEAD_CHARS, then stops once the best element seen
+    has closed or is full; with no such element, once the page text is full.
+    No tree is built and at most `max_length` + 1 characters are kept per
+    block, so memory does not grow with the page.
+    """
+
+    def __init__(self, max_length: int):
+        # One character over max_length tells the caller the text was truncated
+        self.limit = max_length + 1
+        self.page = _Block(len(MAIN_CONTENT_SELECTORS), self.limit)
+        self.candidates: List[_Block] = []
+        self._open: List[_Block] = []
+        self._elements: List[Optional[_Block]] = []  # One entry per open element
+        self._skip_depth = 0
+        self._pending: List[str] = []
+        self.chars_fed = 0
+        self._parser = etree.HTMLParser(target=self)
+
+    def feed(self, data: str):
+        self.chars_fed += len(data)
+        self._parser.feed(data)
+
+    @property
+    def best(self) -> Optional[_Block]:
+        return min(self.candidates, key=lambda b: b.rank, default=None)
+
+    @property
+    def done(self) -> bool:
+        best = self.best
+        finished = best is not None and (best.closed or best.full)
+        if finished and best.rank == 0:
+            return True
+        if self.chars_fed < CANDIDATE_LOOKAHEAD_CHARS:
+            return False
+        return finished if best is not None else self.page.full
+
+    def _flush_text(self):
+        if not self._pending:
+            return
+        data = "".join(self._pending)
+        self._pending = []
+        if self._skip_depth:
+            return
+        for line in data.split("\n"):
+            line = line.strip()
+            if line:
+                self.page.add(line)
+                for block in self._open:
+                    block.add(line)
+
+    # lxml parser target callbacks
+
+    def data(self, data: str):
+        self._pending.append(data)
+
+    def start(self, tag: str, attrs):
+        self._flush_text()
+        if self._skip_depth or tag in NON_CONTENT_TAGS:
+            self._skip_depth += 1
+            return
+        rank = _selector_rank(tag, attrs)
+        block = _Block(rank, self.limit) if rank is not None else None
+        if block is not None:
+            self.candidates.append(block)
+            self._open.append(block)
+        self._elements.append(block)
+
+    def end(self, tag: str):
+        self._flush_text()
+        if self._skip_depth:
+            self._skip_depth -= 1
+            return
+        block = self._elements.pop() if self._elements else None
+        if block is not None:
+            block.closed = True
+            self._open.remove(block)
+
+    def comment(self, text: str):
+        self._flush_text()
+
+    def close(self):
+        pass
+
+    def result(self) -> str:
+        """The main-content text (or the whole page's), truncated to `max_length` + 1 characters."""
+        if self._parser is not None:
+            # Flushes text the parser holds back until it sees the next tag
+            try:
+                self._parser.close()
+            except etree.XMLSyntaxError:
+                pass  # Nothing was fed
+            self._parser = None
+        self._flush_text()
+        return (self.best or self.page).text()
+
+
+def extract_main_text(html: str, max_length: int) -> str:
+    """Main-content text of a complete page, reading only as much of it as needed."""
+    extractor = StreamingTextExtractor(max_length)
+    for start in range(0, len(html), CHUNK_CHARS):
+        extractor.feed(html[start:start + CHUNK_CHARS])
+        if extractor.done:
+            break
+    return extractor.result()
@@ -0,0 +1,283 @@
+import asyncio
+import codecs
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import httpx
+
+from app.config import get_settings
+from app.agents.tools.html_extract import StreamingTextExtractor, extract_main_text
+from app.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+STREAM_CHUNK_BYTES = 64 * 1024
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+@dataclass
+class PageText:
+    url: str
+    final_url: str
+    text: str  # Main-content text, at most max_length + 1 characters
+    cache: Optional[str] = None  # "fresh", "revalidated" or None (downloaded)
+    complete: bool = True  # False when the download stopped before the end of the body
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class PageCache:
+    """Compressed page bodies in a SQLite file, evicted least recently used beyond `max_bytes`."""
+
+    def __init__(self, path: str, max_bytes: int):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, final_url TEXT, content_type TEXT, etag TEXT, last_modified TEXT, "
+            "body BLOB NOT NULL, size INTEGER NOT NULL, fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_accessed_at ON pages (accessed_at)")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def get(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_url, content_type, etag, last_modified, body, fetched_at FROM pages WHERE key = ?",
+                (self.key(url),),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), self.key(url)))
+        return {
+            "final_url": row[0], "content_type": row[1], "etag": row[2], "last_modified": row[3],
+            "text": zlib.decompress(row[4]).decode(), "fetched_at": row[5],
+        }
+
+    def put(self, url: str, final_url: str, content_type: str, etag: Optional[str], last_modified: Optional[str], text: str):
+        body = zlib.compress(text.encode(), 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(url), final_url, content_type, etag, last_modified, body, len(body), now, now),
+            )
+            self._evict()
+
+    def mark_revalidated(self, url: str):
+        with self._lock:
+            now = time.time()
+            self._conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, self.key(url)))
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM pages ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PageFetcher:
+    """Shared HTTP client for reading web pages.
+
+    One pooled `httpx.AsyncClient` (HTTP/2 when `h2` is installed) serves every
+    task. Downloads are streamed through `StreamingTextExtractor`, which stops
+    reading once `max_length` characters of main content are collected (or at
+    `page_stream_max_bytes`), so large pages are never held in memory whole.
+    Bodies up to `page_cache_max_page_bytes` are read to the end and kept in
+    `PageCache`. Within `page_cache_fresh_seconds` a cached page is served as
+    is; after that it is revalidated with If-None-Match / If-Modified-Since, and
+    a 304 reuses the cached body, extracted on a process pool
+    (`page_extract_workers`). Concurrent reads of one URL share a request.
+    """
+
+    def __init__(self, cache: Optional[PageCache]):
+        self.cache = cache
+        self.client = httpx.AsyncClient(
+            timeout=30,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            http2=_http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.page_fetch_max_connections,
+                max_keepalive_connections=settings.page_fetch_max_connections,
+            ),
+        )
+        self._io = ThreadPoolExecutor(max_workers=2, thread_name_prefix="page-cache")
+        self._extract: Executor = (
+            ProcessPoolExecutor(max_workers=settings.page_extract_workers)
+            if settings.page_extract_workers > 0
+            else self._io
+        )
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"fresh_hits": 0, "revalidated": 0, "downloads": 0, "cut_short": 0, "coalesced": 0}
+
+    async def _cache_call(self, fn, *args):
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._io, fn, *args)
+        except sqlite3.Error as e:
+            logger.warning(f"Page cache error: {e}")
+            return None
+
+    async def read(self, url: str, max_length: int) -> PageText:
+        key = f"{max_length}:{url}"
+        # After a cancelled start, the first waiter to wake takes over; the rest wait for it
+        while key in self._inflight:
+            inflight = self._inflight[key]
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The task that started the read was cancelled: read ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            page = await self._read(url, max_length)
+            future.set_result(page)
+            return page
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            # A caller that took over after a cancelled start owns the entry now
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def _read(self, url: str, max_length: int) -> PageText:
+        cached = await self._cache_call(self.cache.get, url) if self.cache else None
+        if cached and time.time() - cached["fetched_at"] < settings.page_cache_fresh_seconds:
+            self.stats["fresh_hits"] += 1
+            text = await self.extract_text(cached["text"], max_length)
+            return PageText(url, cached["final_url"], text, "fresh")
+
+        headers = {}
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with self.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached:
+                self.stats["revalidated"] += 1
+                await self._cache_call(self.cache.mark_revalidated, url)
+                text = await self.extract_text(cached["text"], max_length)
+                return PageText(url, cached["final_url"], text, "revalidated")
+            response.raise_for_status()
+            self.stats["downloads"] += 1
+
+            content_type = response.headers.get("content-type", "")
+            keep = (
+                self.cache is not None
+                and "no-store" not in response.headers.get("cache-control", "")
+                and ("html" in content_type or content_type.startswith("text/"))
+            )
+            extractor = StreamingTextExtractor(max_length)
+            decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+            body: List[str] = []
+            bytes_read = 0
+            complete = False
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_BYTES):
+                bytes_read += len(chunk)
+                data = decoder.decode(chunk)
+                if keep:
+                    # Small pages are read to the end so they can be cached
+                    keep = bytes_read <= settings.page_cache_max_page_bytes
+                    if keep:
+                        body.append(data)
+                    else:
+                        body.clear()
+                if not extractor.done:
+                    extractor.feed(data)
+                if (extractor.done and not keep) or bytes_read >= settings.page_stream_max_bytes:
+                    break
+            else:
+                complete = True
+                data = decoder.decode(b"", final=True)
+                extractor.feed(data)
+                body.append(data)
+
+        if not complete:
+            self.stats["cut_short"] += 1
+        elif keep:
+            await self._cache_call(
+                self.cache.put, url, str(response.url), content_type,
+                response.headers.get("etag"), response.headers.get("last-modified"), "".join(body),
+            )
+        return PageText(url, str(response.url), extractor.result(), complete=complete)
+
+    async def read_many(self, urls: List[str], max_length: int) -> List[Union[PageText, Exception]]:
+        """Read several URLs concurrently (bounded by the connection pool); errors are returned in place."""
+        return await asyncio.gather(*(self.read(url, max_length) for url in urls), return_exceptions=True)
+
+    async def extract_text(self, html: str, max_length: int) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self._extract, extract_main_text, html, max_length)
+
+    async def close(self):
+        await self.client.aclose()
+        if self._extract is not self._io:
+            self._extract.shutdown(wait=False, cancel_futures=True)
+        self._io.shutdown(wait=True)
+        if self.cache:
+            self.cache.close()
+
+
+_fetcher: Optional[PageFetcher] = None
+
+
+def get_page_fetcher() -> PageFetcher:
+    global _fetcher
+    if _fetcher is None:
+        cache = None
+        if settings.page_cache_path:
+            cache = PageCache(settings.page_cache_path, settings.page_cache_max_mb * 1024 * 1024)
+        _fetcher = PageFetcher(cache)
+    return _fetcher
+
+
+def get_page_fetcher_stats() -> Optional[dict]:
+    return dict(_fetcher.stats) if _fetcher else None
+
+
+register_stats("page_fetcher", get_page_fetcher_stats)
+
+
+async def shutdown_page_fetcher():
+    global _fetcher
+    if _fetcher:
+        await _fetcher.close()
+        _fetcher = None
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import get_settings
+from app.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+WORKER_SCRIPT = Path(__file__).with_name("_sandbox_worker.py")
+# Preloaded numeric libraries must not start thread pools before the worker forks
+WORKER_ENV = {"OMP_NUM_THREADS": "1", "OPENBLAS_NUM_THREADS": "1", "MKL_NUM_THREADS": "1"}
+
+
+def _result_line_limit() -> int:
+    """Longest result line a worker can send: both streams at the output cap, JSON-escaped
+    (up to 6 characters per byte, e.g. \\ufffd), plus the rest of the result."""
+    return 2 * 6 * settings.sandbox_max_output_bytes + 64 * 1024
+
+
+class SandboxUnavailable(Exception):
+    """The pool cannot run snippets here (no fork, or workers fail to start)."""
+
+
+class _Worker:
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.runs = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def request(self, payload: dict, timeout: float) -> dict:
+        self.process.stdin.write((json.dumps(payload) + "\n").encode())
+        await self.process.stdin.drain()
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        if not line:
+            raise RuntimeError("sandbox worker exited")
+        return json.loads(line)
+
+    async def stop(self):
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), 2)
+        except (asyncio.TimeoutError, OSError):
+            self.process.kill()
+            # A full, paused stdout pipe would keep wait() from seeing the exit
+            await self.process.stdout.read()
+            await self.process.wait()
+
+
+class SandboxPool:
+    """Warm worker processes for execute_python_code.
+
+    Each worker has `sandbox_preload_modules` imported and forks a fresh child
+    per snippet, so a run skips interpreter start-up and those imports but still
+    starts from a clean process. The child gets its own address-space and CPU
+    rlimits (`sandbox_memory_mb`, `sandbox_cpu_seconds`); the worker streams its
+    output up to `sandbox_max_output_bytes` per stream and kills it at the wall
+    timeout. Snippets get `load_dataset(name)` for the task's parsed CSVs (see
+    dataset_cache). One snippet runs per worker at a time, at most `sandbox_workers` at
+    once; a worker is replaced after `sandbox_max_runs_per_worker` runs or if it
+    dies.
+    """
+
+    def __init__(self):
+        if not hasattr(os, "fork"):
+            raise SandboxUnavailable("os.fork is not available on this platform")
+        self._idle: "asyncio.Queue[_Worker]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(settings.sandbox_workers)
+        self._workers: List[_Worker] = []
+        self._starting = 0
+        self._closed = False
+        self.stats = {"runs": 0, "workers_started": 0, "workers_recycled": 0, "worker_failures": 0}
+
+    async def _spawn(self) -> _Worker:
+        self._starting += 1
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, str(WORKER_SCRIPT), json.dumps(settings.sandbox_preload_modules),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                env={**os.environ, **WORKER_ENV},
+                limit=_result_line_limit(),
+            )
+            worker = _Worker(process)
+            try:
+                ready = json.loads(await asyncio.wait_for(process.stdout.readline(), 60) or b"{}")
+            except (asyncio.TimeoutError, ValueError):
+                ready = {}
+        finally:
+            self._starting -= 1
+        if not ready.get("ready"):
+            await worker.stop()
+            raise SandboxUnavailable("sandbox worker failed to start")
+        self._workers.append(worker)
+        self.stats["workers_started"] += 1
+        return worker
+
+    async def warm(self):
+        """Start idle workers up to `sandbox_workers`."""
+        missing = settings.sandbox_workers - len(self._workers) - self._starting
+        for worker in await asyncio.gather(*(self._spawn() for _ in range(missing))):
+            self._idle.put_nowait(worker)
+
+    async def _retire(self, worker: _Worker):
+        if worker in self._workers:
+            self._workers.remove(worker)
+        await worker.stop()
+
+    async def _replace(self, worker: _Worker):
+        await self._retire(worker)
+        if not self._closed and len(self._workers) + self._starting < settings.sandbox_workers:
+            try:
+                self._idle.put_nowait(await self._spawn())
+            except SandboxUnavailable as e:
+                logger.warning(f"Could not replace sandbox worker: {e}")
+
+    async def _acquire(self) -> _Worker:
+        while True:
+            if not self._idle.empty():
+                return self._idle.get_nowait()
+            if len(self._workers) + self._starting < settings.sandbox_workers:
+                return await self._spawn()
+            # A replacement is starting; wait for it (re-checking in case it fails)
+            try:
+                return await asyncio.wait_for(self._idle.get(), 1)
+            except asyncio.TimeoutError:
+                continue
+
+    async def run(self, code: str, timeout: float, datasets: Optional[Dict[str, str]] = None) -> dict:
+        async with self._slots:
+            worker = await self._acquire()
+            request = {
+                "code": code,
+                "timeout": timeout,
+                "memory_mb": settings.sandbox_memory_mb,
+                "cpu_seconds": settings.sandbox_cpu_seconds,
+                "max_output_bytes": settings.sandbox_max_output_bytes,
+                "datasets": datasets or {},
+            }
+            try:
+                # The worker enforces the timeout itself; this only guards against a hung worker
+                result = await worker.request(request, timeout + 10)
+            except BaseException:
+                self.stats["worker_failures"] += 1
+                await self._retire(worker)
+                raise
+            worker.runs += 1
+            self.stats["runs"] += 1
+            if not worker.alive or worker.runs >= settings.sandbox_max_runs_per_worker:
+                self.stats["workers_recycled"] += 1
+                asyncio.create_task(self._replace(worker))
+            else:
+                self._idle.put_nowait(worker)
+            return result
+
+    async def close(self):
+        self._closed = True
+        for worker in list(self._workers):
+            await worker.stop()
+        self._workers.clear()
+
+
+_pool: Optional[SandboxPool] = None
+
+
+def get_sandbox_pool() -> SandboxPool:
+    global _pool
+    if _pool is None:
+        _pool = SandboxPool()
+    return _pool
+
+
+async def prewarm_sandbox_pool():
+    """Start the workers at startup so the first snippet does not wait for the preloads."""
+    if not settings.sandbox_pool_enabled:
+        return
+    try:
+        await get_sandbox_pool().warm()
+    except Exception as e:
+        logger.warning(f"Sandbox prewarm failed: {e}")
+
+
+def get_sandbox_stats() -> Optional[dict]:
+    if _pool is None:
+        return None
+    return {**_pool.stats, "workers": len(_pool._workers)}
+
+
+register_stats("sandbox", get_sandbox_stats)
+
+
+async def shutdown_sandbox_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
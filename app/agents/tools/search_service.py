@@ -0,0 +1,221 @@
+import abc
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class SearchBackend(abc.ABC):
+    """Synchronous search provider; called on the service's worker threads."""
+
+    @abc.abstractmethod
+    def text(self, query: str, max_results: int) -> List[dict]:
+        ...
+
+    @abc.abstractmethod
+    def news(self, query: str, max_results: int) -> List[dict]:
+        ...
+
+
+class DDGSBackend(SearchBackend):
+    """DuckDuckGo via duckduckgo_search, with one DDGS session per worker thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _ddgs(self):
+        ddgs = getattr(self._local, "ddgs", None)
+        if ddgs is None:
+            from duckduckgo_search import DDGS
+            ddgs = self._local.ddgs = DDGS()
+        return ddgs
+
+    def text(self, query: str, max_results: int) -> List[dict]:
+        return list(self._ddgs().text(query, max_results=max_results))
+
+    def news(self, query: str, max_results: int) -> List[dict]:
+        return list(self._ddgs().news(query, max_results=max_results))
+
+
+class _DiskCache:
+    """SQLite file of search results, shared by every process on the host."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_results "
+            "(key TEXT PRIMARY KEY, results TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Tuple[float, List[dict]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, expires_at FROM search_results WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return (row[1], json.loads(row[0])) if row else None
+
+    def put(self, key: str, results: List[dict], expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results (key, results, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(results), expires_at),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._conn.execute("DELETE FROM search_results WHERE expires_at <= ?", (time.time(),))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SearchService:
+    """Shared async front end for web searches.
+
+    The synchronous backend runs on a thread pool, so a search never blocks the
+    event loop. Results are cached by (kind, result count, normalized query):
+    in memory (LRU) and in a SQLite file, with a short TTL for news and a long
+    one for general search. Concurrent identical searches share one backend
+    call. Failures are not cached.
+    """
+
+    def __init__(self, backend: SearchBackend, cache_path: Optional[str] = None):
+        self.backend = backend
+        self._executor = ThreadPoolExecutor(max_workers=settings.search_max_workers, thread_name_prefix="search")
+        self._disk = _DiskCache(cache_path) if cache_path else None
+        self._memory: "OrderedDict[str, Tuple[float, List[dict]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    @staticmethod
+    def cache_key(kind: str, query: str, max_results: int) -> str:
+        normalized = re.sub(r"\s+", " ", query).strip().lower()
+        return f"{kind}:{max_results}:{normalized}"
+
+    def _ttl(self, kind: str) -> float:
+        return settings.search_news_ttl_seconds if kind == "news" else settings.search_text_ttl_seconds
+
+    def _remember(self, key: str, expires_at: float, results: List[dict]):
+        self._memory[key] = (expires_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > settings.search_cache_max_entries:
+            self._memory.popitem(last=False)
+
+    async def search(self, kind: str, query: str, max_results: int) -> List[dict]:
+        """`kind` is "text" or "news"."""
+        key = self.cache_key(kind, query, max_results)
+        cached = self._memory.get(key)
+        if cached and cached[0] > time.time():
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return cached[1]
+
+        # After a cancelled start, the first waiter to wake takes over; the rest wait for it
+        while key in self._inflight:
+            inflight = self._inflight[key]
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The task that started the search was cancelled: search ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            results = await self._load(kind, key, query, max_results)
+            future.set_result(results)
+            return results
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            # A caller that took over after a cancelled start owns the entry now
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def _load(self, kind: str, key: str, query: str, max_results: int) -> List[dict]:
+        loop = asyncio.get_running_loop()
+        if self._disk:
+            stored = await loop.run_in_executor(self._executor, self._disk.get, key)
+            if stored:
+                self.stats["disk_hits"] += 1
+                self._remember(key, *stored)
+                return stored[1]
+
+        self.stats["misses"] += 1
+        call = self.backend.news if kind == "news" else self.backend.text
+        try:
+            results = await loop.run_in_executor(self._executor, call, query, max_results)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+
+        expires_at = time.time() + self._ttl(kind)
+        self._remember(key, expires_at, results)
+        if self._disk:
+            try:
+                await loop.run_in_executor(self._executor, self._disk.put, key, results, expires_at)
+            except sqlite3.Error as e:
+                logger.warning(f"Search cache write failed: {e}")
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._disk:
+            self._disk.close()
+
+
+_service: Optional[SearchService] = None
+_backend: Optional[SearchBackend] = None
+
+
+def set_search_backend(backend: Optional[SearchBackend]):
+    """Use another backend (e.g. a stub in benchmarks); None restores DuckDuckGo."""
+    global _backend
+    _backend = backend
+    shutdown_search_service()
+
+
+def get_search_service() -> SearchService:
+    global _service
+    if _service is None:
+        _service = SearchService(_backend or DDGSBackend(), settings.search_cache_path or None)
+    return _service
+
+
+def get_search_stats() -> Optional[dict]:
+    return dict(_service.stats) if _service else None
+
+
+register_stats("web_search", get_search_stats)
+
+
+def shutdown_search_service():
+    global _service
+    if _service:
+        _service.close()
+        _service = None
@@ -1,5 +1,24 @@
 import httpx
-from bs4 import BeautifulSoup
+
+from app.agents.tools.page_fetcher import get_page_fetcher
+
+MAX_URLS_PER_CALL = 10
+
+
+def _render(url: str, text: str, max_length: int) -> str:
+    if len(text) > max_length:
+        text = text[:max_length] + "\n\n[Content truncated...]"
+
+    if len(text) < 50:
+        return f"Could not extract meaningful content from {url}. The page may require JavaScript."
+
+    return f"Content from {url}:\n\n{text}"
+
+
+def _error(url: str, e: Exception) -> str:
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"HTTP error fetching {url}: {e.response.status_code}"
+    return f"Failed to read webpage: {str(e)}"
 
 
 async def read_webpage(url: str, max_length: int = 8000) -> str:
@@ -10,44 +29,27 @@ async def read_webpage(url: str, max_length: int = 8000) -> str:
         max_length: Maximum characters of content to return (default 8000).
     """
     try:
-        async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
-            response = await client.get(url, headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            })
-            response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Remove non-content elements
-        for tag in soup(["script", "style", "nav", "footer", "header", "aside",
-                         "form", "iframe", "noscript", "svg", "img", "button"]):
-            tag.decompose()
-
-        # Try to find the main content area first
-        main_content = None
-        for selector in ["article", "main", "[role='main']", ".article-body",
-                         ".post-content", ".entry-content", "#content", ".content"]:
-            main_content = soup.select_one(selector)
-            if main_content:
-                break
-
-        if main_content:
-            text = main_content.get_text(separator="\n", strip=True)
-        else:
-            text = soup.get_text(separator="\n", strip=True)
-
-        # Clean up: remove excessive blank lines
-        lines = [line.strip() for line in text.split("\n") if line.strip()]
-        text = "\n".join(lines)
-
-        if len(text) > max_length:
-            text = text[:max_length] + "\n\n[Content truncated...]"
-
-        if len(text) < 50:
-            return f"Could not extract meaningful content from {url}. The page may require JavaScript."
-
-        return f"Content from {url}:\n\n{text}"
-    except httpx.HTTPStatusError as e:
-        return f"HTTP error fetching {url}: {e.response.status_code}"
+        page = await get_page_fetcher().read(url, max_length)
+        return _render(url, page.text, max_length)
     except Exception as e:
-        return f"Failed to read webpage: {str(e)}"
+        return _error(url, e)
+
+
+async def read_webpages(urls: str, max_length: int = 4000) -> str:
+    """Fetch several webpages at once and extract the main text of each.
+
+    Args:
+        urls: URLs separated by commas or newlines (at most 10).
+        max_length: Maximum characters of content per page (default 4000).
+    """
+    url_list = [u.strip() for u in urls.replace("\n", ",").split(",") if u.strip()]
+    if not url_list:
+        return "No URLs given."
+    url_list = list(dict.fromkeys(url_list))[:MAX_URLS_PER_CALL]
+
+    pages = await get_page_fetcher().read_many(url_list, max_length)
+    sections = [
+        _error(url, page) if isinstance(page, Exception) else _render(url, page.text, max_length)
+        for url, page in zip(url_list, pages)
+    ]
+    return "\n\n---\n\n".join(sections)
@@ -1,4 +1,4 @@
-from duckduckgo_search import DDGS
+from app.agents.tools.search_service import get_search_service
 
 
 async def web_search(query: str, max_results: int = 5) -> str:
@@ -10,8 +10,7 @@ async def web_search(query: str, max_results: int = 5) -> str:
     """
     try:
         max_results = min(max_results, 10)
-        with DDGS() as ddgs:
-            results = list(ddgs.text(query, max_results=max_results))
+        results = await get_search_service().search("text", query, max_results)
 
         if not results:
             return "No results found for the query."
@@ -37,8 +36,7 @@ async def web_search_news(query: str, max_results: int = 5) -> str:
     """
     try:
         max_results = min(max_results, 10)
-        with DDGS() as ddgs:
-            results = list(ddgs.news(query, max_results=max_results))
+        results = await get_search_service().search("news", query, max_results)
 
         if not results:
             return "No news results found for the query."
@@ -5,7 +5,7 @@ from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
-from app.db.crud import get_task
+from app.db.crud import get_task_header
 from app.db.models import User
 from app.auth.dependencies import get_current_user
 from app.config import get_settings
@@ -22,7 +22,7 @@ async def upload_file(
     db: AsyncSession = Depends(get_db)
 ):
     """Upload a file to a task's workspace."""
-    task = await get_task(db, task_id)
+    task = await get_task_header(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     if task.user_id != current_user.id:
@@ -55,7 +55,7 @@ async def download_file(
     db: AsyncSession = Depends(get_db)
 ):
     """Download a file from a task's workspace."""
-    task = await get_task(db, task_id)
+    task = await get_task_header(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     if task.user_id != current_user.id:
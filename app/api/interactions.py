@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
-from app.db.crud import get_pending_interaction, respond_to_interaction
+from app.db.crud import get_pending_interaction, respond_to_interaction, get_interaction_request
 from app.auth.dependencies import get_current_user
 from app.agents.interaction_manager import InteractionManager
 from app.schemas.interaction import InteractionResponseData
@@ -42,8 +42,10 @@ async def respond(
     """User responds to an interaction request. Unblocks the waiting tool."""
     interaction = await respond_to_interaction(db, request_id, response.model_dump_json())
     if not interaction:
+        if await get_interaction_request(db, request_id):
+            raise HTTPException(status_code=409, detail="Interaction request is no longer pending")
         raise HTTPException(status_code=404, detail="Interaction request not found")
 
-    InteractionManager.resolve(request_id, response.model_dump())
+    await InteractionManager.resolve(interaction.task_id, request_id)
 
     return {"success": True}
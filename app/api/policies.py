@@ -0,0 +1,108 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.db.database import get_db
+from app.db.crud import (
+    get_approval_policies, create_approval_policy, update_approval_policy,
+    delete_approval_policy, get_approval_audits_page
+)
+from app.db.models import User
+from app.auth.dependencies import get_current_user
+from app.agents.approval_policy import policies_changed
+from app.agents.tools.confirmed_tool import TOOL_INPUT_SPECS
+from app.schemas.policy import (
+    ApprovalPolicyCreate, ApprovalPolicyUpdate, ApprovalPolicyResponse, ApprovalAuditResponse
+)
+
+router = APIRouter(prefix="/policies", tags=["Approval Policies"])
+
+
+def _to_response(policy) -> ApprovalPolicyResponse:
+    return ApprovalPolicyResponse(
+        id=policy.id,
+        tool_name=policy.tool_name,
+        enabled=policy.enabled,
+        argument_patterns=json.loads(policy.argument_patterns_json) if policy.argument_patterns_json else {},
+        allowed_domains=json.loads(policy.allowed_domains_json) if policy.allowed_domains_json else [],
+        max_calls_per_hour=policy.max_calls_per_hour,
+        created_at=policy.created_at,
+        updated_at=policy.updated_at,
+    )
+
+
+def _columns(data: dict) -> dict:
+    values = {}
+    for key, value in data.items():
+        if key == "argument_patterns":
+            values["argument_patterns_json"] = json.dumps(value) if value else None
+        elif key == "allowed_domains":
+            values["allowed_domains_json"] = json.dumps([d.lower() for d in value]) if value else None
+        else:
+            values[key] = value
+    return values
+
+
+@router.get("/", response_model=List[ApprovalPolicyResponse])
+async def list_policies(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List the current user's auto-approval policies."""
+    return [_to_response(p) for p in await get_approval_policies(db, current_user.id)]
+
+
+@router.post("/", response_model=ApprovalPolicyResponse, status_code=status.HTTP_201_CREATED)
+async def create_policy(
+    policy_data: ApprovalPolicyCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Auto-approve matching calls of a tool (or "*" for every read-only tool)."""
+    if policy_data.tool_name != "*" and policy_data.tool_name not in TOOL_INPUT_SPECS:
+        raise HTTPException(status_code=400, detail=f"Unknown tool '{policy_data.tool_name}'")
+    policy = await create_approval_policy(db, current_user.id, **_columns(policy_data.model_dump()))
+    await policies_changed(current_user.id)
+    return _to_response(policy)
+
+
+@router.patch("/{policy_id}", response_model=ApprovalPolicyResponse)
+async def update_policy(
+    policy_id: int,
+    policy_data: ApprovalPolicyUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Change a policy's conditions, or enable/disable it."""
+    values = _columns(policy_data.model_dump(exclude_unset=True))
+    if not values:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    policy = await update_approval_policy(db, policy_id, current_user.id, **values)
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    await policies_changed(current_user.id)
+    return _to_response(policy)
+
+
+@router.delete("/{policy_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_policy(
+    policy_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete a policy; matching calls ask for confirmation again."""
+    if not await delete_approval_policy(db, policy_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Policy not found")
+    await policies_changed(current_user.id)
+
+
+@router.get("/audit", response_model=List[ApprovalAuditResponse])
+async def list_audit(
+    before_id: Optional[int] = None,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Tool calls decided by the user's policies, newest first (page with `before_id`)."""
+    return await get_approval_audits_page(db, current_user.id, before_id, min(limit, 500))
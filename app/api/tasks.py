@@ -1,29 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.db.database import get_db
 from app.db.crud import (
-    create_task, get_task, get_user_tasks, update_task_status,
+    create_task, get_task, get_task_header, get_user_tasks, update_task_status,
     update_task_objective, reset_task_for_rerun, delete_task_messages,
-    get_scheduled_tasks
+    get_scheduled_tasks, get_task_message_stats, get_task_messages_page
 )
 from app.db.models import TaskStatus, User
 from app.scheduler import schedule_task_execution, cancel_scheduled_task
+from app.task_queue import enqueue_task, get_queue_stats
 from app.auth.dependencies import get_current_user
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskListResponse, TaskCreateResponse
+from app.schemas.task import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskListResponse, TaskCreateResponse,
+    TaskHeaderResponse, TaskMessagesPage
+)
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
+def _with_queue_position(task, position: int) -> TaskCreateResponse:
+    response = TaskCreateResponse.model_validate(task)
+    response.queue_position = position
+    return response
+
+
 @router.post("/", response_model=TaskCreateResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_task(
     task_data: TaskCreate,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Create a new task and start agent processing (or schedule for later)."""
+    """Create a new task and queue it for agent processing (or schedule for later)."""
     task = await create_task(
         db, current_user.id, task_data.objective,
         scheduled_for=task_data.scheduled_for
@@ -32,12 +41,17 @@ async def create_new_task(
     if task_data.scheduled_for:
         # Schedule for future execution
         schedule_task_execution(task.id, task_data.scheduled_for)
-    else:
-        # Start agent processing immediately
-        from app.agents.orchestrator import process_task
-        background_tasks.add_task(process_task, task.id)
+        return task
 
-    return task
+    # Queue for the worker pool and return immediately
+    position = await enqueue_task(task.id, current_user.id)
+    return _with_queue_position(task, position)
+
+
+@router.get("/queue/stats")
+async def queue_stats(current_user: User = Depends(get_current_user)):
+    """Return task queue depth, worker utilisation and queue wait-time metrics."""
+    return await get_queue_stats()
 
 
 @router.get("/", response_model=List[TaskListResponse])
@@ -105,6 +119,64 @@ async def get_task_details(
     }
 
 
+@router.get("/{task_id}/header", response_model=TaskHeaderResponse)
+async def get_task_header_details(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a task's status and results without its messages or files."""
+    task = await get_task_header(db, task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    if task.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this task"
+        )
+
+    message_count, last_message_id = await get_task_message_stats(db, task_id)
+    response = TaskHeaderResponse.model_validate(task)
+    response.message_count = message_count
+    response.last_message_id = last_message_id
+    return response
+
+
+@router.get("/{task_id}/messages", response_model=TaskMessagesPage)
+async def list_task_messages(
+    task_id: int,
+    after_id: int = Query(0, ge=0, description="Return messages with id greater than this"),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Page through a task's messages in order. Pass the returned next_after_id to fetch only newer ones."""
+    task = await get_task_header(db, task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    if task.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this task"
+        )
+
+    # Fetch one extra row to learn whether another page exists
+    messages = await get_task_messages_page(db, task_id, after_id=after_id, limit=limit + 1)
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    return {
+        "messages": messages,
+        "next_after_id": messages[-1].id if messages else after_id,
+        "has_more": has_more,
+    }
+
+
 @router.put("/{task_id}", response_model=TaskCreateResponse)
 async def rename_task(
     task_id: int,
@@ -113,7 +185,7 @@ async def rename_task(
     db: AsyncSession = Depends(get_db)
 ):
     """Rename a task (update objective)."""
-    task = await get_task(db, task_id)
+    task = await get_task_header(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -132,12 +204,11 @@ async def rename_task(
 @router.post("/{task_id}/rerun", response_model=TaskCreateResponse)
 async def rerun_task(
     task_id: int,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Re-run an existing task with the same objective."""
-    task = await get_task(db, task_id)
+    task = await get_task_header(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -155,23 +226,20 @@ async def rerun_task(
     # Reset task for re-running
     updated_task = await reset_task_for_rerun(db, task_id)
 
-    # Start agent processing in background
-    from app.agents.orchestrator import process_task
-    background_tasks.add_task(process_task, task_id)
-
-    return updated_task
+    # Queue for the worker pool
+    position = await enqueue_task(task_id, current_user.id)
+    return _with_queue_position(updated_task, position)
 
 
 @router.post("/{task_id}/continue", response_model=TaskCreateResponse, status_code=status.HTTP_201_CREATED)
 async def continue_task(
     task_id: int,
     task_data: TaskCreate,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a follow-up task based on a previous task."""
-    original_task = await get_task(db, task_id)
+    original_task = await get_task_header(db, task_id)
     if not original_task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -192,11 +260,9 @@ async def continue_task(
     # Create new task with context
     new_task = await create_task(db, current_user.id, context)
 
-    # Start agent processing in background
-    from app.agents.orchestrator import process_task
-    background_tasks.add_task(process_task, new_task.id)
-
-    return new_task
+    # Queue for the worker pool
+    position = await enqueue_task(new_task.id, current_user.id)
+    return _with_queue_position(new_task, position)
 
 
 @router.get("/scheduled/list", response_model=List[TaskListResponse])
@@ -216,7 +282,7 @@ async def cancel_task_schedule(
     db: AsyncSession = Depends(get_db)
 ):
     """Cancel a scheduled task before it runs."""
-    task = await get_task(db, task_id)
+    task = await get_task_header(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     if task.user_id != current_user.id:
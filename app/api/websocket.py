@@ -1,56 +1,272 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from typing import Dict, Set
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
 import json
 import asyncio
+import time
+
+from app.auth.dependencies import get_current_user
+from app.broadcast import get_broadcast
+from app.config import get_settings
+from app.db.models import User
 
 router = APIRouter()
+settings = get_settings()
 
 # Store active WebSocket connections by task_id
 active_connections: Dict[int, Set[WebSocket]] = {}
 
 
+class SocketSubscriber:
+    """A viewer's socket with its own bounded send queue and writer task.
+
+    Broadcasting only enqueues a pre-encoded frame, so a slow client never delays
+    other viewers or the agent run that published the event. When the queue is
+    full, the `ws_slow_client_policy` setting decides what happens: "drop"
+    discards the oldest queued frame, and "disconnect" closes the socket so the
+    client can reconnect.
+    """
+
+    def __init__(self, websocket: WebSocket, task_id: int, on_close: Callable[["SocketSubscriber"], None]):
+        self.websocket = websocket
+        self.task_id = task_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ws_send_queue_size)
+        self.closed = False
+        self.sent_count = 0
+        self.dropped_count = 0
+        self.max_depth = 0
+        self._on_close = on_close
+        self._writer = asyncio.create_task(self._write_loop(), name=f"ws-writer-{task_id}")
+
+    def offer(self, frame: str) -> bool:
+        """Queue a frame without waiting. Returns False if the socket is closed."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            if settings.ws_slow_client_policy == "disconnect":
+                self.close(code=1013)
+                return False
+            self.queue.get_nowait()
+            self.dropped_count += 1
+            self.queue.put_nowait(frame)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def replace_queue(self, frames: List[str]):
+        """Discard queued frames and queue `frames` instead (used for replay)."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        for frame in frames:
+            self.offer(frame)
+
+    async def _write_loop(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                async with asyncio.timeout(settings.ws_send_timeout_seconds):
+                    await self.websocket.send_text(frame)
+                self.sent_count += 1
+        except asyncio.CancelledError:
+            pass  # close() was called, and closes the socket itself
+        except Exception:
+            # Socket went away or stalled past the send timeout: close it, so the
+            # endpoint's receive loop ends and the client reconnects
+            self.closed = True
+            await self._close_socket(1013)
+        finally:
+            self.closed = True
+            self._on_close(self)
+
+    def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        self._writer.cancel()
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            async with asyncio.timeout(settings.ws_send_timeout_seconds):
+                await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_depth,
+            "sent": self.sent_count,
+            "dropped": self.dropped_count,
+        }
+
+
 class ConnectionManager:
+    """Per-process registry of task sockets.
+
+    Every broadcast event carries a `seq` that is contiguous per task while one
+    process runs it. Counters start from the current time in milliseconds, so a
+    task re-claimed by another worker continues with higher numbers instead of
+    restarting. Clients can therefore ignore frames at or below the last seq
+    they applied, and can treat a jump as missed events. Control frames that may
+    be published by a process not running the task (`interaction_resolved` from
+    the API) carry no seq and are not buffered for replay, so they never
+    interleave with the running process's numbering.
+
+    The last `ws_replay_buffer_size` frames of each task are kept in a ring
+    buffer. A client reconnecting with `resume_from=<seq>` gets only the frames
+    after that seq, or a `resync_required` event if they are no longer buffered.
+    """
+
     def __init__(self):
-        self.active_connections: Dict[int, Set[WebSocket]] = {}
+        self.active_connections: Dict[int, Dict[WebSocket, SocketSubscriber]] = {}
+        self.disconnected_slow_count = 0
+        self._seq: "OrderedDict[int, int]" = OrderedDict()
+        self._replay: "OrderedDict[int, Deque[Tuple[int, str]]]" = OrderedDict()
+        self.resumed_count = 0
+        self.resync_count = 0
 
-    async def connect(self, websocket: WebSocket, task_id: int):
+    async def connect(self, websocket: WebSocket, task_id: int) -> SocketSubscriber:
         await websocket.accept()
+        subscriber = SocketSubscriber(websocket, task_id, self._subscriber_closed)
         if task_id not in self.active_connections:
-            self.active_connections[task_id] = set()
-        self.active_connections[task_id].add(websocket)
+            self.active_connections[task_id] = {}
+        self.active_connections[task_id][websocket] = subscriber
+        return subscriber
+
+    def _subscriber_closed(self, subscriber: SocketSubscriber):
+        if not subscriber.queue.empty():
+            self.disconnected_slow_count += 1
+        self.disconnect(subscriber.websocket, subscriber.task_id)
 
     def disconnect(self, websocket: WebSocket, task_id: int):
         if task_id in self.active_connections:
-            self.active_connections[task_id].discard(websocket)
+            subscriber = self.active_connections[task_id].pop(websocket, None)
+            if subscriber:
+                subscriber.close()
             if not self.active_connections[task_id]:
                 del self.active_connections[task_id]
 
-    async def broadcast_to_task(self, task_id: int, message: dict):
-        if task_id in self.active_connections:
-            disconnected = set()
-            for connection in self.active_connections[task_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    disconnected.add(connection)
-            # Clean up disconnected sockets
-            for conn in disconnected:
-                self.active_connections[task_id].discard(conn)
+    def _next_seq(self, task_id: int) -> int:
+        seq = self._seq.pop(task_id, None)
+        seq = seq + 1 if seq is not None else int(time.time() * 1000)
+        self._seq[task_id] = seq
+        if len(self._seq) > 10000:
+            self._seq.popitem(last=False)
+        return seq
+
+    def _remember(self, task_id: int, seq: int, frame: str):
+        buffer = self._replay.pop(task_id, None)
+        if buffer is None:
+            buffer = deque(maxlen=settings.ws_replay_buffer_size)
+        elif buffer and buffer[-1][0] + 1 != seq:
+            # A hole (missed relay) or a new run: never replay across it
+            buffer.clear()
+        buffer.append((seq, frame))
+        self._replay[task_id] = buffer
+        if len(self._replay) > settings.ws_replay_max_tasks:
+            self._replay.popitem(last=False)
+
+    def resume(self, subscriber: SocketSubscriber, resume_from: int):
+        """Queue the frames after `resume_from`, or a resync_required event."""
+        buffer = self._replay.get(subscriber.task_id)
+        latest = buffer[-1][0] if buffer else None
+        if buffer and buffer[0][0] - 1 <= resume_from <= latest:
+            frames = [frame for seq, frame in buffer if seq > resume_from]
+            if len(frames) <= subscriber.queue.maxsize:
+                subscriber.replace_queue(frames)
+                self.resumed_count += 1
+                return
+        self.resync_count += 1
+        subscriber.replace_queue([json.dumps({"type": "resync_required", "latest_seq": latest})])
+
+    async def deliver_local(self, task_id: int, seq: int, frame: str):
+        """Queue an already-serialised frame on this process's sockets for a task."""
+        if seq:
+            self._remember(task_id, seq, frame)
+        subscribers = list(self.active_connections.get(task_id, {}).values())
+        for subscriber in subscribers:
+            subscriber.offer(frame)
+        if subscribers:
+            # Let the writers run, so a burst of events is not dropped for fast clients
+            await asyncio.sleep(0)
+
+    async def broadcast_to_task(self, task_id: int, message: dict, sequenced: bool = True):
+        seq = self._next_seq(task_id) if sequenced else 0
+        if seq:
+            message = {"seq": seq, **message}
+        # Serialise once; the backend fans the same frame out to every process
+        frame = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+        backend = get_broadcast()
+        if backend:
+            await backend.publish(task_id, seq, frame)
+        else:
+            await self.deliver_local(task_id, seq, frame)
+
+    def stats(self) -> dict:
+        tasks = {
+            task_id: [subscriber.stats() for subscriber in subscribers.values()]
+            for task_id, subscribers in self.active_connections.items()
+        }
+        return {
+            "connections": sum(len(sockets) for sockets in tasks.values()),
+            "queue_size": settings.ws_send_queue_size,
+            "slow_client_policy": settings.ws_slow_client_policy,
+            "disconnected_with_backlog": self.disconnected_slow_count,
+            "replay_buffers": len(self._replay),
+            "resumed": self.resumed_count,
+            "resync_required": self.resync_count,
+            "tasks": tasks,
+        }
 
 
 manager = ConnectionManager()
 
 
+@router.get("/ws/stats")
+async def websocket_stats(current_user: User = Depends(get_current_user)):
+    """Per-socket send queue depth and drop counts, plus broadcast backend stats."""
+    stats = manager.stats()
+    backend = get_broadcast()
+    if backend:
+        stats["broadcast"] = backend.stats()
+    return stats
+
+
+def _parse_resume_from(data: str) -> Optional[int]:
+    """Accept `resume_from=<seq>` or `{"resume_from": <seq>}`."""
+    data = data.strip()
+    try:
+        if data.startswith("resume_from="):
+            return int(data.split("=", 1)[1])
+        if data.startswith("{"):
+            value = json.loads(data).get("resume_from")
+            return int(value) if value is not None else None
+    except (ValueError, TypeError, AttributeError):
+        pass
+    return None
+
+
 @router.websocket("/ws/task/{task_id}")
-async def websocket_endpoint(websocket: WebSocket, task_id: int):
-    await manager.connect(websocket, task_id)
+async def websocket_endpoint(websocket: WebSocket, task_id: int, resume_from: Optional[int] = None):
+    subscriber = await manager.connect(websocket, task_id)
+    if resume_from is not None:
+        manager.resume(subscriber, resume_from)
     try:
         while True:
             # Keep connection alive, wait for messages
             data = await websocket.receive_text()
+            requested = _parse_resume_from(data)
+            if requested is not None:
+                # Frames already sent are repeated; clients skip seq <= last applied
+                manager.resume(subscriber, requested)
+                continue
             # Echo back for now (can be extended for bidirectional communication)
-            await websocket.send_json({"type": "ack", "data": data})
+            subscriber.offer(json.dumps({"type": "ack", "data": data}))
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, task_id)
 
 
@@ -82,12 +298,32 @@ async def send_input_request(task_id: int, request_id: int, tool_name: str, prom
     })
 
 
-async def send_confirmation_request(task_id: int, request_id: int, tool_name: str, description: str, parameters: dict):
-    """Send confirmation request to all connected clients for a task."""
-    await manager.broadcast_to_task(task_id, {
+async def send_confirmation_request(
+    task_id: int, request_id: int, tool_name: str, description: str, parameters: dict, items: list = None
+):
+    """Send confirmation request to all connected clients for a task.
+
+    A batched confirmation carries `items` (one per tool call) instead of `parameters`.
+    """
+    message = {
         "type": "request_confirmation",
         "request_id": request_id,
         "tool_name": tool_name,
         "description": description,
         "parameters": parameters,
-    })
+    }
+    if items:
+        message["items"] = items
+    await manager.broadcast_to_task(task_id, message)
+
+
+async def send_interaction_resolved(task_id: int, request_id: int):
+    """Tell every process (and viewer) that an interaction request was answered.
+
+    Sent from the API process, so it is unsequenced: a seq from this process's
+    counter would not follow the worker's and clients would drop what comes next.
+    """
+    await manager.broadcast_to_task(task_id, {
+        "type": "interaction_resolved",
+        "request_id": request_id,
+    }, sequenced=False)
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Delivers an already-serialised frame (task_id, seq, frame) to this process's sockets
+Deliver = Callable[[int, int, str], Awaitable[None]]
+
+# In-process observers of every delivered frame (local or relayed), e.g. the
+# InteractionManager waiting for `interaction_resolved`. Called synchronously.
+Listener = Callable[[int, int, str], None]
+_listeners: List[Listener] = []
+
+
+def add_listener(listener: Listener):
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def _with_listeners(deliver: Optional[Deliver]) -> Deliver:
+    async def dispatch(task_id: int, seq: int, frame: str):
+        for listener in _listeners:
+            try:
+                listener(task_id, seq, frame)
+            except Exception:
+                logger.exception("Broadcast listener failed")
+        if deliver:
+            await deliver(task_id, seq, frame)
+    return dispatch
+
+
+class MemoryBroadcast:
+    """Single-process backend: events only reach sockets held by this process."""
+
+    def __init__(self, deliver: Optional[Deliver]):
+        self._deliver = deliver
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, task_id: int, seq: int, frame: str):
+        if self._deliver:
+            await self._deliver(task_id, seq, frame)
+
+    def stats(self) -> dict:
+        return {"backend": "memory"}
+
+
+class DatabaseBroadcast:
+    """Relays events between processes through the `broadcast_events` table.
+
+    `publish` delivers to local sockets immediately and queues the frame; a writer
+    task inserts queued frames in batches, tagged with this node's id. Every
+    subscribing node polls for rows past the last id it has seen and delivers the
+    ones that originated elsewhere, so an event published by a worker process
+    reaches sockets on every API process. Rows older than `retention_seconds`
+    are pruned.
+
+    Nodes that hold no sockets (e.g. `python -m app.worker`) pass `deliver=None`;
+    they still poll, so in-process listeners see events published elsewhere.
+    """
+
+    def __init__(
+        self,
+        deliver: Optional[Deliver],
+        node_id: str,
+        poll_interval: Optional[float] = None,
+        retention_seconds: Optional[int] = None,
+        batch_size: int = 500,
+    ):
+        self._deliver = deliver
+        self.node_id = node_id
+        self.poll_interval = poll_interval or settings.broadcast_poll_interval_seconds
+        self.retention_seconds = retention_seconds or settings.broadcast_retention_seconds
+        self.batch_size = batch_size
+        self._pending: List[dict] = []
+        self._pending_event: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._last_id = 0
+
+        self._published_count = 0
+        self._relayed_count = 0
+        self._dropped_count = 0
+
+    async def start(self):
+        from app.db.database import AsyncSessionLocal
+        from app.db.crud import get_last_broadcast_event_id
+
+        self._pending_event = asyncio.Event()
+        async with AsyncSessionLocal() as db:
+            self._last_id = await get_last_broadcast_event_id(db)
+        self._tasks = [
+            asyncio.create_task(self._writer(), name="broadcast-writer"),
+            asyncio.create_task(self._poller(), name="broadcast-poller"),
+        ]
+        logger.info(f"Database broadcast started on {self.node_id} from event {self._last_id}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            await self._write_pending()
+        except Exception:
+            logger.exception("Failed to write pending broadcast events on shutdown")
+
+    async def publish(self, task_id: int, seq: int, frame: str):
+        if self._deliver:
+            await self._deliver(task_id, seq, frame)
+        self._pending.append({
+            "task_id": task_id,
+            "seq": seq,
+            "origin": self.node_id,
+            "payload": frame,
+            "created_at": datetime.utcnow(),
+        })
+        self._published_count += 1
+        if self._pending_event:
+            self._pending_event.set()
+
+    async def _write_pending(self):
+        from app.db.database import AsyncSessionLocal
+        from app.db.crud import bulk_create_broadcast_events
+
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        try:
+            async with AsyncSessionLocal() as db:
+                await bulk_create_broadcast_events(db, rows)
+        except Exception:
+            # Keep the rows for the next attempt, but never grow without bound
+            self._pending[:0] = rows
+            overflow = len(self._pending) - 10 * self.batch_size
+            if overflow > 0:
+                del self._pending[:overflow]
+                self._dropped_count += overflow
+            raise
+
+    async def _writer(self):
+        while True:
+            await self._pending_event.wait()
+            self._pending_event.clear()
+            try:
+                await self._write_pending()
+            except Exception:
+                logger.exception("Failed to write broadcast events")
+                await asyncio.sleep(self.poll_interval)
+                self._pending_event.set()
+
+    async def _poller(self):
+        from app.db.database import AsyncSessionLocal
+        from app.db.crud import (
+            get_broadcast_events_after, delete_broadcast_events_before, get_last_broadcast_event_id,
+        )
+
+        last_prune = datetime.utcnow()
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    rows = await get_broadcast_events_after(db, self._last_id, self.batch_size)
+                for event_id, task_id, seq, origin, payload in rows:
+                    self._last_id = event_id
+                    if origin == self.node_id:
+                        continue  # Already delivered locally when published
+                    self._relayed_count += 1
+                    await self._deliver(task_id, seq, payload)
+
+                if datetime.utcnow() - last_prune > timedelta(seconds=60):
+                    last_prune = datetime.utcnow()
+                    async with AsyncSessionLocal() as db:
+                        await delete_broadcast_events_before(
+                            db, last_prune - timedelta(seconds=self.retention_seconds)
+                        )
+                        if 0 < await get_last_broadcast_event_id(db) < self._last_id:
+                            # The table was recreated (e.g. by a migration on another node):
+                            # its ids start again, so read it from the beginning
+                            logger.warning("Broadcast event ids went backwards; re-reading the table")
+                            self._last_id = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Broadcast poll failed")
+                rows = []
+            if len(rows) < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "database",
+            "node_id": self.node_id,
+            "last_event_id": self._last_id,
+            "published": self._published_count,
+            "relayed": self._relayed_count,
+            "pending_writes": len(self._pending),
+            "dropped": self._dropped_count,
+        }
+
+
+_backend = None
+
+
+def create_broadcast(name: str, deliver: Optional[Deliver], node_id: str):
+    deliver = _with_listeners(deliver)
+    if name == "memory":
+        return MemoryBroadcast(deliver)
+    if name == "database":
+        return DatabaseBroadcast(deliver, node_id)
+    raise ValueError(f"Unknown broadcast backend: {name}")
+
+
+async def init_broadcast(deliver: Optional[Deliver], node_id: str, backend: Optional[str] = None):
+    """Start the broadcast backend for this process."""
+    global _backend
+    _backend = create_broadcast(backend or settings.broadcast_backend, deliver, node_id)
+    await _backend.start()
+
+
+def get_broadcast():
+    return _backend
+
+
+async def shutdown_broadcast():
+    global _backend
+    if _backend:
+        await _backend.stop()
+        _backend = None
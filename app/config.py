@@ -1,10 +1,46 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
     # OpenAI
     openai_api_key: str = ""
+    openai_base_url: str = ""  # Optional: an OpenAI-compatible endpoint or proxy
+
+    # Shared LLM client (one connection pool and rate budget per process)
+    llm_model: str = "gpt-4o-mini"
+    llm_max_connections: int = 20
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 200000
+    llm_max_retries: int = 5
+    # "router": pick the next agent from workflow markers, asking the LLM only on
+    # ambiguous turns. "llm": always use the LLM selector.
+    speaker_selection: str = "router"
+
+    # Planner/Reviewer response cache (per process). A similarity threshold > 0
+    # (e.g. 0.97) also serves near-identical prompts; 0 keeps exact matches only.
+    response_cache_enabled: bool = True
+    response_cache_ttl_seconds: float = 86400
+    response_cache_max_entries: int = 500
+    response_cache_similarity_threshold: float = 0.0
+
+    # Agent context compaction: the last N messages are sent verbatim, older tool
+    # outputs over CONTEXT_ELIDE_CHARS are replaced by a preview and a reference,
+    # and each agent's prompt is kept under its token budget.
+    # CONTEXT_TOKEN_BUDGETS overrides per agent, e.g. '{"Executor": 16000}'.
+    context_compaction_enabled: bool = True
+    context_keep_recent_messages: int = 6
+    context_elide_chars: int = 1500
+    context_token_budget: int = 12000
+    context_token_budgets: Dict[str, int] = {}
+
+    # Run independent Planner subtasks concurrently on Executor sub-agents
+    # (plans whose dependencies allow at least two at once); the Reviewer then
+    # checks the merged result
+    parallel_subtasks_enabled: bool = True
+    parallel_subtask_limit: int = 3
+    parallel_subtask_max_tool_iterations: int = 10
 
     # JWT
     secret_key: str = "change-me-in-production"
@@ -26,9 +62,113 @@ class Settings(BaseSettings):
     smtp_from_address: str = ""
     smtp_use_tls: bool = True
 
+    # Task execution
+    # "inline": the API process also runs a worker pool.
+    # "external": the API only enqueues; run `python -m app.worker` separately.
+    task_worker_mode: str = "inline"
+    max_concurrent_tasks: int = 4
+    max_concurrent_tasks_per_user: int = 2
+    task_lease_seconds: int = 60
+    task_heartbeat_seconds: int = 15
+    task_poll_interval_seconds: float = 1.0
+    task_max_attempts: int = 3
+
+    # Agent message persistence (write-behind batching)
+    message_flush_batch_size: int = 50
+    message_flush_interval_seconds: float = 0.5
+    # Failed bulk inserts in a row before the buffer is written one message at a time
+    message_flush_max_attempts: int = 3
+
+    # WebSocket broadcast fan-out
+    # "memory": events only reach sockets held by the publishing process.
+    # "database": events are relayed through the shared database, so they reach
+    # sockets on every API process (required with several uvicorn workers or
+    # TASK_WORKER_MODE=external).
+    broadcast_backend: str = "memory"
+    broadcast_poll_interval_seconds: float = 0.2
+    broadcast_retention_seconds: int = 300
+    # Per-socket send queue. When a slow client's queue is full, "drop" discards
+    # its oldest queued frame, "disconnect" closes the socket.
+    ws_send_queue_size: int = 256
+    ws_slow_client_policy: str = "drop"
+    ws_send_timeout_seconds: float = 10.0
+    # Recent events kept per task for clients reconnecting with resume_from
+    # (keep below ws_send_queue_size so a full replay fits in the send queue)
+    ws_replay_buffer_size: int = 200
+    ws_replay_max_tasks: int = 500
+
+    # Interaction waits: woken by `interaction_resolved` events, with a fallback
+    # poll of the database that backs off between these bounds
+    interaction_poll_min_seconds: float = 0.5
+    interaction_poll_max_seconds: float = 10.0
+    # Tool confirmations requested within this window (e.g. parallel tool calls
+    # of one turn) are shown to the user as a single batch
+    confirmation_batch_window_seconds: float = 0.1
+    # Per-user policies that run matching tool calls without confirmation (see
+    # /policies). Decisions are written to the audit table in batches.
+    auto_approval_enabled: bool = True
+    approval_policy_cache_seconds: float = 30.0
+    approval_audit_batch_size: int = 100
+    approval_audit_flush_seconds: float = 2.0
+
     # Workspace
     workspace_dir: str = "workspace"
 
+    # Web search: DuckDuckGo runs on a thread pool; results are cached in memory
+    # and in a SQLite file (empty path = memory only), news for a shorter time
+    search_max_workers: int = 8
+    search_cache_path: str = "workspace/.cache/search.sqlite3"
+    search_cache_max_entries: int = 2000
+    search_text_ttl_seconds: float = 86400
+    search_news_ttl_seconds: float = 900
+
+    # Webpage reading: one pooled HTTP client; downloads are streamed and cut off
+    # once enough text is extracted (or at page_stream_max_bytes). Pages up to
+    # page_cache_max_page_bytes are kept compressed in a SQLite file (empty path
+    # = no cache) and revalidated with ETag/Last-Modified once older than
+    # page_cache_fresh_seconds. Cached pages are extracted on
+    # page_extract_workers processes (0 = a thread)
+    page_fetch_max_connections: int = 20
+    page_stream_max_bytes: int = 10_000_000
+    page_cache_path: str = "workspace/.cache/pages.sqlite3"
+    page_cache_max_mb: int = 200
+    page_cache_max_page_bytes: int = 2_000_000
+    page_cache_fresh_seconds: float = 600
+    page_extract_workers: int = 2
+
+    # Browser automation: one shared Chromium with a BrowserContext per task
+    # (and per parallel sub-agent), closed when the task ends or after
+    # browser_idle_seconds without a call. When all browser_max_contexts are
+    # open, a new one waits up to browser_context_wait_seconds for a free slot
+    browser_max_contexts: int = 8
+    browser_idle_seconds: float = 300
+    browser_context_wait_seconds: float = 60
+    browser_prewarm: bool = False
+
+    # Code execution: warm worker processes with the preload modules imported
+    # fork a fresh child per snippet, with its own memory/CPU rlimits and capped
+    # output; a worker is replaced after sandbox_max_runs_per_worker snippets
+    sandbox_pool_enabled: bool = True
+    sandbox_workers: int = 2
+    sandbox_preload_modules: List[str] = ["numpy", "pandas", "pyarrow"]
+    sandbox_max_runs_per_worker: int = 200
+    sandbox_memory_mb: int = 1024
+    sandbox_cpu_seconds: int = 60
+    sandbox_max_output_bytes: int = 100_000
+
+    # CSV tools: column statistics are computed over chunks of this many rows
+    csv_chunk_rows: int = 50_000
+
+    # CSV tools: rows returned by an analyze_csv_data query
+    csv_query_max_rows: int = 50
+
+    # Parsed CSV datasets: each task CSV is converted once to an Arrow file that
+    # is memory-mapped and shared by the CSV tools and execute_python_code
+    # (load_dataset). Keyed by path, size and mtime; least recently used files
+    # are removed beyond dataset_cache_max_mb (empty dir = no cache)
+    dataset_cache_dir: str = "workspace/.cache/datasets"
+    dataset_cache_max_mb: int = 2048
+
     # Social Media APIs
     instagram_access_token: str = ""
     instagram_business_account_id: str = ""
@@ -1,10 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete, func, or_, and_, case
 from sqlalchemy.orm import selectinload
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 
-from datetime import datetime
-from app.db.models import User, Task, AgentMessage, TaskFile, InteractionRequest, TaskStatus, InteractionType
+from datetime import datetime, timedelta
+from app.db.models import (
+    User, Task, AgentMessage, TaskFile, InteractionRequest, BroadcastEvent, ApprovalPolicy, ApprovalAudit,
+    TaskStatus, InteractionType
+)
 
 
 # User CRUD
@@ -75,7 +78,8 @@ async def create_task(
     status = TaskStatus.SCHEDULED if is_scheduled else TaskStatus.PENDING
     task = Task(
         user_id=user_id, objective=objective, status=status,
-        scheduled_for=scheduled_for, is_scheduled=is_scheduled
+        scheduled_for=scheduled_for, is_scheduled=is_scheduled,
+        queued_at=None if is_scheduled else datetime.utcnow()
     )
     db.add(task)
     await db.commit()
@@ -99,6 +103,161 @@ async def get_all_scheduled_tasks(db: AsyncSession) -> List[Task]:
     return result.scalars().all()
 
 
+# Task queue / lease CRUD
+RUNNING_STATUSES = (
+    TaskStatus.PLANNING, TaskStatus.EXECUTING,
+    TaskStatus.REVIEWING, TaskStatus.AWAITING_INPUT,
+)
+
+
+def _claimable_clause(now: datetime):
+    """Queued tasks nobody holds, plus running tasks whose worker stopped heart-beating
+    or let go of them without finishing (e.g. a run that crashed)."""
+    return or_(
+        and_(Task.status.in_((TaskStatus.PENDING,) + RUNNING_STATUSES), Task.lease_owner.is_(None)),
+        and_(Task.status.in_((TaskStatus.PENDING,) + RUNNING_STATUSES), Task.lease_expires_at < now),
+    )
+
+
+async def count_active_leases_by_user(db: AsyncSession) -> Dict[int, int]:
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(Task.user_id, func.count(Task.id))
+        .where(Task.lease_owner.is_not(None), Task.lease_expires_at >= now)
+        .group_by(Task.user_id)
+    )
+    return dict(result.all())
+
+
+async def claim_next_task(
+    db: AsyncSession, worker_id: str, lease_seconds: int,
+    per_user_limit: int, scan_limit: int = 50
+) -> Optional[Task]:
+    """Atomically lease the next runnable task, preferring users with the fewest running tasks.
+
+    The claim is a conditional UPDATE, so concurrent workers (in any process or host)
+    racing for the same row resolve to exactly one winner on SQLite and PostgreSQL alike.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(Task.id, Task.user_id, Task.queued_at)
+        .where(_claimable_clause(now))
+        .order_by(Task.queued_at, Task.id)
+        .limit(scan_limit)
+    )
+    candidates = result.all()
+    if not candidates:
+        return None
+
+    running = await count_active_leases_by_user(db)
+    candidates = [c for c in candidates if running.get(c.user_id, 0) < per_user_limit]
+    # Least-busy user first, then oldest in the queue
+    candidates.sort(key=lambda c: (running.get(c.user_id, 0), c.queued_at or datetime.min, c.id))
+
+    for candidate in candidates:
+        claimed = await db.execute(
+            update(Task)
+            .where(Task.id == candidate.id, _claimable_clause(now))
+            .values(
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=func.coalesce(Task.attempts, 0) + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if claimed.rowcount == 1:
+            result = await db.execute(select(Task).where(Task.id == candidate.id))
+            return result.scalar_one_or_none()
+    return None
+
+
+async def renew_task_lease(db: AsyncSession, task_id: int, worker_id: str, lease_seconds: int) -> bool:
+    """Extend a lease held by this worker. Returns False if the lease was lost."""
+    result = await db.execute(
+        update(Task)
+        .where(Task.id == task_id, Task.lease_owner == worker_id)
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def release_task_lease(db: AsyncSession, task_id: int, worker_id: str):
+    await db.execute(
+        update(Task)
+        .where(Task.id == task_id, Task.lease_owner == worker_id)
+        .values(lease_owner=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def requeue_interrupted_task(db: AsyncSession, task_id: int, worker_id: str):
+    """Put a task this worker stopped mid-run (graceful shutdown) back in the queue.
+
+    Its partial messages are removed so it restarts from scratch, and the attempt
+    is not counted against `task_max_attempts`.
+    """
+    result = await db.execute(
+        update(Task)
+        .where(Task.id == task_id, Task.lease_owner == worker_id, Task.status.in_(RUNNING_STATUSES))
+        .values(
+            status=TaskStatus.PENDING,
+            lease_owner=None,
+            lease_expires_at=None,
+            attempts=case((Task.attempts > 0, Task.attempts - 1), else_=0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        await db.execute(delete(AgentMessage).where(AgentMessage.task_id == task_id))
+    await db.commit()
+    if result.rowcount != 1:
+        # Already finished (or never started running): a plain release is enough
+        await release_task_lease(db, task_id, worker_id)
+
+
+async def get_queue_position(db: AsyncSession, task_id: int) -> int:
+    """1-based position of a queued task among unclaimed PENDING tasks (0 if not queued)."""
+    result = await db.execute(
+        select(Task.queued_at).where(
+            Task.id == task_id, Task.status == TaskStatus.PENDING, Task.lease_owner.is_(None)
+        )
+    )
+    queued_at = result.scalar_one_or_none()
+    if queued_at is None:
+        return 0
+    result = await db.execute(
+        select(func.count(Task.id)).where(
+            Task.status == TaskStatus.PENDING, Task.lease_owner.is_(None),
+            or_(Task.queued_at < queued_at, and_(Task.queued_at == queued_at, Task.id <= task_id)),
+        )
+    )
+    return result.scalar_one()
+
+
+async def get_queue_depth(db: AsyncSession) -> Dict[str, object]:
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(func.count(Task.id), func.min(Task.queued_at)).where(
+            Task.status == TaskStatus.PENDING, Task.lease_owner.is_(None)
+        )
+    )
+    depth, oldest = result.one()
+    result = await db.execute(
+        select(func.count(Task.id)).where(
+            Task.lease_owner.is_not(None), Task.lease_expires_at >= now
+        )
+    )
+    return {
+        "queue_depth": depth,
+        "oldest_queued_seconds": round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+        "leased": result.scalar_one(),
+    }
+
+
 async def get_task(db: AsyncSession, task_id: int) -> Optional[Task]:
     result = await db.execute(
         select(Task)
@@ -108,6 +267,22 @@ async def get_task(db: AsyncSession, task_id: int) -> Optional[Task]:
     return result.scalar_one_or_none()
 
 
+async def get_task_header(db: AsyncSession, task_id: int) -> Optional[Task]:
+    """Load a task's own columns only (no messages or files)."""
+    result = await db.execute(select(Task).where(Task.id == task_id))
+    return result.scalar_one_or_none()
+
+
+async def get_task_message_stats(db: AsyncSession, task_id: int) -> Tuple[int, Optional[int]]:
+    """Return (message_count, last_message_id) for a task."""
+    result = await db.execute(
+        select(func.count(AgentMessage.id), func.max(AgentMessage.id))
+        .where(AgentMessage.task_id == task_id)
+    )
+    count, last_id = result.one()
+    return count, last_id
+
+
 async def get_user_tasks(db: AsyncSession, user_id: int, limit: int = 50) -> List[Task]:
     result = await db.execute(
         select(Task)
@@ -118,65 +293,77 @@ async def get_user_tasks(db: AsyncSession, user_id: int, limit: int = 50) -> Lis
     return result.scalars().all()
 
 
-async def update_task_status(db: AsyncSession, task_id: int, status: TaskStatus) -> Optional[Task]:
-    task = await get_task(db, task_id)
-    if task:
-        task.status = status
-        await db.commit()
-        await db.refresh(task)
-    return task
+async def get_task_status(db: AsyncSession, task_id: int) -> Optional[TaskStatus]:
+    result = await db.execute(select(Task.status).where(Task.id == task_id))
+    return result.scalar_one_or_none()
 
 
-async def update_task_plan(db: AsyncSession, task_id: int, plan: str) -> Optional[Task]:
-    task = await get_task(db, task_id)
-    if task:
-        task.plan = plan
-        await db.commit()
-        await db.refresh(task)
-    return task
+# Single-statement task updates: UPDATE tasks SET ... WHERE id = ?
+# These never load the task's messages or files, so their cost does not grow
+# with the task's history.
+async def update_task_fields(db: AsyncSession, task_id: int, **values) -> bool:
+    """Set columns on a task without loading it. Returns False if the task does not exist."""
+    result = await db.execute(
+        update(Task)
+        .where(Task.id == task_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount == 1
 
 
-async def update_task_execution(db: AsyncSession, task_id: int, execution_result: str) -> Optional[Task]:
-    task = await get_task(db, task_id)
-    if task:
-        task.execution_result = execution_result
-        await db.commit()
-        await db.refresh(task)
+async def update_task_fields_returning(db: AsyncSession, task_id: int, **values) -> Optional[Task]:
+    """Like update_task_fields, but returns the updated row via UPDATE ... RETURNING."""
+    result = await db.execute(
+        update(Task)
+        .where(Task.id == task_id)
+        .values(**values)
+        .returning(Task)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    task = result.scalar_one_or_none()
+    await db.commit()
     return task
 
 
-async def update_task_review(db: AsyncSession, task_id: int, review_result: str) -> Optional[Task]:
-    task = await get_task(db, task_id)
-    if task:
-        task.review_result = review_result
-        await db.commit()
-        await db.refresh(task)
-    return task
+async def update_task_status(db: AsyncSession, task_id: int, status: TaskStatus) -> bool:
+    return await update_task_fields(db, task_id, status=status)
+
+
+async def mark_task_queued(db: AsyncSession, task_id: int) -> Optional[Task]:
+    """Move a task into the execution queue (PENDING with a queued_at timestamp)."""
+    return await update_task_fields_returning(
+        db, task_id, status=TaskStatus.PENDING, queued_at=datetime.utcnow(), attempts=0
+    )
+
+
+async def update_task_plan(db: AsyncSession, task_id: int, plan: str) -> bool:
+    return await update_task_fields(db, task_id, plan=plan)
+
+
+async def update_task_execution(db: AsyncSession, task_id: int, execution_result: str) -> bool:
+    return await update_task_fields(db, task_id, execution_result=execution_result)
+
+
+async def update_task_review(db: AsyncSession, task_id: int, review_result: str) -> bool:
+    return await update_task_fields(db, task_id, review_result=review_result)
 
 
 async def update_task_objective(db: AsyncSession, task_id: int, objective: str) -> Optional[Task]:
     """Update the task objective (rename)."""
-    task = await get_task(db, task_id)
-    if task:
-        task.objective = objective
-        await db.commit()
-        await db.refresh(task)
-    return task
+    return await update_task_fields_returning(db, task_id, objective=objective)
 
 
 async def reset_task_for_rerun(db: AsyncSession, task_id: int, new_objective: Optional[str] = None) -> Optional[Task]:
     """Reset a task to pending state for re-running."""
-    task = await get_task(db, task_id)
-    if task:
-        if new_objective:
-            task.objective = new_objective
-        task.status = TaskStatus.PENDING
-        task.plan = None
-        task.execution_result = None
-        task.review_result = None
-        await db.commit()
-        await db.refresh(task)
-    return task
+    values = dict(
+        status=TaskStatus.PENDING, queued_at=datetime.utcnow(), attempts=0,
+        plan=None, execution_result=None, review_result=None,
+    )
+    if new_objective:
+        values["objective"] = new_objective
+    return await update_task_fields_returning(db, task_id, **values)
 
 
 async def delete_task_messages(db: AsyncSession, task_id: int):
@@ -195,6 +382,27 @@ async def create_agent_message(db: AsyncSession, task_id: int, agent_name: str,
     return message
 
 
+async def bulk_create_agent_messages(db: AsyncSession, rows: List[dict]) -> None:
+    """Insert many messages in one statement, without loading them back."""
+    if not rows:
+        return
+    await db.execute(insert(AgentMessage), rows)
+    await db.commit()
+
+
+async def get_task_messages_page(
+    db: AsyncSession, task_id: int, after_id: int = 0, limit: int = 100
+) -> List[AgentMessage]:
+    """Keyset page of a task's messages: those with id > after_id, oldest first."""
+    result = await db.execute(
+        select(AgentMessage)
+        .where(AgentMessage.task_id == task_id, AgentMessage.id > after_id)
+        .order_by(AgentMessage.id)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
 async def get_task_messages(db: AsyncSession, task_id: int) -> List[AgentMessage]:
     result = await db.execute(
         select(AgentMessage)
@@ -253,20 +461,154 @@ async def get_pending_interaction(db: AsyncSession, task_id: int) -> Optional[In
         .where(InteractionRequest.task_id == task_id, InteractionRequest.status == "pending")
         .order_by(InteractionRequest.created_at.desc())
     )
+    # Parallel sub-agents can have several pending at once: return the newest
+    return result.scalars().first()
+
+
+async def get_interaction_request(db: AsyncSession, request_id: int) -> Optional[InteractionRequest]:
+    result = await db.execute(
+        select(InteractionRequest).where(InteractionRequest.id == request_id)
+    )
     return result.scalar_one_or_none()
 
 
 async def respond_to_interaction(
     db: AsyncSession, request_id: int, response_json: str
 ) -> Optional[InteractionRequest]:
+    """Record the response if the request is still pending; None otherwise."""
     result = await db.execute(
-        select(InteractionRequest).where(InteractionRequest.id == request_id)
+        update(InteractionRequest)
+        .where(InteractionRequest.id == request_id, InteractionRequest.status == "pending")
+        .values(response_json=response_json, status="responded", responded_at=datetime.utcnow())
+        .returning(InteractionRequest)
+        .execution_options(synchronize_session=False, populate_existing=True)
     )
     interaction = result.scalar_one_or_none()
-    if interaction:
-        interaction.response_json = response_json
-        interaction.status = "responded"
-        interaction.responded_at = datetime.utcnow()
-        await db.commit()
-        await db.refresh(interaction)
+    await db.commit()
     return interaction
+
+
+async def get_interaction_response(db: AsyncSession, request_id: int) -> Tuple[Optional[str], Optional[str]]:
+    """(status, response_json) of an interaction request, without loading the row."""
+    result = await db.execute(
+        select(InteractionRequest.status, InteractionRequest.response_json)
+        .where(InteractionRequest.id == request_id)
+    )
+    row = result.first()
+    return (row[0], row[1]) if row else (None, None)
+
+
+async def expire_interaction_request(db: AsyncSession, request_id: int) -> bool:
+    """Mark a still-pending request as expired. False if it was answered meanwhile."""
+    result = await db.execute(
+        update(InteractionRequest)
+        .where(InteractionRequest.id == request_id, InteractionRequest.status == "pending")
+        .values(status="expired")
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+# BroadcastEvent CRUD (database broadcast backend)
+async def bulk_create_broadcast_events(db: AsyncSession, rows: List[dict]) -> None:
+    if not rows:
+        return
+    await db.execute(insert(BroadcastEvent), rows)
+    await db.commit()
+
+
+async def get_broadcast_events_after(db: AsyncSession, after_id: int, limit: int = 500) -> List[tuple]:
+    """(id, task_id, seq, origin, payload) rows with id > after_id, oldest first."""
+    result = await db.execute(
+        select(
+            BroadcastEvent.id, BroadcastEvent.task_id, BroadcastEvent.seq,
+            BroadcastEvent.origin, BroadcastEvent.payload,
+        )
+        .where(BroadcastEvent.id > after_id)
+        .order_by(BroadcastEvent.id)
+        .limit(limit)
+    )
+    return list(result.all())
+
+
+async def get_last_broadcast_event_id(db: AsyncSession) -> int:
+    result = await db.execute(select(func.max(BroadcastEvent.id)))
+    return result.scalar() or 0
+
+
+async def delete_broadcast_events_before(db: AsyncSession, cutoff: datetime) -> int:
+    result = await db.execute(
+        delete(BroadcastEvent).where(BroadcastEvent.created_at < cutoff)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+# ApprovalPolicy CRUD
+async def get_approval_policies(db: AsyncSession, user_id: int, enabled_only: bool = False) -> List[ApprovalPolicy]:
+    query = select(ApprovalPolicy).where(ApprovalPolicy.user_id == user_id)
+    if enabled_only:
+        query = query.where(ApprovalPolicy.enabled == True)  # noqa: E712
+    result = await db.execute(query.order_by(ApprovalPolicy.id))
+    return list(result.scalars().all())
+
+
+async def get_approval_policy(db: AsyncSession, policy_id: int, user_id: int) -> Optional[ApprovalPolicy]:
+    result = await db.execute(
+        select(ApprovalPolicy).where(ApprovalPolicy.id == policy_id, ApprovalPolicy.user_id == user_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def create_approval_policy(db: AsyncSession, user_id: int, **values) -> ApprovalPolicy:
+    policy = ApprovalPolicy(user_id=user_id, **values)
+    db.add(policy)
+    await db.commit()
+    await db.refresh(policy)
+    return policy
+
+
+async def update_approval_policy(db: AsyncSession, policy_id: int, user_id: int, **values) -> Optional[ApprovalPolicy]:
+    result = await db.execute(
+        update(ApprovalPolicy)
+        .where(ApprovalPolicy.id == policy_id, ApprovalPolicy.user_id == user_id)
+        .values(**values, updated_at=datetime.utcnow())
+        .returning(ApprovalPolicy)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    policy = result.scalar_one_or_none()
+    await db.commit()
+    return policy
+
+
+async def delete_approval_policy(db: AsyncSession, policy_id: int, user_id: int) -> bool:
+    result = await db.execute(
+        delete(ApprovalPolicy).where(ApprovalPolicy.id == policy_id, ApprovalPolicy.user_id == user_id)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def get_task_user_id(db: AsyncSession, task_id: int) -> Optional[int]:
+    result = await db.execute(select(Task.user_id).where(Task.id == task_id))
+    return result.scalar_one_or_none()
+
+
+# ApprovalAudit CRUD
+async def bulk_create_approval_audits(db: AsyncSession, rows: List[dict]) -> None:
+    if not rows:
+        return
+    await db.execute(insert(ApprovalAudit), rows)
+    await db.commit()
+
+
+async def get_approval_audits_page(
+    db: AsyncSession, user_id: int, before_id: Optional[int] = None, limit: int = 100
+) -> List[ApprovalAudit]:
+    """Newest first; pass the last id seen as `before_id` for the next page."""
+    query = select(ApprovalAudit).where(ApprovalAudit.user_id == user_id)
+    if before_id is not None:
+        query = query.where(ApprovalAudit.id < before_id)
+    result = await db.execute(query.order_by(ApprovalAudit.id.desc()).limit(limit))
+    return list(result.scalars().all())
@@ -40,10 +40,42 @@ async def migrate_db():
     migrations = [
         "ALTER TABLE tasks ADD COLUMN scheduled_for DATETIME",
         "ALTER TABLE tasks ADD COLUMN is_scheduled BOOLEAN DEFAULT 0",
+        "ALTER TABLE tasks ADD COLUMN queued_at DATETIME",
+        "ALTER TABLE tasks ADD COLUMN lease_owner VARCHAR(100)",
+        "ALTER TABLE tasks ADD COLUMN lease_expires_at DATETIME",
+        "ALTER TABLE tasks ADD COLUMN attempts INTEGER DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_queued_at ON tasks (queued_at)",
+        "CREATE INDEX IF NOT EXISTS ix_agent_messages_task_id_id ON agent_messages (task_id, id)",
+        "ALTER TABLE broadcast_events ADD COLUMN seq BIGINT DEFAULT 0",
+        # Postgres only (SQLite integers are already 64-bit)
+        "ALTER TABLE broadcast_events ALTER COLUMN seq TYPE BIGINT",
     ]
-    async with engine.begin() as conn:
-        for sql in migrations:
-            try:
+    for sql in migrations:
+        # One transaction each: on Postgres a failed statement aborts the rest of its transaction
+        try:
+            async with engine.begin() as conn:
                 await conn.execute(sqlalchemy.text(sql))
-            except Exception:
-                pass  # Column already exists
+        except Exception:
+            pass  # Column already exists
+    async with engine.begin() as conn:
+        await _rebuild_broadcast_events(conn)
+
+
+async def _rebuild_broadcast_events(conn):
+    """Give an old SQLite broadcast_events table AUTOINCREMENT ids.
+
+    Without it SQLite reuses the ids of pruned rows, and pollers that already
+    passed those ids miss the new events. ALTER TABLE cannot add it, but the
+    table only holds the last few minutes of events, so it is recreated.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    result = await conn.execute(sqlalchemy.text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'broadcast_events'"
+    ))
+    row = result.first()
+    if row is None or "AUTOINCREMENT" in row[0].upper():
+        return
+    from app.db.models import BroadcastEvent
+    await conn.execute(sqlalchemy.text("DROP TABLE broadcast_events"))
+    await conn.run_sync(lambda sync_conn: BroadcastEvent.__table__.create(sync_conn, checkfirst=True))
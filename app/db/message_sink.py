@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from app.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.db.crud import bulk_create_agent_messages
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class MessageSink:
+    """Write-behind buffer for a task's AgentMessage rows.
+
+    Messages are appended in memory and written with one bulk INSERT per flush,
+    instead of a commit + refresh per message. A flush happens when the buffer
+    reaches `max_batch` messages, `max_delay` seconds after the first buffered
+    message, whenever the caller asks (phase boundaries), and on `close()`.
+
+    Crash safety: a message is durable once the flush that contains it commits.
+    If the process dies, at most the current buffer is lost - no more than
+    `max_batch` messages or `max_delay` seconds of transcript. Timestamps are taken
+    when a message is added, so the stored order always matches the stream
+    order. WebSocket viewers are not affected, since broadcasting does not wait
+    for the sink. A task whose worker crashed is restarted from scratch anyway
+    (see `TaskWorkerPool`), so a truncated transcript is never resumed.
+
+    Flushes use their own session, so they never interleave with the caller's
+    session. A failed flush keeps its messages for the next one. After
+    `message_flush_max_attempts` failures in a row, the buffer is written one
+    message at a time, so a message the database always rejects is logged and
+    dropped instead of holding back everything queued behind it.
+    """
+
+    def __init__(
+        self,
+        task_id: int,
+        max_batch: Optional[int] = None,
+        max_delay: Optional[float] = None,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.task_id = task_id
+        self.max_batch = max_batch or settings.message_flush_batch_size
+        self.max_delay = max_delay if max_delay is not None else settings.message_flush_interval_seconds
+        self._session_factory = session_factory
+        self._buffer: List[dict] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self.max_attempts = settings.message_flush_max_attempts
+        self._failures = 0
+        self.flushed_count = 0
+        self.flush_count = 0
+        self.dropped_count = 0
+
+    async def add(self, agent_name: str, content: str):
+        self._buffer.append({
+            "task_id": self.task_id,
+            "agent_name": agent_name,
+            "content": content,
+            "timestamp": datetime.utcnow(),
+        })
+        if len(self._buffer) >= self.max_batch:
+            await self.flush()
+        elif self._timer is None and self.max_delay > 0:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.max_delay)
+            self._timer = None
+            await self.flush()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception(f"Deferred message flush failed for task {self.task_id}")
+
+    async def flush(self):
+        """Write all buffered messages in a single INSERT."""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+            try:
+                async with self._session_factory() as db:
+                    await bulk_create_agent_messages(db, rows)
+            except Exception:
+                self._failures += 1
+                if self._failures < self.max_attempts:
+                    # Put the rows back so the next flush retries them in order
+                    self._buffer[:0] = rows
+                    raise
+                logger.exception(
+                    f"Message flush failed {self._failures} times for task {self.task_id}; "
+                    f"writing {len(rows)} messages one at a time"
+                )
+                await self._write_each(rows)
+            else:
+                self.flushed_count += len(rows)
+            self._failures = 0
+            self.flush_count += 1
+
+    async def _write_each(self, rows: List[dict]):
+        for row in rows:
+            try:
+                async with self._session_factory() as db:
+                    await bulk_create_agent_messages(db, [row])
+            except Exception as e:
+                self.dropped_count += 1
+                logger.error(
+                    f"Dropping agent message for task {self.task_id} "
+                    f"({row['agent_name']} at {row['timestamp'].isoformat()}): {e}; "
+                    f"content: {row['content'][:200]!r}"
+                )
+            else:
+                self.flushed_count += 1
+
+    async def close(self):
+        await self.flush()
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -36,6 +36,7 @@ class User(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     tasks = relationship("Task", back_populates="user", cascade="all, delete-orphan")
+    approval_policies = relationship("ApprovalPolicy", back_populates="user", cascade="all, delete-orphan")
 
 
 class Task(Base):
@@ -50,6 +51,10 @@ class Task(Base):
     review_result = Column(Text, nullable=True)
     scheduled_for = Column(DateTime, nullable=True)
     is_scheduled = Column(Boolean, default=False)
+    queued_at = Column(DateTime, nullable=True, index=True)
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -61,6 +66,10 @@ class Task(Base):
 
 class AgentMessage(Base):
     __tablename__ = "agent_messages"
+    __table_args__ = (
+        # Keyset pagination: WHERE task_id = ? AND id > ? ORDER BY id
+        Index("ix_agent_messages_task_id_id", "task_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
@@ -101,3 +110,52 @@ class InteractionRequest(Base):
     responded_at = Column(DateTime, nullable=True)
 
     task = relationship("Task", back_populates="interaction_requests")
+
+
+class BroadcastEvent(Base):
+    """WebSocket event relayed between processes by the database broadcast backend."""
+    __tablename__ = "broadcast_events"
+    # Pollers track the last id they saw, so ids of pruned rows must never be reused
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    # Per-task sequence number of the event; seeded from the time in ms, so past int4
+    seq = Column(BigInteger, nullable=False, default=0)
+    origin = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON frame, serialised once by the publisher
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ApprovalPolicy(Base):
+    """A user's rule for running matching tool calls without asking for confirmation."""
+    __tablename__ = "approval_policies"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    tool_name = Column(String(100), nullable=False)  # or "*" for every read-only tool
+    enabled = Column(Boolean, default=True)
+    argument_patterns_json = Column(Text, nullable=True)  # {"param": "regex"}, each must fully match
+    allowed_domains_json = Column(Text, nullable=True)  # ["api.example.com", ...] for the call's url
+    max_calls_per_hour = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = relationship("User", back_populates="approval_policies")
+
+
+class ApprovalAudit(Base):
+    """Record of a tool call decided by an approval policy, written in batches."""
+    __tablename__ = "approval_audits"
+    __table_args__ = (
+        Index("ix_approval_audits_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    task_id = Column(Integer, nullable=False)
+    policy_id = Column(Integer, nullable=True)
+    tool_name = Column(String(100), nullable=False)
+    decision = Column(String(20), nullable=False)  # "auto_approved" or "rate_limited"
+    parameters_json = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -4,12 +4,22 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.auth import router as auth_router
 from app.api.tasks import router as tasks_router
-from app.api.websocket import router as websocket_router
+from app.api.websocket import router as websocket_router, manager as websocket_manager
 from app.api.interactions import router as interactions_router
 from app.api.files import router as files_router
+from app.api.policies import router as policies_router
 from app.db.database import init_db, migrate_db
 from app.config import get_settings
 from app.scheduler import init_scheduler, load_pending_scheduled_tasks, shutdown_scheduler
+from app.task_queue import init_task_queue, shutdown_task_queue, make_worker_id
+from app.broadcast import init_broadcast, shutdown_broadcast
+from app.agents.model_client import shutdown_model_clients
+from app.agents.approval_policy import shutdown_approval_audit
+from app.agents.tools.search_service import shutdown_search_service
+from app.agents.tools.page_fetcher import shutdown_page_fetcher
+from app.agents.tools.browser_pool import prewarm_browser_pool, shutdown_browser_pool
+from app.agents.tools.sandbox_pool import prewarm_sandbox_pool, shutdown_sandbox_pool
+from app.agents.tools.dataset_cache import shutdown_dataset_cache
 
 settings = get_settings()
 
@@ -19,11 +29,25 @@ async def lifespan(app: FastAPI):
     # Startup
     await init_db()
     await migrate_db()
+    await init_broadcast(websocket_manager.deliver_local, make_worker_id())
+    if settings.task_worker_mode == "inline":
+        await init_task_queue(settings.max_concurrent_tasks, settings.max_concurrent_tasks_per_user)
+        await prewarm_browser_pool()
+        await prewarm_sandbox_pool()
     init_scheduler(settings.database_url)
     await load_pending_scheduled_tasks()
     yield
     # Shutdown
     shutdown_scheduler()
+    await shutdown_task_queue()
+    await shutdown_model_clients()
+    await shutdown_approval_audit()
+    shutdown_search_service()
+    await shutdown_page_fetcher()
+    await shutdown_browser_pool()
+    await shutdown_sandbox_pool()
+    shutdown_dataset_cache()
+    await shutdown_broadcast()
 
 
 app = FastAPI(
@@ -48,6 +72,7 @@ app.include_router(tasks_router)
 app.include_router(websocket_router)
 app.include_router(interactions_router)
 app.include_router(files_router)
+app.include_router(policies_router)
 
 
 @app.get("/")
@@ -0,0 +1,28 @@
+"""Registry of per-subsystem stats for GET /api/tasks/queue/stats.
+
+Each subsystem registers its `get_*_stats` function when its module is imported,
+so the endpoint reports every subsystem loaded in this process without the
+task queue having to import (and depend on) each of them.
+"""
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+StatsProvider = Callable[[], Optional[dict]]
+_providers: Dict[str, StatsProvider] = {}
+
+
+def register_stats(name: str, provider: StatsProvider):
+    _providers[name] = provider
+
+
+def collect_stats() -> Dict[str, Optional[dict]]:
+    stats = {}
+    for name, provider in _providers.items():
+        try:
+            stats[name] = provider()
+        except Exception:
+            logger.exception(f"Stats provider {name} failed")
+            stats[name] = None
+    return stats
@@ -27,18 +27,18 @@ def init_scheduler(db_url: str):
 async def _execute_scheduled_task(task_id: int):
     """Job function that runs when a scheduled task fires."""
     from app.db.database import AsyncSessionLocal
-    from app.db.crud import update_task_status
-    from app.db.models import TaskStatus
-    from app.agents.orchestrator import process_task
+    from app.db.crud import mark_task_queued
+    from app.task_queue import enqueue_task
 
     logger.info(f"Scheduled task {task_id} firing now")
 
     # Update status from SCHEDULED to PENDING
     async with AsyncSessionLocal() as db:
-        await update_task_status(db, task_id, TaskStatus.PENDING)
+        task = await mark_task_queued(db, task_id)
 
-    # Run the task
-    await process_task(task_id)
+    # Hand off to the worker pool
+    if task:
+        await enqueue_task(task_id, task.user_id)
 
 
 def schedule_task_execution(task_id: int, run_at: datetime):
@@ -4,6 +4,8 @@ from typing import Optional, Dict, Any, List
 
 class InteractionResponseData(BaseModel):
     confirmed: Optional[bool] = None
+    # Per-item approvals for a batched confirmation, in the order of preview["items"]
+    decisions: Optional[List[bool]] = None
     values: Optional[Dict[str, Any]] = None
     cancelled: bool = False
 
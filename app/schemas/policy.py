@@ -0,0 +1,61 @@
+import re
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Dict
+from datetime import datetime
+
+
+def _check_patterns(patterns: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    for name, pattern in (patterns or {}).items():
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Invalid pattern for '{name}': {e}")
+    return patterns
+
+
+class ApprovalPolicyBase(BaseModel):
+    enabled: bool = True
+    argument_patterns: Dict[str, str] = {}  # parameter -> regex the value must fully match
+    allowed_domains: List[str] = []  # hosts (and their subdomains) the call's url may target
+    max_calls_per_hour: Optional[int] = Field(None, ge=1)
+
+    @field_validator("argument_patterns")
+    @classmethod
+    def patterns_compile(cls, patterns):
+        return _check_patterns(patterns)
+
+
+class ApprovalPolicyCreate(ApprovalPolicyBase):
+    tool_name: str = Field(..., min_length=1, max_length=100)  # or "*" for every read-only tool
+
+
+class ApprovalPolicyUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    argument_patterns: Optional[Dict[str, str]] = None
+    allowed_domains: Optional[List[str]] = None
+    max_calls_per_hour: Optional[int] = Field(None, ge=1)
+
+    @field_validator("argument_patterns")
+    @classmethod
+    def patterns_compile(cls, patterns):
+        return _check_patterns(patterns)
+
+
+class ApprovalPolicyResponse(ApprovalPolicyBase):
+    id: int
+    tool_name: str
+    created_at: datetime
+    updated_at: datetime
+
+
+class ApprovalAuditResponse(BaseModel):
+    id: int
+    task_id: int
+    policy_id: Optional[int] = None
+    tool_name: str
+    decision: str
+    parameters_json: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -24,6 +24,7 @@ class TaskCreateResponse(BaseModel):
     review_result: Optional[str] = None
     scheduled_for: Optional[datetime] = None
     is_scheduled: bool = False
+    queue_position: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -71,6 +72,31 @@ class TaskResponse(BaseModel):
         from_attributes = True
 
 
+class TaskHeaderResponse(BaseModel):
+    """Task columns plus message counters, without the messages themselves."""
+    id: int
+    objective: str
+    status: TaskStatus
+    plan: Optional[str] = None
+    execution_result: Optional[str] = None
+    review_result: Optional[str] = None
+    scheduled_for: Optional[datetime] = None
+    is_scheduled: bool = False
+    created_at: datetime
+    updated_at: datetime
+    message_count: int = 0
+    last_message_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TaskMessagesPage(BaseModel):
+    messages: List[AgentMessageResponse] = []
+    next_after_id: int
+    has_more: bool = False
+
+
 class TaskListResponse(BaseModel):
     id: int
     objective: str
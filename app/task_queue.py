@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from app.config import get_settings
+from app.metrics import collect_stats
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class TaskWorkerPool:
+    """Bounded pool of `process_task` workers that lease tasks from the database.
+
+    The database is the queue: API nodes only write PENDING rows with `queued_at`,
+    and any number of pools (inside the API process or in `python -m app.worker`
+    processes on other hosts) claim rows with a conditional UPDATE that sets
+    `lease_owner` / `lease_expires_at`. While a task runs, a heartbeat keeps
+    extending the lease. If a worker dies, its lease expires and another pool
+    re-claims the task and restarts it from scratch, up to `task_max_attempts`.
+    Claims prefer the user with the fewest running tasks and skip users already at
+    `per_user_limit`, so one user's burst cannot starve everyone else.
+    """
+
+    def __init__(self, concurrency: int, per_user_limit: int, worker_id: Optional[str] = None):
+        self.concurrency = max(1, concurrency)
+        self.per_user_limit = max(1, per_user_limit)
+        self.worker_id = worker_id or make_worker_id()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[int, asyncio.Task] = {}
+        self._lost: set = set()
+
+        # Metrics (local to this pool)
+        self._started_count = 0
+        self._completed_count = 0
+        self._reclaimed_count = 0
+        self._lost_lease_count = 0
+        self._recent_waits: Deque[float] = deque(maxlen=200)
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"task-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Task worker pool {self.worker_id} started with {self.concurrency} workers")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"Task worker pool {self.worker_id} stopped")
+
+    def wake(self):
+        """Skip the poll delay after a local enqueue."""
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _worker(self, index: int):
+        from app.db.database import AsyncSessionLocal
+        from app.db.crud import claim_next_task
+
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    task = await claim_next_task(
+                        db, self.worker_id, settings.task_lease_seconds, self.per_user_limit
+                    )
+            except Exception:
+                logger.exception(f"Worker {index} failed to claim a task")
+                task = None
+
+            if task is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.task_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(index, task)
+            # A per-user slot may have opened up for another local worker
+            self.wake()
+
+    async def _run(self, index: int, task):
+        from app.db.database import AsyncSessionLocal
+        from app.db.crud import release_task_lease, requeue_interrupted_task
+        from app.agents.orchestrator import process_task
+
+        task_id = task.id
+        if task.queued_at:
+            wait = (datetime.utcnow() - task.queued_at).total_seconds()
+            self._recent_waits.append(wait)
+        else:
+            wait = 0.0
+        self._started_count += 1
+        interrupted = False
+
+        try:
+            if not await self._prepare_reclaimed(task):
+                return
+
+            logger.info(f"Worker {index} ({self.worker_id}) starting task {task_id} after {wait:.2f}s in queue")
+            run = asyncio.create_task(process_task(task_id))
+            self._running[task_id] = run
+            heartbeat = asyncio.create_task(self._heartbeat(task_id, run))
+            try:
+                await run
+            except asyncio.CancelledError:
+                if task_id not in self._lost:
+                    raise
+                # The lease was lost to another worker; it owns the task now
+                self._lost.discard(task_id)
+                return
+            finally:
+                heartbeat.cancel()
+                self._running.pop(task_id, None)
+        except asyncio.CancelledError:
+            # The pool is stopping: hand the task back instead of leaving it
+            # marked as running with nobody holding it
+            interrupted = True
+            raise
+        except Exception:
+            logger.exception(f"Worker {index} crashed while processing task {task_id}")
+        finally:
+            self._completed_count += 1
+            try:
+                async with AsyncSessionLocal() as db:
+                    if interrupted:
+                        await requeue_interrupted_task(db, task_id, self.worker_id)
+                    else:
+                        await release_task_lease(db, task_id, self.worker_id)
+            except Exception:
+                logger.exception(f"Failed to release lease on task {task_id}")
+
+    async def _prepare_reclaimed(self, task) -> bool:
+        """Reset a task whose previous worker died mid-run. Returns False if it should not run."""
+        from app.db.database import AsyncSessionLocal
+        from app.db.crud import delete_task_messages, update_task_status, create_agent_message
+        from app.db.models import TaskStatus
+
+        if task.status == TaskStatus.PENDING and (task.attempts or 0) <= 1:
+            return True
+
+        self._reclaimed_count += 1
+        async with AsyncSessionLocal() as db:
+            if (task.attempts or 0) > settings.task_max_attempts:
+                logger.warning(f"Task {task.id} abandoned after {task.attempts - 1} failed attempts")
+                await update_task_status(db, task.id, TaskStatus.FAILED)
+                await create_agent_message(
+                    db, task.id, "System",
+                    f"Error: task abandoned after {task.attempts - 1} worker failures."
+                )
+                return False
+
+            logger.warning(f"Re-claimed task {task.id} after an expired lease (attempt {task.attempts})")
+            await delete_task_messages(db, task.id)
+            await update_task_status(db, task.id, TaskStatus.PENDING)
+        return True
+
+    async def _heartbeat(self, task_id: int, run: asyncio.Task):
+        from app.db.database import AsyncSessionLocal
+        from app.db.crud import renew_task_lease
+
+        while True:
+            await asyncio.sleep(settings.task_heartbeat_seconds)
+            try:
+                async with AsyncSessionLocal() as db:
+                    renewed = await renew_task_lease(db, task_id, self.worker_id, settings.task_lease_seconds)
+            except Exception:
+                logger.exception(f"Heartbeat for task {task_id} failed")
+                continue
+            if not renewed:
+                logger.error(f"Lost lease on task {task_id}; stopping local run")
+                self._lost_lease_count += 1
+                self._lost.add(task_id)
+                run.cancel()
+                return
+
+    def stats(self) -> dict:
+        waits = sorted(self._recent_waits)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3)
+
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "per_user_limit": self.per_user_limit,
+            "running": len(self._running),
+            "started": self._started_count,
+            "completed": self._completed_count,
+            "reclaimed": self._reclaimed_count,
+            "lost_leases": self._lost_lease_count,
+            "p50_wait_seconds": percentile(0.50),
+            "p95_wait_seconds": percentile(0.95),
+        }
+
+
+_pool: TaskWorkerPool = None
+
+
+async def init_task_queue(concurrency: int, per_user_limit: int, worker_id: Optional[str] = None):
+    """Start a worker pool in this process."""
+    global _pool
+    _pool = TaskWorkerPool(concurrency, per_user_limit, worker_id)
+    await _pool.start()
+
+
+async def enqueue_task(task_id: int, user_id: int) -> int:
+    """Announce a task that was persisted as PENDING and return its queue position.
+
+    The row itself is the queue entry; this only wakes a local pool (if any) and
+    reports where the task sits among unclaimed work.
+    """
+    from app.db.database import AsyncSessionLocal
+    from app.db.crud import get_queue_position
+
+    if _pool:
+        _pool.wake()
+    async with AsyncSessionLocal() as db:
+        return await get_queue_position(db, task_id)
+
+
+async def get_queue_stats() -> dict:
+    from app.db.database import AsyncSessionLocal
+    from app.db.crud import get_queue_depth
+
+    async with AsyncSessionLocal() as db:
+        stats = await get_queue_depth(db)
+    stats["worker_mode"] = settings.task_worker_mode
+    if _pool:
+        stats["local_pool"] = _pool.stats()
+    stats.update(collect_stats())
+    return stats
+
+
+async def shutdown_task_queue():
+    """Stop the local pool. Leases on interrupted tasks expire and are re-claimed elsewhere."""
+    global _pool
+    if _pool:
+        await _pool.stop()
+        _pool = None
@@ -0,0 +1,84 @@
+"""Standalone task worker.
+
+Run one or more of these next to the API (set TASK_WORKER_MODE=external on the
+API nodes so they only enqueue):
+
+    python -m app.worker --concurrency 4
+
+Workers lease tasks from the shared database, so they can run as separate
+processes on one machine or on different hosts pointed at the same DATABASE_URL.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.config import get_settings
+from app.db.database import init_db, migrate_db
+from app.task_queue import init_task_queue, shutdown_task_queue, make_worker_id
+from app.broadcast import init_broadcast, shutdown_broadcast
+from app.agents.model_client import shutdown_model_clients
+from app.agents.approval_policy import shutdown_approval_audit
+from app.agents.tools.search_service import shutdown_search_service
+from app.agents.tools.page_fetcher import shutdown_page_fetcher
+from app.agents.tools.browser_pool import prewarm_browser_pool, shutdown_browser_pool
+from app.agents.tools.sandbox_pool import prewarm_sandbox_pool, shutdown_sandbox_pool
+from app.agents.tools.dataset_cache import shutdown_dataset_cache
+
+logger = logging.getLogger("app.worker")
+settings = get_settings()
+
+
+async def run_worker(concurrency: int, per_user_limit: int, worker_id: str):
+    await init_db()
+    await migrate_db()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows: rely on KeyboardInterrupt
+
+    if settings.broadcast_backend == "memory":
+        logger.warning("BROADCAST_BACKEND=memory: live events from this worker will not reach API WebSockets")
+    # Workers hold no sockets, so they only publish
+    await init_broadcast(None, worker_id)
+    await init_task_queue(concurrency, per_user_limit, worker_id)
+    await prewarm_browser_pool()
+    await prewarm_sandbox_pool()
+    logger.info(f"Worker {worker_id} running against {settings.database_url}")
+    try:
+        await stop.wait()
+    finally:
+        await shutdown_task_queue()
+        await shutdown_model_clients()
+        await shutdown_approval_audit()
+        shutdown_search_service()
+        await shutdown_page_fetcher()
+        await shutdown_browser_pool()
+        await shutdown_sandbox_pool()
+        shutdown_dataset_cache()
+        await shutdown_broadcast()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a task worker process.")
+    parser.add_argument("--concurrency", type=int, default=settings.max_concurrent_tasks,
+                        help="Number of tasks this process runs at once.")
+    parser.add_argument("--per-user-limit", type=int, default=settings.max_concurrent_tasks_per_user,
+                        help="Maximum running tasks per user across the whole fleet.")
+    parser.add_argument("--worker-id", default=None,
+                        help="Lease owner name (default: host:pid:random).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(run_worker(args.concurrency, args.per_user_limit, args.worker_id or make_worker_id()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Compare the old single shared browser page with the per-task browser context pool.
+
+    python -m benchmarks.bench_browser_pool --tasks 4 --steps 10
+
+Needs Chromium for Playwright (`playwright install chromium`). Each step of a
+task opens one of the local HTML fixtures (`--fixtures DIR`, or generated form
+pages), fills the form, clicks submit and reads the result back, like a
+browser_navigate / fill / click / get_text sequence. `--tasks` tasks run
+concurrently. Prints wall time, steps per second per task, and how many reads
+returned another task's page for:
+  * old   - one module-global page launched on first use (old behaviour)
+  * cold  - the pool, Chromium launched by the first call
+  * warm  - the pool again with Chromium already running
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from app.agents.tools._context import set_current_task_id
+from app.agents.tools.browser_automation import browser_navigate, browser_fill_form, browser_click, browser_get_text
+from app.agents.tools.browser_pool import get_browser_pool, shutdown_browser_pool
+
+FORM_PAGE = """<html><head><title>Fixture {i}</title></head><body>
+<form onsubmit="document.getElementById('out').textContent = 'fixture {i}: ' + this.q.value; return false;">
+<input name="q"><button type="submit" id="go">Go</button></form>
+<div id="out"></div>{filler}</body></html>"""
+
+
+def _fixtures(directory: str, count: int) -> list:
+    if directory:
+        files = sorted(Path(directory).glob("*.htm*"))
+        if not files:
+            raise SystemExit(f"No .html files in {directory}")
+        return [f.resolve().as_uri() for f in files]
+    target = Path(tempfile.mkdtemp(prefix="bench_browser_"))
+    filler = "".join(f"<p>Paragraph {n} of filler text.</p>" for n in range(200))
+    for i in range(count):
+        (target / f"{i}.html").write_text(FORM_PAGE.format(i=i, filler=filler))
+    return [(target / f"{i}.html").resolve().as_uri() for i in range(count)]
+
+
+class OldBrowser:
+    """browser_automation as it was: one page for every task."""
+
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+        self._page = None
+
+    async def page(self):
+        if self._page is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._page = await self._browser.new_page()
+        return self._page
+
+    async def step(self, url: str, value: str) -> str:
+        page = await self.page()
+        await page.goto(url, wait_until="domcontentloaded")
+        await page.fill("input[name=q]", value)
+        await page.click("#go")
+        return await page.inner_text("#out")
+
+    async def close(self):
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+
+
+async def pool_step(url: str, value: str) -> str:
+    await browser_navigate(url)
+    await browser_fill_form("input[name=q]", value)
+    await browser_click("#go")
+    return await browser_get_text("#out")
+
+
+async def _measure(label: str, tasks: int, steps: int, urls: list, step):
+    async def run_task(task_id: int):
+        set_current_task_id(task_id)
+        wrong = 0
+        for n in range(steps):
+            value = f"task {task_id} step {n}"
+            text = await step(urls[(task_id + n) % len(urls)], value)
+            wrong += value not in text
+        return wrong
+
+    start = time.perf_counter()
+    wrong = await asyncio.gather(*(run_task(t) for t in range(1, tasks + 1)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<5} {elapsed:6.2f}s  {steps / elapsed:6.1f} steps/s per task  wrong_reads={sum(wrong)}")
+
+
+async def main(tasks: int, steps: int, fixtures: str):
+    urls = _fixtures(fixtures, max(tasks, 4))
+
+    old = OldBrowser()
+    try:
+        await _measure("old", tasks, steps, urls, old.step)
+    except Exception as e:
+        print(f"Could not drive Chromium ({str(e).splitlines()[0]}); run `playwright install chromium` first.")
+        return
+    finally:
+        await old.close()
+
+    await _measure("cold", tasks, steps, urls, pool_step)
+    for task_id in range(1, tasks + 1):
+        await get_browser_pool().close(task_id)
+    await _measure("warm", tasks, steps, urls, pool_step)
+    print("pool stats:", get_browser_pool().stats)
+    await shutdown_browser_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=4)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--fixtures", default="", help="Directory of .html fixtures with an input[name=q] and #go button.")
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.steps, args.fixtures))
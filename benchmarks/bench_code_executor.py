@@ -0,0 +1,61 @@
+"""Snippet latency of execute_python_code: a new interpreter per call vs the warm sandbox pool.
+
+    python -m benchmarks.bench_code_executor --runs 20 --concurrency 4
+
+Runs each snippet `--runs` times sequentially, then a batch of
+`--concurrency` at once, and prints median / p95 latency for:
+  * subprocess - `python -c` per call (old behaviour)
+  * pool       - forked from warm workers with numpy and pandas preloaded
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.agents.tools.code_executor import execute_python_code, _run_in_subprocess
+from app.agents.tools.sandbox_pool import get_sandbox_pool, shutdown_sandbox_pool
+
+SNIPPETS = {
+    "print": "print(sum(range(1000)))",
+    "pandas": "import pandas as pd\ndf = pd.DataFrame({'a': range(1000), 'b': range(1000)})\nprint(df.describe().loc['mean'].to_dict())",
+    "numpy": "import numpy as np\nprint(float(np.linalg.norm(np.arange(10000.0))))",
+}
+
+
+def _summary(samples) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"median {statistics.median(ordered) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms"
+
+
+async def _time(call, code: str) -> float:
+    start = time.perf_counter()
+    result = await call(code, 30)
+    if not result.startswith("Output:"):
+        raise RuntimeError(f"Snippet failed: {result[:200]}")
+    return time.perf_counter() - start
+
+
+async def main(runs: int, concurrency: int):
+    start = time.perf_counter()
+    await get_sandbox_pool().warm()
+    print(f"pool warm-up: {time.perf_counter() - start:.2f}s\n")
+
+    for label, call in (("subprocess", _run_in_subprocess), ("pool", execute_python_code)):
+        for name, code in SNIPPETS.items():
+            samples = [await _time(call, code) for _ in range(runs)]
+            print(f"{label:<10} {name:<7} sequential  {_summary(samples)}")
+        start = time.perf_counter()
+        await asyncio.gather(*(_time(call, SNIPPETS["pandas"]) for _ in range(concurrency)))
+        print(f"{label:<10} pandas  {concurrency} at once  {(time.perf_counter() - start) * 1000:7.1f} ms wall\n")
+
+    print("pool stats:", get_sandbox_pool().stats)
+    await shutdown_sandbox_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.concurrency))
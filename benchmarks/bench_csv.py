@@ -0,0 +1,125 @@
+"""CSV tool cost on a large file: csv.DictReader into a list vs the streaming engine.
+
+    python -m benchmarks.bench_csv --rows 2000000
+
+Writes a CSV of `--rows` rows (or uses `--file`), then runs each operation in
+a fresh forked process and prints wall time and peak RSS growth for:
+  * old    - read_csv_file / analyze_csv_data as they were (whole file as dicts)
+  * engine - header/preview reads, byte-scan row count, chunked column stats
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from app.agents.tools import csv_engine
+
+
+def _write_csv(path: Path, rows: int):
+    rng = random.Random(0)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "customer", "amount", "country", "note"])
+        for i in range(rows):
+            writer.writerow([
+                i,
+                f"customer-{rng.randint(0, 200_000)}",
+                f"{rng.uniform(1, 5000):.2f}",
+                rng.choice(["US", "DE", "FR", "IN", "BR", "JP"]),
+                "" if rng.random() < 0.3 else f"note, with \"quotes\" {rng.randint(0, 99)}",
+            ])
+
+
+def _load_rows(path: Path) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def old_preview(path: Path):
+    rows = _load_rows(path)
+    return len(rows), json.dumps(rows[:20])
+
+
+def old_row_count(path: Path):
+    return len(_load_rows(path))
+
+
+def old_unique_values(path: Path):
+    rows = _load_rows(path)
+    return {col: len(set(r[col] for r in rows)) for col in rows[0].keys()}
+
+
+def engine_preview(path: Path):
+    _, preview = csv_engine.read_preview(path, 20)
+    return csv_engine.count_rows(path), json.dumps(preview)
+
+
+def engine_row_count(path: Path):
+    return csv_engine.count_rows(path)
+
+
+def engine_unique_values(path: Path):
+    _, stats = csv_engine.column_stats(path)
+    return {s["column"]: s["distinct"] for s in stats}
+
+
+OPERATIONS = {
+    "read_csv_file": (old_preview, engine_preview),
+    "row_count": (old_row_count, engine_row_count),
+    "unique_values": (old_unique_values, engine_unique_values),
+}
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _child(func, path: Path, queue):
+    before = _rss_bytes()
+    start = time.perf_counter()
+    result = func(path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    queue.put((elapsed, max(peak - before, 0), str(result)[:80]))
+
+
+def _measure(func, path: Path):
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(func, path, queue))
+    process.start()
+    outcome = queue.get()
+    process.join()
+    return outcome
+
+
+def main(rows: int, file: str):
+    import pandas  # noqa: F401 - imported before forking so neither side pays for it
+
+    path = Path(file) if file else Path(tempfile.mkdtemp(prefix="bench_csv_")) / "data.csv"
+    if not file:
+        start = time.perf_counter()
+        _write_csv(path, rows)
+        print(f"wrote {rows} rows in {time.perf_counter() - start:.1f}s")
+    print(f"file: {path} ({path.stat().st_size / 1e6:.0f} MB)\n")
+
+    for name, variants in OPERATIONS.items():
+        for label, func in zip(("old", "engine"), variants):
+            elapsed, peak, result = _measure(func, path)
+            print(f"{name:<14} {label:<7} {elapsed:7.2f}s  peak +{peak / 1e6:7.0f} MB  {result}")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--file", default="", help="Benchmark an existing CSV instead of a generated one.")
+    args = parser.parse_args()
+    main(args.rows, args.file)
@@ -0,0 +1,100 @@
+"""analyze_csv_data "query" vs the execute_python_code round-trip it replaces.
+
+    python -m benchmarks.bench_csv_query --rows 1000000 --runs 5
+
+Writes a CSV of `--rows` rows into a scratch task workspace, then answers the
+same questions (group-by, filtered top-n, filtered count, describe) three ways
+and prints the median latency and the size of the answer the LLM reads:
+  * query         - analyze_csv_data(operation="query"), dataset already cached
+  * python        - a pandas snippet that calls pandas.read_csv each time
+  * python+cache  - the same snippet on load_dataset (user-024)
+The first query call, which builds the dataset cache, is reported separately.
+Time spent waiting for the user's confirmation of execute_python_code is not
+included.
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import statistics
+import time
+
+from app.agents.tools._context import set_current_task_id
+from app.agents.tools.code_executor import execute_python_code
+from app.agents.tools.csv_handler import WORKSPACE_DIR, analyze_csv_data
+from app.agents.tools.dataset_cache import shutdown_dataset_cache
+from app.agents.tools.sandbox_pool import get_sandbox_pool, shutdown_sandbox_pool
+from benchmarks.bench_csv import _write_csv
+
+TASK_ID = 999_001
+QUESTIONS = {
+    "group-by": (
+        {"group_by": ["country"], "aggregate": {"amount": ["sum", "mean"], "*": "count"}, "sort": [["amount_sum", "desc"]]},
+        "g = df.groupby('country')['amount'].agg(['sum', 'mean', 'count']).sort_values('sum', ascending=False)\nprint(g)",
+    ),
+    "top-n": (
+        {"filter": [["country", "in", ["US", "DE"]]], "columns": ["id", "customer", "amount"], "sort": [["amount", "desc"]], "limit": 10},
+        "print(df[df['country'].isin(['US', 'DE'])].nlargest(10, 'amount')[['id', 'customer', 'amount']])",
+    ),
+    "filter-count": (
+        {"filter": [["note", "contains", "quotes 7"], ["amount", ">", 2500]], "aggregate": {"*": "count"}},
+        "print(((df['note'].str.contains('quotes 7', case=False, na=False)) & (df['amount'] > 2500)).sum())",
+    ),
+    "describe": (
+        {"describe": True, "columns": ["amount", "id"]},
+        "print(df[['amount', 'id']].describe())",
+    ),
+}
+LOADERS = {
+    "python": "import pandas as pd\ndf = pd.read_csv('{path}')\n",
+    "python+cache": "df = load_dataset('data.csv')\n",
+}
+
+
+async def _time(call) -> tuple:
+    start = time.perf_counter()
+    result = await call()
+    if result.startswith(("Error", "Failed", "Invalid")) or "Errors:" in result:
+        raise RuntimeError(result[:300])
+    return time.perf_counter() - start, len(result)
+
+
+async def _median(call, runs: int) -> str:
+    samples = [await _time(call) for _ in range(runs)]
+    return f"{statistics.median(s[0] for s in samples) * 1000:8.1f} ms  {samples[0][1]:6d} chars"
+
+
+async def main(rows: int, runs: int):
+    workspace = WORKSPACE_DIR / f"task_{TASK_ID}"
+    workspace.mkdir(parents=True, exist_ok=True)
+    path = workspace / "data.csv"
+    task_id = str(TASK_ID)
+    try:
+        _write_csv(path, rows)
+        print(f"file: {path} ({path.stat().st_size / 1e6:.0f} MB, {rows} rows)\n")
+        set_current_task_id(TASK_ID)
+        await get_sandbox_pool().warm()
+
+        first_query = json.dumps(next(iter(QUESTIONS.values()))[0])
+        elapsed, _ = await _time(lambda: analyze_csv_data(task_id, path.name, "query", first_query))
+        print(f"first query (parses into the dataset cache): {elapsed * 1000:.1f} ms\n")
+
+        for name, (query, snippet) in QUESTIONS.items():
+            text = json.dumps(query)
+            print(f"{name:<13} query         {await _median(lambda: analyze_csv_data(task_id, path.name, 'query', text), runs)}")
+            for label, loader in LOADERS.items():
+                code = loader.format(path=path.as_posix()) + snippet
+                print(f"{name:<13} {label:<13} {await _median(lambda: execute_python_code(code, 60), runs)}")
+            print()
+    finally:
+        await shutdown_sandbox_pool()
+        shutdown_dataset_cache()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.runs))
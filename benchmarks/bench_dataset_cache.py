@@ -0,0 +1,95 @@
+"""A typical Executor sequence on one large CSV, with and without the parsed-dataset cache.
+
+    python -m benchmarks.bench_dataset_cache --rows 5000000
+
+Writes a CSV of `--rows` rows into a scratch task workspace (or copies
+`--file` there), then runs, in order: read_csv_file, analyze_csv_data
+summary / unique_values / stats / row_count, and an execute_python_code
+group-by. Prints the time of each step (and any step that failed) for:
+  * no cache - every call parses the file again (csv_engine streaming path,
+               pandas.read_csv in the snippet)
+  * cache    - the first call parses into a memory-mapped Arrow file that
+               the later calls and the snippet (load_dataset) reuse
+"""
+import argparse
+import asyncio
+import shutil
+import time
+from pathlib import Path
+
+from app.agents.tools._context import set_current_task_id
+from app.agents.tools.code_executor import execute_python_code
+from app.agents.tools.csv_handler import WORKSPACE_DIR, analyze_csv_data, read_csv_file
+from app.agents.tools.dataset_cache import get_dataset_cache_stats, settings, shutdown_dataset_cache
+from app.agents.tools.sandbox_pool import get_sandbox_pool, shutdown_sandbox_pool
+from benchmarks.bench_csv import _write_csv
+
+TASK_ID = 999_000
+SNIPPETS = {
+    "no cache": "import pandas as pd\ndf = pd.read_csv('{path}')\nprint(df.groupby('country')['amount'].sum().round(2).to_dict())",
+    "cache": "df = load_dataset('data.csv')\nprint(df.groupby('country')['amount'].sum().round(2).to_dict())",
+}
+
+
+async def _step(name: str, call) -> float:
+    start = time.perf_counter()
+    result = await call
+    elapsed = time.perf_counter() - start
+    failed = result.startswith(("Error", "Failed")) or "Errors:" in result
+    # e.g. pandas.read_csv of a large file inside the sandbox memory limit
+    note = f"  FAILED: {result.strip().splitlines()[-1][:120]}" if failed else ""
+    print(f"  {name:<24} {elapsed:7.2f}s{note}")
+    return elapsed
+
+
+async def _sequence(label: str, path: Path) -> float:
+    print(label)
+    task_id = str(TASK_ID)
+    steps = [
+        ("read_csv_file", read_csv_file(task_id, path.name)),
+        ("analyze summary", analyze_csv_data(task_id, path.name, "summary")),
+        ("analyze unique_values", analyze_csv_data(task_id, path.name, "unique_values")),
+        ("analyze stats", analyze_csv_data(task_id, path.name, "stats")),
+        ("analyze row_count", analyze_csv_data(task_id, path.name, "row_count")),
+        ("execute_python_code", execute_python_code(SNIPPETS[label].format(path=path.as_posix()), 60)),
+    ]
+    total = 0.0
+    for name, call in steps:
+        total += await _step(name, call)
+    print(f"  {'total':<24} {total:7.2f}s\n")
+    return total
+
+
+async def main(rows: int, file: str):
+    workspace = WORKSPACE_DIR / f"task_{TASK_ID}"
+    workspace.mkdir(parents=True, exist_ok=True)
+    path = workspace / "data.csv"
+    try:
+        if file:
+            shutil.copy(file, path)
+        else:
+            start = time.perf_counter()
+            _write_csv(path, rows)
+            print(f"wrote {rows} rows in {time.perf_counter() - start:.1f}s")
+        print(f"file: {path} ({path.stat().st_size / 1e6:.0f} MB)\n")
+
+        set_current_task_id(TASK_ID)
+        await get_sandbox_pool().warm()
+        cache_dir = settings.dataset_cache_dir
+        settings.dataset_cache_dir = ""
+        await _sequence("no cache", path)
+        settings.dataset_cache_dir = cache_dir
+        await _sequence("cache", path)
+        print("cache stats:", get_dataset_cache_stats())
+    finally:
+        await shutdown_sandbox_pool()
+        shutdown_dataset_cache()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--file", default="", help="Benchmark a copy of an existing CSV instead of a generated one.")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.file))
@@ -0,0 +1,156 @@
+"""Peak memory and latency of read_webpage on large pages: full parse vs streaming extraction.
+
+    python -m benchmarks.bench_large_pages --size-mb 8 --runs 3
+
+A local server sends generated pages of `--size-mb`:
+  * article-first - the article comes first, followed by megabytes of comments and links
+  * no-main       - no main-content element at all, just a long page of text
+Each implementation runs in a fresh process so its peak RSS can be measured:
+  * tree       - the whole body is downloaded, parsed into a BeautifulSoup tree
+                 (lxml when installed), cleaned, then truncated (old behaviour)
+  * streaming  - read_webpage: the body is streamed through StreamingTextExtractor
+                 and the download stops once max_length characters are collected
+Prints the best latency over `--runs`, bytes the server got to send before the
+client closed the connection (including socket buffers) and the growth in peak RSS.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _page(kind: str, size: int) -> bytes:
+    rng = random.Random(7)
+    words = ["market", "agent", "growth", "model", "data", "report", "trend", "policy", "energy", "network"]
+
+    def paragraph():
+        return f"<p>{' '.join(rng.choice(words) for _ in range(80))}.</p>"
+
+    parts = ["<html><head><title>Large page</title></head><body><nav><a href='/'>Home</a></nav>"]
+    if kind == "article-first":
+        parts.append("<article><h1>Article</h1>" + "".join(paragraph() for _ in range(60)) + "</article>")
+        filler = lambda: f"<div class='comment'><a href='/u{rng.randint(0, 9999)}'>user</a>{paragraph()}</div>"  # noqa: E731
+    else:
+        filler = paragraph
+    total = sum(len(p) for p in parts)
+    while total < size:
+        chunk = "".join(filler() for _ in range(100))
+        parts.append(chunk)
+        total += len(chunk)
+    parts.append("</body></html>")
+    return "".join(parts).encode()
+
+
+def _serve(pages: dict):
+    sent = {"bytes": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = pages[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                for start in range(0, len(body), 64 * 1024):
+                    self.wfile.write(body[start:start + 64 * 1024])
+                    sent["bytes"] += min(64 * 1024, len(body) - start)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client stopped reading
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, sent
+
+
+def _child(impl: str, url: str, max_length: int):
+    """Runs in a subprocess: read the page once and report latency and RSS growth as JSON."""
+    import asyncio
+    import resource
+
+    os.environ["PAGE_CACHE_PATH"] = ""
+    os.environ["PAGE_EXTRACT_WORKERS"] = "0"
+    import httpx
+    from bs4 import BeautifulSoup
+    from app.agents.tools.web_reader import read_webpage
+
+    try:
+        import lxml  # noqa: F401
+        parser = "lxml"
+    except ImportError:
+        parser = "html.parser"
+
+    async def tree(url: str) -> str:
+        async with httpx.AsyncClient(timeout=60) as client:
+            response = await client.get(url)
+        soup = BeautifulSoup(response.text, parser)
+        for tag in soup(["script", "style", "nav", "footer", "header", "aside",
+                         "form", "iframe", "noscript", "svg", "img", "button"]):
+            tag.decompose()
+        main_content = None
+        for selector in ["article", "main", "[role='main']", ".article-body",
+                         ".post-content", ".entry-content", "#content", ".content"]:
+            main_content = soup.select_one(selector)
+            if main_content:
+                break
+        text = (main_content or soup).get_text(separator="\n", strip=True)
+        text = "\n".join(line.strip() for line in text.split("\n") if line.strip())
+        return text[:max_length]
+
+    read = tree if impl == "tree" else (lambda url: read_webpage(url, max_length))
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    text = asyncio.run(read(url))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "rss_growth_mb": (peak - baseline) / 1024, "chars": len(text)}))
+
+
+def main(size_mb: float, runs: int, max_length: int):
+    size = int(size_mb * 1024 * 1024)
+    pages = {f"/{kind}": _page(kind, size) for kind in ("article-first", "no-main")}
+    server, sent = _serve(pages)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"pages of {size_mb} MB, max_length={max_length}\n")
+    print(f"{'page':<14} {'impl':<10} {'latency':>8} {'sent':>9} {'peak RSS +':>11}")
+
+    for kind in pages:
+        for impl in ("tree", "streaming"):
+            results = []
+            for _ in range(runs):
+                sent["bytes"] = 0
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_large_pages", "--child", impl, base + "/" + kind,
+                     "--max-length", str(max_length)],
+                    capture_output=True, text=True, check=True,
+                )
+                time.sleep(0.05)  # Let the server notice a closed connection
+                results.append({**json.loads(output.stdout.strip().splitlines()[-1]), "bytes": sent["bytes"]})
+            best = min(results, key=lambda r: r["seconds"])
+            rss = min(r["rss_growth_mb"] for r in results)
+            print(f"{kind:<14} {impl:<10} {best['seconds']:7.2f}s {best['bytes'] / 1e6:7.1f}MB {rss:9.1f}MB")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=8)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-length", type=int, default=8000)
+    parser.add_argument("--child", nargs=2, metavar=("IMPL", "URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child[0], args.child[1], args.max_length)
+    else:
+        main(args.size_mb, args.runs, args.max_length)
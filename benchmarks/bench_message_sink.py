@@ -0,0 +1,69 @@
+"""Compare per-message commits with the batched MessageSink.
+
+    python -m benchmarks.bench_message_sink --messages 2000 --tasks 4
+
+Runs against a throwaway SQLite database and prints messages/sec for:
+  * create_agent_message (commit + refresh per message, the old path)
+  * MessageSink (bulk INSERT per batch)
+Both are run with several tasks writing concurrently, as in production.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_sink_")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp_dir}/bench.db"
+
+from app.db.database import AsyncSessionLocal, init_db  # noqa: E402
+from app.db.crud import create_user, create_task, create_agent_message  # noqa: E402
+from app.db.message_sink import MessageSink  # noqa: E402
+
+PAYLOAD = "Executor output line. " * 20
+
+
+async def _setup(task_count: int):
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        user = await create_user(db, "bench@example.com", "bench", "x")
+        tasks = [await create_task(db, user.id, f"Benchmark task {i}") for i in range(task_count * 2)]
+    return [t.id for t in tasks]
+
+
+async def _per_message(task_id: int, count: int):
+    async with AsyncSessionLocal() as db:
+        for i in range(count):
+            await create_agent_message(db, task_id, "Executor", f"{i} {PAYLOAD}")
+
+
+async def _sink(task_id: int, count: int):
+    sink = MessageSink(task_id)
+    for i in range(count):
+        await sink.add("Executor", f"{i} {PAYLOAD}")
+    await sink.close()
+
+
+async def _measure(label: str, writer, task_ids, per_task: int):
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(tid, per_task) for tid in task_ids))
+    elapsed = time.perf_counter() - start
+    total = per_task * len(task_ids)
+    print(f"{label:<22} {total:>7} msgs  {elapsed:7.3f}s  {total / elapsed:10.1f} msgs/sec")
+    return total / elapsed
+
+
+async def main(messages: int, tasks: int):
+    task_ids = await _setup(tasks)
+    per_task = max(1, messages // tasks)
+    baseline = await _measure("create_agent_message", _per_message, task_ids[:tasks], per_task)
+    batched = await _measure("MessageSink", _sink, task_ids[tasks:], per_task)
+    print(f"speedup: {batched / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.tasks))
@@ -0,0 +1,97 @@
+"""Compare a fresh OpenAI client per task with the shared, pooled model client.
+
+    python -m benchmarks.bench_model_client --tasks 8 --waves 3 --calls 10 --rate-limit-every 25
+
+Starts benchmarks.fake_openai_server in-process and runs `--waves` rounds of
+`--tasks` concurrent "tasks" that each make `--calls` sequential completions, first with one
+OpenAIChatCompletionClient per task (the old orchestrator behaviour), then through
+app.agents.model_client. Prints wall time, connections opened, 429s seen, and
+failed calls. Every `--rate-limit-every`-th request is answered with a 429.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+PORT = 8765
+os.environ.setdefault("OPENAI_API_KEY", "sk-local-benchmark")
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{PORT}/v1"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from autogen_core.models import UserMessage  # noqa: E402
+from autogen_ext.models.openai import OpenAIChatCompletionClient  # noqa: E402
+
+from app.agents.model_client import get_model_client, get_model_client_stats, shutdown_model_clients  # noqa: E402
+from benchmarks.fake_openai_server import create_app  # noqa: E402
+
+
+async def _fresh_client_task(task_no: int, calls: int) -> int:
+    client = OpenAIChatCompletionClient(
+        model="gpt-4o-mini", api_key="sk-local-benchmark", base_url=os.environ["OPENAI_BASE_URL"],
+    )
+    failures = 0
+    try:
+        for i in range(calls):
+            try:
+                await client.create([UserMessage(content=f"task {task_no} step {i}", source="user")])
+            except Exception:
+                failures += 1
+    finally:
+        await client.close()
+    return failures
+
+
+async def _shared_client_task(task_no: int, calls: int) -> int:
+    client = get_model_client("scheduled" if task_no % 2 else "interactive")
+    failures = 0
+    for i in range(calls):
+        try:
+            await client.create([UserMessage(content=f"task {task_no} step {i}", source="user")])
+        except Exception:
+            failures += 1
+    return failures
+
+
+async def _measure(label: str, runner, tasks: int, waves: int, calls: int):
+    async with httpx.AsyncClient() as http:
+        await http.post(f"http://127.0.0.1:{PORT}/reset")
+        start = time.perf_counter()
+        failures = 0
+        for wave in range(waves):
+            failures += sum(await asyncio.gather(*(runner(wave * tasks + t, calls) for t in range(tasks))))
+        elapsed = time.perf_counter() - start
+        stats = (await http.get(f"http://127.0.0.1:{PORT}/stats")).json()
+    print(
+        f"{label:<16} {elapsed:7.2f}s  connections={stats['connections']:<4} "
+        f"requests={stats['requests']:<5} 429s={stats['rate_limited']:<4} failed_calls={failures}"
+    )
+
+
+async def main(tasks: int, waves: int, calls: int, latency: float, rate_limit_every: int):
+    config = uvicorn.Config(
+        create_app(latency, rate_limit_every, retry_after=0.5), host="127.0.0.1", port=PORT, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        await _measure("fresh per task", _fresh_client_task, tasks, waves, calls)
+        await _measure("shared client", _shared_client_task, tasks, waves, calls)
+        print(get_model_client_stats())
+    finally:
+        await shutdown_model_clients()
+        server.should_exit = True
+        await serve
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=8)
+    parser.add_argument("--waves", type=int, default=3)
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--rate-limit-every", type=int, default=25)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.waves, args.calls, args.latency, args.rate_limit_every))
@@ -0,0 +1,78 @@
+"""Show that task status/result updates no longer scale with message history.
+
+    python -m benchmarks.bench_task_updates --history 0 100 1000 5000
+
+For tasks with increasing numbers of AgentMessage rows, times:
+  * the old update path (get_task with selectinload of messages + files,
+    set one column, commit, refresh)
+  * update_task_status (single UPDATE ... WHERE id = ?)
+  * update_task_objective (UPDATE ... RETURNING)
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_updates_")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp_dir}/bench.db"
+
+from app.db.database import AsyncSessionLocal, init_db  # noqa: E402
+from app.db.crud import (  # noqa: E402
+    create_user, create_task, get_task, bulk_create_agent_messages,
+    update_task_status, update_task_objective,
+)
+from app.db.models import TaskStatus  # noqa: E402
+
+PAYLOAD = "Tool output " * 200
+
+
+async def _legacy_update_status(db, task_id: int, status: TaskStatus):
+    task = await get_task(db, task_id)
+    if task:
+        task.status = status
+        await db.commit()
+        await db.refresh(task)
+    return task
+
+
+async def _time(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        await fn(i)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+async def main(histories, iterations: int):
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        user = await create_user(db, "bench@example.com", "bench", "x")
+
+    statuses = [TaskStatus.PLANNING, TaskStatus.EXECUTING]
+    print(f"{'messages':>9} {'legacy ms':>10} {'UPDATE ms':>10} {'RETURNING ms':>13}")
+    for history in histories:
+        async with AsyncSessionLocal() as db:
+            task = await create_task(db, user.id, f"Benchmark task with {history} messages")
+            rows = [
+                {"task_id": task.id, "agent_name": "Executor", "content": PAYLOAD, "timestamp": datetime.utcnow()}
+                for _ in range(history)
+            ]
+            await bulk_create_agent_messages(db, rows)
+            task_id = task.id
+
+        async with AsyncSessionLocal() as db:
+            legacy = await _time(lambda i: _legacy_update_status(db, task_id, statuses[i % 2]), iterations)
+        async with AsyncSessionLocal() as db:
+            single = await _time(lambda i: update_task_status(db, task_id, statuses[i % 2]), iterations)
+        async with AsyncSessionLocal() as db:
+            returning = await _time(lambda i: update_task_objective(db, task_id, f"Renamed benchmark task {i}"), iterations)
+        print(f"{history:>9} {legacy:>10.2f} {single:>10.2f} {returning:>13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 100, 1000, 5000])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.history, args.iterations))
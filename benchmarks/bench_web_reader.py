@@ -0,0 +1,199 @@
+"""Compare the old per-call read_webpage with the pooled, cached page fetcher.
+
+    python -m benchmarks.bench_web_reader --corpus saved_pages/ --tasks 8 --latency 0.05
+
+Pages come from `--corpus` (a directory of saved .html files) or, without it,
+`--pages` generated article pages. They are served by a local HTTP server that
+sends ETag / Last-Modified, answers conditional requests with 304, and waits
+`--latency` seconds before each response. `--tasks` concurrent tasks each read
+every page (in a different order). Prints wall time, bytes sent by the server
+and the worst event-loop stall seen by a 10 ms heartbeat for:
+  * old         - a new client per call and html.parser on the event loop (old behaviour)
+  * cold        - read_webpage with an empty page cache (pooled client, streaming extraction)
+  * revalidate  - cache entries expired, so every page is revalidated (304s)
+  * fresh       - pages served straight from the cache
+  * parallel    - one read_webpages call per task for all pages, empty cache
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+_cache_dir = tempfile.mkdtemp(prefix="bench_pages_")
+os.environ["PAGE_CACHE_PATH"] = os.path.join(_cache_dir, "pages.sqlite3")
+
+import httpx  # noqa: E402
+from bs4 import BeautifulSoup  # noqa: E402
+
+from app.config import get_settings  # noqa: E402
+from app.agents.tools.web_reader import read_webpage, read_webpages  # noqa: E402
+from app.agents.tools.page_fetcher import get_page_fetcher, shutdown_page_fetcher  # noqa: E402
+
+
+def _synthetic_page(i: int) -> bytes:
+    rng = random.Random(i)
+    words = ["market", "agent", "growth", "model", "data", "report", "trend", "policy", "energy", "network"]
+    paragraphs = "".join(
+        f"<p>{' '.join(rng.choice(words) for _ in range(rng.randint(40, 120)))}.</p>" for _ in range(rng.randint(40, 120))
+    )
+    nav = "".join(f'<li><a href="/p{j}">Section {j}</a></li>' for j in range(200))
+    script = "<script>" + "var x = 1;" * 3000 + "</script>"
+    return (
+        f"<html><head><title>Page {i}</title>{script}<style>body{{margin:0}}</style></head><body>"
+        f"<header><nav><ul>{nav}</ul></nav></header>"
+        f"<div class='layout'><aside>{nav}</aside><article><h1>Article {i}</h1>{paragraphs}</article></div>"
+        f"<footer>{nav}</footer></body></html>"
+    ).encode()
+
+
+def _load_corpus(corpus: str, pages: int) -> dict:
+    if corpus:
+        files = sorted(Path(corpus).glob("*.htm*"))
+        if not files:
+            raise SystemExit(f"No .html files in {corpus}")
+        return {f"/{i}.html": f.read_bytes() for i, f in enumerate(files)}
+    return {f"/{i}.html": _synthetic_page(i) for i in range(pages)}
+
+
+def _serve(pages: dict, latency: float):
+    counters = {"requests": 0, "not_modified": 0, "bytes": 0}
+    lock = threading.Lock()
+    last_modified = formatdate(time.time() - 86400, usegmt=True)
+    etags = {path: '"' + hashlib.md5(body).hexdigest() + '"' for path, body in pages.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = pages.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            with lock:
+                counters["requests"] += 1
+            if self.headers.get("If-None-Match") == etags[self.path]:
+                with lock:
+                    counters["not_modified"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etags[self.path])
+                self.end_headers()
+                return
+            with lock:
+                counters["bytes"] += len(body)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etags[self.path])
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+
+async def old_read_webpage(url: str, max_length: int = 8000) -> str:
+    """read_webpage as it was: a client per call and html.parser on the event loop."""
+    async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+        response = await client.get(url)
+        response.raise_for_status()
+    soup = BeautifulSoup(response.text, "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside",
+                     "form", "iframe", "noscript", "svg", "img", "button"]):
+        tag.decompose()
+    main_content = None
+    for selector in ["article", "main", "[role='main']", ".article-body",
+                     ".post-content", ".entry-content", "#content", ".content"]:
+        main_content = soup.select_one(selector)
+        if main_content:
+            break
+    text = (main_content or soup).get_text(separator="\n", strip=True)
+    text = "\n".join(line.strip() for line in text.split("\n") if line.strip())
+    return f"Content from {url}:\n\n{text[:max_length]}"
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def _measure(label: str, counters: dict, plans, run_task):
+    for key in counters:
+        counters[key] = 0
+    lags: list = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(stop, lags))
+    start = time.perf_counter()
+    outputs = await asyncio.gather(*(run_task(urls) for urls in plans))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    failures = sum("Content from" not in out for outs in outputs for out in outs)
+    print(
+        f"{label:<11} {elapsed:6.2f}s  requests={counters['requests']:<4} 304s={counters['not_modified']:<4} "
+        f"sent={counters['bytes'] / 1e6:6.1f} MB  max_loop_stall={max(lags, default=0) * 1000:7.1f} ms"
+        + (f"  failures={failures}" if failures else "")
+    )
+
+
+async def main(corpus: str, pages: int, tasks: int, latency: float):
+    corpus_pages = _load_corpus(corpus, pages)
+    server, counters = _serve(corpus_pages, latency)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [base + path for path in corpus_pages]
+    size = sum(len(b) for b in corpus_pages.values())
+    print(f"{len(urls)} pages, {size / 1e6:.1f} MB, {tasks} tasks\n")
+
+    rng = random.Random(1)
+    plans = [rng.sample(urls, len(urls)) for _ in range(tasks)]
+
+    def sequential(read):
+        async def run_task(task_urls):
+            return [await read(url) for url in task_urls]
+        return run_task
+
+    settings = get_settings()
+    await _measure("old", counters, plans, sequential(old_read_webpage))
+    await _measure("cold", counters, plans, sequential(read_webpage))
+    settings.page_cache_fresh_seconds = 0
+    await _measure("revalidate", counters, plans, sequential(read_webpage))
+    settings.page_cache_fresh_seconds = 3600
+    await _measure("fresh", counters, plans, sequential(read_webpage))
+    print("fetcher stats:", get_page_fetcher().stats)
+    await shutdown_page_fetcher()
+
+    os.remove(settings.page_cache_path)
+
+    async def parallel(task_urls):
+        return (await read_webpages(",".join(task_urls))).split("\n\n---\n\n")
+
+    await _measure("parallel", counters, plans, parallel)
+    await shutdown_page_fetcher()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="", help="Directory of saved .html files (default: generated pages).")
+    parser.add_argument("--pages", type=int, default=10, help="Generated pages when no --corpus is given.")
+    parser.add_argument("--tasks", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="Server delay per response, in seconds.")
+    args = parser.parse_args()
+    asyncio.run(main(args.corpus, args.pages, args.tasks, args.latency))
@@ -0,0 +1,104 @@
+"""Compare the old per-call DDGS search with the shared search service, using a stub backend.
+
+    python -m benchmarks.bench_web_search --tasks 8 --queries 5 --latency 0.3
+
+`--tasks` concurrent "tasks" each run `--queries` searches drawn from a small
+pool of queries, so tasks overlap as real research runs do. The stub sleeps
+`--latency` seconds per call (blocking, like DDGS). Prints wall time, backend
+calls, and the worst event-loop stall seen by a 10 ms heartbeat for:
+  * direct   - the backend called on the event loop, once per search (old behaviour)
+  * cold     - the service with an empty cache (thread pool + de-duplication)
+  * warm     - the same searches again, served from cache
+  * restart  - a new service over the same cache file (disk hits only)
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+_cache_dir = tempfile.mkdtemp(prefix="bench_search_")
+os.environ["SEARCH_CACHE_PATH"] = os.path.join(_cache_dir, "search.sqlite3")
+
+from app.agents.tools.search_service import (  # noqa: E402
+    SearchBackend, set_search_backend, get_search_service, shutdown_search_service,
+)
+
+
+class StubBackend(SearchBackend):
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def _results(self, query: str, max_results: int):
+        self.calls += 1
+        time.sleep(self.latency)
+        return [
+            {"title": f"{query} #{i}", "href": f"https://example.com/{i}", "body": "stub"}
+            for i in range(max_results)
+        ]
+
+    text = _results
+    news = _results
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def _measure(label: str, backend: StubBackend, plans, search):
+    backend.calls = 0
+    lags: list = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(stop, lags))
+    start = time.perf_counter()
+
+    async def run_task(queries):
+        for kind, query in queries:
+            await search(kind, query)
+
+    await asyncio.gather(*(run_task(q) for q in plans))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    print(f"{label:<8} {elapsed:6.2f}s  backend_calls={backend.calls:<4} max_loop_stall={max(lags, default=0) * 1000:7.1f} ms")
+
+
+async def main(tasks: int, queries: int, latency: float, pool: int):
+    random.seed(1)
+    topics = [f"topic {i}" for i in range(pool)]
+    plans = [
+        [(random.choice(["text", "news"]), random.choice(topics).upper() if random.random() < 0.3 else random.choice(topics))
+         for _ in range(queries)]
+        for _ in range(tasks)
+    ]
+    backend = StubBackend(latency)
+
+    async def direct(kind, query):
+        # What web_search did before: a blocking call on the event loop
+        return (backend.news if kind == "news" else backend.text)(query, 5)
+
+    await _measure("direct", backend, plans, direct)
+
+    set_search_backend(backend)
+    service = lambda kind, query: get_search_service().search(kind, query, 5)  # noqa: E731
+    await _measure("cold", backend, plans, service)
+    await _measure("warm", backend, plans, service)
+    print("service stats:", get_search_service().stats)
+    shutdown_search_service()
+    await _measure("restart", backend, plans, service)
+    shutdown_search_service()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--pool", type=int, default=10, help="Distinct queries the tasks draw from.")
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.queries, args.latency, args.pool))
@@ -0,0 +1,85 @@
+"""Minimal OpenAI-compatible chat completions server for local benchmarks.
+
+    python -m benchmarks.fake_openai_server --port 8765 --latency 0.2 --rate-limit-every 20
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1. Replies echo
+the last user message, report token usage, and can inject 429s (with
+Retry-After) every N requests. GET /stats shows request, 429 and connection
+counts.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(latency: float = 0.2, rate_limit_every: int = 0, retry_after: float = 1.0) -> FastAPI:
+    app = FastAPI()
+    state = {"requests": 0, "rate_limited": 0, "connections": set()}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        state["requests"] += 1
+        state["connections"].add(f"{request.client.host}:{request.client.port}")
+        if rate_limit_every and state["requests"] % rate_limit_every == 0:
+            state["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": str(retry_after)},
+                content={"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+            )
+
+        await asyncio.sleep(latency)
+        messages = body.get("messages", [])
+        prompt = str(messages[-1].get("content", "")) if messages else ""
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4 + 1
+        reply = f"Acknowledged: {prompt[:200]}"
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(reply) // 4 + 1,
+                "total_tokens": prompt_tokens + len(reply) // 4 + 1,
+            },
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "requests": state["requests"],
+            "rate_limited": state["rate_limited"],
+            "connections": len(state["connections"]),
+        }
+
+    @app.post("/reset")
+    async def reset():
+        state["requests"] = 0
+        state["rate_limited"] = 0
+        state["connections"].clear()
+        return {"ok": True}
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency, args.rate_limit_every, args.retry_after), host="127.0.0.1", port=args.port)
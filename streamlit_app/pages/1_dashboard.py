@@ -6,15 +6,20 @@ from streamlit_autorefresh import st_autorefresh
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+import time
 from datetime import datetime, timedelta
 
 from streamlit_app.utils import (
     init_session_state, is_authenticated,
-    sync_get_task, sync_get_tasks, sync_create_task,
+    sync_get_tasks, sync_create_task,
     sync_rename_task, sync_rerun_task, sync_continue_task
 )
+from streamlit_app.utils.task_stream import (
+    sync_get_live_task, sync_get_live_interaction, get_live_messages,
+    clear_live_interaction, reset_live_task
+)
 from streamlit_app.utils.api_client import (
-    sync_get_pending_interaction, sync_respond_to_interaction,
+    sync_respond_to_interaction,
     sync_cancel_schedule, sync_upload_file
 )
 from streamlit_app.components import render_login_form, render_register_form, render_sidebar
@@ -714,6 +719,19 @@ def render_agent_messages(messages):
         """, unsafe_allow_html=True)
 
 
+RECENT_TASKS_TTL_SECONDS = 30
+
+
+def get_recent_tasks():
+    """Recent tasks list, refreshed at most every RECENT_TASKS_TTL_SECONDS."""
+    cached = st.session_state.get("recent_tasks_cache")
+    if cached and time.monotonic() - cached["fetched_at"] < RECENT_TASKS_TTL_SECONDS:
+        return cached["result"]
+    result = sync_get_tasks(limit=5)
+    st.session_state.recent_tasks_cache = {"result": result, "fetched_at": time.monotonic()}
+    return result
+
+
 def render_dashboard():
     """Render the main dashboard."""
     # Header
@@ -784,6 +802,7 @@ def render_dashboard():
                         task_id = result["data"]["id"]
                         st.session_state.current_task_id = task_id
                         st.session_state.selected_sample = ""
+                        st.session_state.pop("recent_tasks_cache", None)
 
                         # Upload file if attached
                         if uploaded_file is not None:
@@ -838,7 +857,7 @@ def render_dashboard():
             </div>
         """, unsafe_allow_html=True)
 
-        result = sync_get_tasks(limit=5)
+        result = get_recent_tasks()
         if result["success"] and result["data"]:
             for task in result["data"]:
                 status_colors = {
@@ -879,13 +898,18 @@ def render_dashboard():
     with col2:
         if st.session_state.get("current_task_id"):
             task_id = st.session_state.current_task_id
-            result = sync_get_task(task_id)
+            # Kept current from the task's WebSocket stream; REST is only hit on
+            # phase changes, or on every rerun while the stream is disconnected
+            result = sync_get_live_task(task_id)
 
             if result["success"]:
                 task = result["data"]
 
-                # Auto-refresh for active tasks
-                if task["status"] in ["planning", "executing", "reviewing", "pending", "scheduled"]:
+                # Auto-refresh for active tasks. While streaming, reruns only read
+                # local state; otherwise fall back to polling the API.
+                if result.get("connected") and task["status"] not in ["completed", "failed"]:
+                    st_autorefresh(interval=1500, limit=None, key="stream_autorefresh")
+                elif task["status"] in ["planning", "executing", "reviewing", "pending", "scheduled"]:
                     st_autorefresh(interval=5000, limit=None, key="task_autorefresh")
                 elif task["status"] == "awaiting_input":
                     st_autorefresh(interval=2000, limit=None, key="input_autorefresh")
@@ -950,10 +974,9 @@ def render_dashboard():
 
                 elif task["status"] == "awaiting_input":
                     st.warning("🔔 **Action requires your input!**")
-                    interaction_result = sync_get_pending_interaction(task_id)
+                    interaction = sync_get_live_interaction(task_id)
 
-                    if interaction_result["success"] and interaction_result["data"].get("pending"):
-                        interaction = interaction_result["data"]
+                    if interaction:
 
                         if interaction["interaction_type"] == "confirmation":
                             # Confirmation Dialog
@@ -965,25 +988,56 @@ def render_dashboard():
                                 </div>
                             """, unsafe_allow_html=True)
 
-                            st.markdown(f"**Tool:** `{interaction['tool_name']}`")
-                            st.markdown(f"**Action:** {interaction['prompt_message']}")
-
-                            if interaction.get("preview"):
-                                preview = interaction["preview"]
-                                if isinstance(preview, dict) and "parameters" in preview:
-                                    with st.expander("View Parameters", expanded=True):
-                                        for key, val in preview["parameters"].items():
+                            preview = interaction.get("preview") or {}
+                            batch_items = preview.get("items") if isinstance(preview, dict) else None
+
+                            if batch_items:
+                                # Several tool calls from one agent turn: approve or deny each
+                                st.markdown(f"**The agent wants to run {len(batch_items)} actions:**")
+                                decisions = []
+                                for i, item in enumerate(batch_items):
+                                    decisions.append(st.checkbox(
+                                        f"`{item['tool']}`",
+                                        value=True,
+                                        key=f"batch_{interaction['request_id']}_{i}",
+                                    ))
+                                    with st.expander("View Parameters", expanded=False):
+                                        for key, val in (item.get("parameters") or {}).items():
                                             st.markdown(f"- **{key}:** {val}")
 
-                            conf_col1, conf_col2 = st.columns(2)
-                            with conf_col1:
-                                if st.button("Approve", type="primary", use_container_width=True, key="approve_action"):
-                                    sync_respond_to_interaction(interaction["request_id"], {"confirmed": True})
-                                    st.rerun()
-                            with conf_col2:
-                                if st.button("Deny", use_container_width=True, key="deny_action"):
-                                    sync_respond_to_interaction(interaction["request_id"], {"confirmed": False, "cancelled": True})
-                                    st.rerun()
+                                conf_col1, conf_col2 = st.columns(2)
+                                with conf_col1:
+                                    if st.button("Submit Decisions", type="primary", use_container_width=True, key="approve_batch"):
+                                        sync_respond_to_interaction(interaction["request_id"], {"decisions": decisions})
+                                        clear_live_interaction(task_id)
+                                        st.rerun()
+                                with conf_col2:
+                                    if st.button("Deny All", use_container_width=True, key="deny_batch"):
+                                        sync_respond_to_interaction(interaction["request_id"], {"confirmed": False, "cancelled": True})
+                                        clear_live_interaction(task_id)
+                                        st.rerun()
+                            else:
+                                st.markdown(f"**Tool:** `{interaction['tool_name']}`")
+                                st.markdown(f"**Action:** {interaction['prompt_message']}")
+
+                                if interaction.get("preview"):
+                                    preview = interaction["preview"]
+                                    if isinstance(preview, dict) and "parameters" in preview:
+                                        with st.expander("View Parameters", expanded=True):
+                                            for key, val in preview["parameters"].items():
+                                                st.markdown(f"- **{key}:** {val}")
+
+                                conf_col1, conf_col2 = st.columns(2)
+                                with conf_col1:
+                                    if st.button("Approve", type="primary", use_container_width=True, key="approve_action"):
+                                        sync_respond_to_interaction(interaction["request_id"], {"confirmed": True})
+                                        clear_live_interaction(task_id)
+                                        st.rerun()
+                                with conf_col2:
+                                    if st.button("Deny", use_container_width=True, key="deny_action"):
+                                        sync_respond_to_interaction(interaction["request_id"], {"confirmed": False, "cancelled": True})
+                                        clear_live_interaction(task_id)
+                                        st.rerun()
 
                             st.markdown("</div>", unsafe_allow_html=True)
 
@@ -1022,9 +1076,11 @@ def render_dashboard():
 
                                 if submitted and guidance_text:
                                     sync_respond_to_interaction(interaction["request_id"], {"values": {"guidance": guidance_text}})
+                                    clear_live_interaction(task_id)
                                     st.rerun()
                                 elif stop_btn:
                                     sync_respond_to_interaction(interaction["request_id"], {"cancelled": True})
+                                    clear_live_interaction(task_id)
                                     st.rerun()
 
                             st.markdown("</div>", unsafe_allow_html=True)
@@ -1066,9 +1122,11 @@ def render_dashboard():
 
                                 if submitted:
                                     sync_respond_to_interaction(interaction["request_id"], {"values": values})
+                                    clear_live_interaction(task_id)
                                     st.rerun()
                                 elif cancelled:
                                     sync_respond_to_interaction(interaction["request_id"], {"cancelled": True})
+                                    clear_live_interaction(task_id)
                                     st.rerun()
 
                             st.markdown("</div>", unsafe_allow_html=True)
@@ -1144,6 +1202,8 @@ def render_dashboard():
                             if st.button("✅ Confirm Re-run", use_container_width=True, key="confirm_rerun", type="primary"):
                                 result = sync_rerun_task(task["id"])
                                 if result["success"]:
+                                    # Old messages are deleted on re-run; drop the local copy too
+                                    reset_live_task()
                                     st.success("Task is being re-run!")
                                     st.session_state.show_rerun_confirm = False
                                     st.rerun()
@@ -1225,9 +1285,13 @@ def render_dashboard():
 
                 elif task["status"] == "failed":
                     st.error("❌ Task failed to complete")
-                    if task.get("messages"):
+                    if task.get("message_count"):
                         with st.expander("💬 View Details", expanded=True):
-                            render_agent_messages(task["messages"])
+                            render_agent_messages(get_live_messages(task_id))
+
+                if task["status"] in ["planning", "executing", "reviewing", "awaiting_input"]:
+                    with st.expander("💬 Live Agent Activity", expanded=False):
+                        render_agent_messages(get_live_messages(task_id)[-20:])
             else:
                 st.error("Failed to load task details")
         else:
@@ -2,7 +2,8 @@ from .api_client import (
     get_api_client, sync_register, sync_login, sync_logout,
     sync_get_me, sync_create_task, sync_get_tasks, sync_get_task,
     sync_update_profile, sync_change_password, sync_update_photo,
-    sync_rename_task, sync_rerun_task, sync_continue_task
+    sync_rename_task, sync_rerun_task, sync_continue_task,
+    sync_get_task_header, sync_get_task_messages, sync_get_new_messages
 )
 from .session import (
     init_session_state, is_authenticated, set_authenticated,
@@ -14,6 +15,7 @@ __all__ = [
     "sync_get_me", "sync_create_task", "sync_get_tasks", "sync_get_task",
     "sync_update_profile", "sync_change_password", "sync_update_photo",
     "sync_rename_task", "sync_rerun_task", "sync_continue_task",
+    "sync_get_task_header", "sync_get_task_messages", "sync_get_new_messages",
     "init_session_state", "is_authenticated", "set_authenticated",
     "clear_authentication", "get_current_user", "get_token"
 ]
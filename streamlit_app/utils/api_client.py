@@ -119,6 +119,27 @@ class APIClient:
                 return {"success": True, "data": response.json()}
             return {"success": False, "error": _safe_json_error(response, "Failed to fetch task")}
 
+    async def get_task_header(self, task_id: int) -> Dict[str, Any]:
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.get(
+                f"{self.base_url}/tasks/{task_id}/header",
+                headers=self._get_headers(),
+            )
+            if response.status_code == 200:
+                return {"success": True, "data": response.json()}
+            return {"success": False, "error": _safe_json_error(response, "Failed to fetch task")}
+
+    async def get_task_messages(self, task_id: int, after_id: int = 0, limit: int = 100) -> Dict[str, Any]:
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.get(
+                f"{self.base_url}/tasks/{task_id}/messages",
+                params={"after_id": after_id, "limit": limit},
+                headers=self._get_headers(),
+            )
+            if response.status_code == 200:
+                return {"success": True, "data": response.json()}
+            return {"success": False, "error": _safe_json_error(response, "Failed to fetch messages")}
+
     async def rename_task(self, task_id: int, objective: str) -> Dict[str, Any]:
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.put(
@@ -323,6 +344,41 @@ def sync_get_task(task_id: int) -> Dict[str, Any]:
     return asyncio.run(client.get_task(task_id))
 
 
+def sync_get_task_header(task_id: int) -> Dict[str, Any]:
+    import asyncio
+    client = get_api_client()
+    if "token" in st.session_state:
+        client.set_token(st.session_state.token)
+    return asyncio.run(client.get_task_header(task_id))
+
+
+def sync_get_task_messages(task_id: int, after_id: int = 0, limit: int = 100) -> Dict[str, Any]:
+    import asyncio
+    client = get_api_client()
+    if "token" in st.session_state:
+        client.set_token(st.session_state.token)
+    return asyncio.run(client.get_task_messages(task_id, after_id, limit))
+
+
+def sync_get_new_messages(task_id: int) -> List[Dict[str, Any]]:
+    """Return the cached messages for a task, fetching only ones newer than the last seen id."""
+    cache = st.session_state.get("message_cache")
+    if not cache or cache.get("task_id") != task_id:
+        cache = {"task_id": task_id, "last_id": 0, "messages": []}
+        st.session_state.message_cache = cache
+
+    while True:
+        result = sync_get_task_messages(task_id, after_id=cache["last_id"], limit=200)
+        if not result["success"]:
+            break
+        page = result["data"]
+        cache["messages"].extend(page["messages"])
+        cache["last_id"] = page["next_after_id"]
+        if not page["has_more"]:
+            break
+    return cache["messages"]
+
+
 def sync_rename_task(task_id: int, objective: str) -> Dict[str, Any]:
     import asyncio
     client = get_api_client()
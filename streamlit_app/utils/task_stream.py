@@ -0,0 +1,279 @@
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+
+from .api_client import (
+    API_BASE_URL, sync_get_task_header, sync_get_new_messages, sync_get_pending_interaction
+)
+
+# Statuses after which the backend stops broadcasting for a task
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Stop a stream nobody has read from for this long (the browser tab was closed)
+IDLE_TIMEOUT_SECONDS = 120
+
+
+def _ws_url(task_id: int, resume_from: int = 0) -> str:
+    base = API_BASE_URL.replace("https://", "wss://").replace("http://", "ws://")
+    url = f"{base}/ws/task/{task_id}"
+    if resume_from:
+        url += f"?resume_from={resume_from}"
+    return url
+
+
+class TaskStream:
+    """Background WebSocket subscription to a task's event stream.
+
+    A daemon thread keeps a connection to `/ws/task/{task_id}` open, reconnecting
+    with backoff, and appends decoded events to a thread-safe deque that the
+    Streamlit script drains on each rerun.
+
+    Reconnects pass `resume_from` with the last applied `seq`, so the server only
+    replays what was missed. Repeated frames are skipped. A gap in `seq`, or a
+    `resync_required` reply, is surfaced as a `resync_required` event. Control
+    frames without a `seq` (e.g. `interaction_resolved`) are passed through.
+    """
+
+    def __init__(self, task_id: int):
+        self.task_id = task_id
+        self.connected = False
+        self.last_seq = 0
+        self._events: deque = deque(maxlen=5000)
+        self._stop = threading.Event()
+        self._last_drained = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"task-stream-{task_id}", daemon=True)
+        self._thread.start()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def _run(self):
+        from websockets.sync.client import connect
+
+        backoff = 1.0
+        while not self._stop.is_set():
+            if time.monotonic() - self._last_drained > IDLE_TIMEOUT_SECONDS:
+                break
+            try:
+                resume_from = self.last_seq
+                with connect(_ws_url(self.task_id, resume_from), open_timeout=10, close_timeout=2) as ws:
+                    self.connected = True
+                    self._events.append({"type": "stream_connected", "resumed": bool(resume_from)})
+                    backoff = 1.0
+                    while not self._stop.is_set():
+                        if time.monotonic() - self._last_drained > IDLE_TIMEOUT_SECONDS:
+                            self._stop.set()
+                            break
+                        try:
+                            raw = ws.recv(timeout=5)
+                        except TimeoutError:
+                            continue
+                        try:
+                            self._accept(json.loads(raw))
+                        except (TypeError, ValueError):
+                            continue
+            except Exception:
+                pass
+            finally:
+                self.connected = False
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _accept(self, event: dict):
+        if event.get("type") == "resync_required":
+            self.last_seq = event.get("latest_seq") or 0
+            self._events.append(event)
+            return
+        seq = event.get("seq")
+        if seq is not None:
+            if seq <= self.last_seq:
+                return  # Already applied (replay overlap)
+            if self.last_seq and seq != self.last_seq + 1:
+                self._events.append({"type": "resync_required", "latest_seq": seq})
+            self.last_seq = seq
+        self._events.append(event)
+
+    def drain(self) -> List[dict]:
+        self._last_drained = time.monotonic()
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+    def close(self):
+        self._stop.set()
+
+
+def get_task_stream(task_id: int) -> TaskStream:
+    """Return this session's stream for the task, replacing a stream for another task."""
+    stream: Optional[TaskStream] = st.session_state.get("task_stream")
+    if stream is None or stream.task_id != task_id or not stream.alive:
+        if stream is not None:
+            stream.close()
+        stream = TaskStream(task_id)
+        st.session_state.task_stream = stream
+    return stream
+
+
+def _interaction_from_event(event: dict) -> Optional[dict]:
+    """Translate a request_* event into the shape of GET /interactions/task/{id}/pending."""
+    if event["type"] == "request_confirmation":
+        return {
+            "pending": True,
+            "request_id": event["request_id"],
+            "interaction_type": "confirmation",
+            "tool_name": event["tool_name"],
+            "prompt_message": event["description"],
+            "fields": None,
+            "preview": {
+                "tool": event["tool_name"],
+                "parameters": event.get("parameters") or {},
+                **({"items": event["items"]} if event.get("items") else {}),
+            },
+        }
+    if event["type"] == "request_input":
+        return {
+            "pending": True,
+            "request_id": event["request_id"],
+            "interaction_type": "input_needed",
+            "tool_name": event["tool_name"],
+            "prompt_message": event["prompt"],
+            "fields": event.get("fields") or [],
+            "preview": None,
+        }
+    return None
+
+
+def sync_get_live_task(task_id: int) -> Dict[str, Any]:
+    """Return the task view for the dashboard, kept current from the WebSocket stream.
+
+    The task header is fetched over REST only when there is no local copy, on a
+    phase change (plan/results may have been written), or while the stream is
+    disconnected (polling fallback). Between those points, status changes,
+    agent messages and interaction requests are applied from stream events,
+    so an idle dashboard makes no HTTP requests.
+    """
+    live = st.session_state.get("live_task")
+    if not live or live["task_id"] != task_id:
+        live = {
+            "task_id": task_id,
+            "task": None,
+            "dirty": True,
+            "interaction": None,
+            "live_messages": [],
+            "last_message_seq": 0,
+        }
+        st.session_state.live_task = live
+
+    stream = get_task_stream(task_id)
+    for event in stream.drain():
+        kind = event.get("type")
+        if kind == "stream_connected":
+            if not event.get("resumed"):
+                # Anything could have happened while we were disconnected
+                live["dirty"] = True
+        elif kind == "resync_required":
+            # Events were missed: reload the header and the persisted transcript
+            live["dirty"] = True
+            live["live_messages"] = []
+            live["last_message_seq"] = 0
+            st.session_state.pop("message_cache", None)
+        elif kind == "status_update":
+            status = event.get("status")
+            if live["task"] is not None:
+                if status != live["task"].get("status"):
+                    live["dirty"] = True
+                live["task"]["status"] = status
+            if status != "awaiting_input":
+                live["interaction"] = None
+        elif kind == "agent_message":
+            seq = event.get("seq") or 0
+            if seq and seq <= live["last_message_seq"]:
+                continue  # Already shown
+            live["last_message_seq"] = seq or live["last_message_seq"]
+            live["live_messages"].append({
+                "agent_name": event.get("agent_name", "System"),
+                "content": event.get("content", ""),
+                "seq": seq,
+            })
+        elif kind in ("request_confirmation", "request_input"):
+            live["interaction"] = _interaction_from_event(event)
+
+    if live["dirty"] or live["task"] is None or not stream.connected:
+        result = sync_get_task_header(task_id)
+        if not result["success"]:
+            return result
+        live["task"] = result["data"]
+        live["dirty"] = False
+        if live["task"]["status"] in TERMINAL_STATUSES and live["live_messages"]:
+            # Persisted transcript is complete now; replace the live tail with it
+            sync_get_new_messages(task_id)
+            live["live_messages"] = []
+
+    return {"success": True, "data": live["task"], "connected": stream.connected}
+
+
+def _message_key(message: dict) -> tuple:
+    return message.get("agent_name", "System"), str(message.get("content", ""))
+
+
+def _persisted_overlap(persisted: List[dict], streamed: List[dict]) -> int:
+    """How many leading streamed messages are already the last persisted ones.
+
+    The stream starts partway through the transcript, so messages streamed
+    before the persisted list was fetched appear in both: as its tail and as
+    the head of the streamed list.
+    """
+    longest = min(len(persisted), len(streamed))
+    tail = [_message_key(m) for m in persisted[len(persisted) - longest:]]
+    head = [_message_key(m) for m in streamed[:longest]]
+    for count in range(longest, 0, -1):
+        if tail[longest - count:] == head[:count]:
+            return count
+    return 0
+
+
+def get_live_messages(task_id: int) -> List[dict]:
+    """Persisted messages plus those streamed since they were fetched, without repeats."""
+    cache = st.session_state.get("message_cache")
+    if not cache or cache.get("task_id") != task_id:
+        persisted = sync_get_new_messages(task_id)
+    else:
+        persisted = cache["messages"]
+    live = st.session_state.get("live_task")
+    streamed = live["live_messages"] if live and live["task_id"] == task_id else []
+    return persisted + streamed[_persisted_overlap(persisted, streamed):]
+
+
+def sync_get_live_interaction(task_id: int) -> Optional[dict]:
+    """Pending interaction from the stream, falling back to one REST lookup.
+
+    Confirmation and input requests arrive as events; other kinds (e.g. agent-stuck
+    guidance) are fetched once and kept until the task leaves awaiting_input.
+    """
+    live = st.session_state.get("live_task")
+    if live and live["task_id"] == task_id and live["interaction"]:
+        return live["interaction"]
+    result = sync_get_pending_interaction(task_id)
+    if not (result["success"] and result["data"].get("pending")):
+        return None
+    if live and live["task_id"] == task_id:
+        live["interaction"] = result["data"]
+    return result["data"]
+
+
+def clear_live_interaction(task_id: int):
+    live = st.session_state.get("live_task")
+    if live and live["task_id"] == task_id:
+        live["interaction"] = None
+
+
+def reset_live_task():
+    """Forget local task state (e.g. after a re-run deletes the old messages)."""
+    st.session_state.pop("live_task", None)
+    st.session_state.pop("message_cache", None)
@@ -0,0 +1,71 @@
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.agents import approval_policy
+from app.agents.approval_policy import ApprovalAuditLog, redact_parameters
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Collects inserted audit rows; set `failing = True` to make inserts raise."""
+    class Database:
+        rows = []
+        failing = False
+
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    async def bulk_create(db, rows):
+        if Database.failing:
+            raise RuntimeError("database down")
+        Database.rows.extend(rows)
+
+    monkeypatch.setattr(approval_policy, "AsyncSessionLocal", session)
+    monkeypatch.setattr(approval_policy, "bulk_create_approval_audits", bulk_create)
+    return Database
+
+
+async def test_rows_are_kept_when_an_insert_fails(database):
+    audit = ApprovalAuditLog(max_batch=2, max_delay=60)
+    database.failing = True
+    for i in range(3):
+        await audit.add({"task_id": i})
+    assert database.rows == []
+
+    database.failing = False
+    await audit.close()
+    assert [row["task_id"] for row in database.rows] == [0, 1, 2]
+    assert audit.dropped_count == 0
+
+
+async def test_backlog_is_capped_and_dropped_rows_are_counted(database):
+    audit = ApprovalAuditLog(max_batch=1, max_delay=60)
+    database.failing = True
+    for i in range(12):
+        await audit.add({"task_id": i})
+    await audit.close()
+    assert audit.dropped_count == 12
+    assert database.rows == []
+
+
+def test_secrets_are_redacted_before_storage():
+    summary = redact_parameters({
+        "task_id": 7,
+        "url": "https://api.example.com/v1?q=cats&api_key=abc",
+        "headers_json": json.dumps({"Authorization": "Bearer abc", "Accept": "application/json"}),
+        "body_json": json.dumps({"user": {"password": "abc"}, "author": "me"}),
+        "text": "x" * 500,
+    })
+    assert "task_id" not in summary
+    assert "abc" not in json.dumps(summary)
+    assert json.loads(summary["headers_json"])["Accept"] == "application/json"
+    assert json.loads(summary["body_json"])["author"] == "me"
+    assert len(summary["text"]) == approval_policy.PARAMETER_PREVIEW_CHARS
+
+    assert redact_parameters({"selector": "#password", "value": "hunter2"})["value"] == "[redacted]"
+    assert redact_parameters({"selector": "#email", "value": "a@b.c"})["value"] == "a@b.c"
@@ -0,0 +1,51 @@
+import csv
+
+import pytest
+
+from app.agents.tools import csv_engine
+from app.agents.tools.csv_engine import count_rows
+
+
+@pytest.mark.parametrize("text", [
+    "a,b\n1,2\n3,4\n",
+    "a,b\r\n1,2\r\n\r\n3,4",
+    'a,b\n"x\ny",2\n"say ""hi""",3\n',
+    'a,b\n5 ft 3" tall,2\n',
+    "a,b\r1,2\r3,4\r",
+    "\r\n\r\n1\n1\n",
+    "\nb b\r",
+    "\n\na,b\n1,2\n",
+    "",
+])
+@pytest.mark.parametrize("block_bytes", [1 << 20, 1, 3])
+def test_count_rows_matches_dict_reader(tmp_path, monkeypatch, text, block_bytes):
+    monkeypatch.setattr(csv_engine, "BLOCK_BYTES", block_bytes)
+    path = tmp_path / "data.csv"
+    path.write_bytes(text.encode())
+    with open(path, newline="", encoding="utf-8") as f:
+        expected = sum(1 for _ in csv.DictReader(f))
+    assert count_rows(path) == expected
+
+
+def test_column_stats_match_the_dataset_cache(tmp_path):
+    from app.agents.tools import dataset_cache
+
+    path = tmp_path / "data.csv"
+    path.write_text(
+        "amount,count,zip,big\n"
+        "10,1e1,02139,12345678901234567890\n"
+        "10.0,10,02139,12345678901234567890\n"
+        "2.5,+10,10001,1\n"
+        "10.50,3,,1\n"
+    )
+    target = tmp_path / "data.arrow"
+    dataset_cache._build(path, target)
+    table = dataset_cache._open(target)
+
+    _, streamed = csv_engine.column_stats(path, top_k=3)
+    cached = [dataset_cache._column_stats(name, table.column(name), 3) for name in table.column_names]
+    for stream, cache in zip(streamed, cached):
+        assert (stream["column"], stream["type"], stream["distinct"]) == (cache["column"], cache["type"], cache["distinct"])
+        assert stream["top"] == cache["top"]
+    assert streamed[0]["top"] == {"10": 2, "2.5": 1, "10.5": 1}
+    assert streamed[1]["top"] == {"10": 3, "3": 1}
@@ -0,0 +1,49 @@
+import json
+import re
+
+import pyarrow as pa
+import pytest
+
+from app.agents.tools.csv_query import QueryError, execute, parse_query
+
+
+def _parse(spec) -> dict:
+    return parse_query(json.dumps(spec))
+
+
+def test_shorthands_are_normalized():
+    spec = _parse({"filter": ["amount", ">", 1], "group_by": "country", "columns": "id", "sort": "-amount"})
+    assert spec["filter"] == [["amount", ">", 1]]
+    assert spec["group_by"] == ["country"]
+    assert spec["columns"] == ["id"]
+    assert spec["sort"] == [["amount", "desc"]]
+    assert spec["aggregate"] == {"*": ["count"]}
+
+
+@pytest.mark.parametrize("spec, message", [
+    ({"filter": {"country": "US"}}, "filter must be a list"),
+    ({"filter": [[1, "==", 2]]}, "must be [column, op, value]"),
+    ({"filter": [["country", "like", "US"]]}, "must be [column, op, value]"),
+    ({"filter": [["country", "=="]]}, "needs a value"),
+    ({"columns": 3}, "columns must be a column name or a list"),
+    ({"group_by": [["country"]]}, "group_by must be a column name or a list"),
+    ({"sort": [[1, "asc"]]}, "sort"),
+    ({"sort": {"amount": "desc"}}, "sort"),
+    ({"aggregate": {"amount": [["sum"]]}}, "unknown aggregate"),
+    ({"aggregate": {"*": "sum"}}, '"*" only supports "count"'),
+    ({"limit": True}, "limit must be a positive integer"),
+    ({"describe": True, "group_by": ["country"]}, "describe cannot be combined"),
+    ({"where": []}, "unknown keys"),
+])
+def test_malformed_queries_raise_query_error(spec, message):
+    with pytest.raises(QueryError, match=re.escape(message)):
+        _parse(spec)
+
+
+def test_group_by_with_top_n():
+    table = pa.table({"country": ["US", "DE", "US", "FR"], "amount": [10, 5, 20, 1]})
+    result, total = execute(table, _parse({
+        "group_by": "country", "aggregate": {"amount": "sum"}, "sort": [["amount_sum", "desc"]], "limit": 2,
+    }))
+    assert total == 2
+    assert result.to_pylist() == [{"country": "US", "amount_sum": 30}, {"country": "DE", "amount_sum": 5}]
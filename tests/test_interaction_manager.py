@@ -0,0 +1,82 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents import interaction_manager
+from app.agents.interaction_manager import InteractionManager
+from app.api import websocket
+from app.db.models import TaskStatus
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def task(monkeypatch):
+    """One task's status and interactions, kept in memory; `answer(n)` responds to the n-th request."""
+    state = SimpleNamespace(status=TaskStatus.EXECUTING, broadcast=[], responses={})
+
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    async def get_task_status(db, task_id):
+        return state.status
+
+    async def update_task_status(db, task_id, status):
+        state.status = status
+
+    async def create_interaction_request(db, task_id, *args):
+        request_id = len(state.responses) + 1
+        state.responses[request_id] = asyncio.get_running_loop().create_future()
+        return SimpleNamespace(id=request_id)
+
+    async def wait_for_response(request_id, timeout):
+        return await state.responses[request_id]
+
+    async def send(task_id, *args, **kwargs):
+        state.broadcast.append(args[0])
+
+    monkeypatch.setattr(interaction_manager, "AsyncSessionLocal", session)
+    monkeypatch.setattr(interaction_manager, "get_task_status", get_task_status)
+    monkeypatch.setattr(interaction_manager, "update_task_status", update_task_status)
+    monkeypatch.setattr(interaction_manager, "create_interaction_request", create_interaction_request)
+    monkeypatch.setattr(InteractionManager, "_wait_for_response", wait_for_response)
+    monkeypatch.setattr(websocket, "send_status_update", send)
+    monkeypatch.setattr(websocket, "send_input_request", send)
+    monkeypatch.setattr(websocket, "send_confirmation_request", send)
+    state.answer = lambda request_id, response: state.responses[request_id].set_result(response)
+    yield state
+    InteractionManager._task_status_before.clear()
+    InteractionManager._outstanding.clear()
+
+
+async def test_status_is_restored_after_the_last_concurrent_interaction(task):
+    first = asyncio.create_task(InteractionManager.request_input(1, "form", "Name?", []))
+    second = asyncio.create_task(InteractionManager.request_confirmation(1, "email", "Send?", {}))
+    await asyncio.sleep(0.01)
+    assert task.status == TaskStatus.AWAITING_INPUT
+
+    task.answer(1, {"values": {"name": "x"}})
+    assert await first == {"values": {"name": "x"}}
+    assert task.status == TaskStatus.AWAITING_INPUT
+
+    task.answer(2, {"confirmed": True})
+    assert await second is True
+    assert task.status == TaskStatus.EXECUTING
+    assert task.broadcast[-1] == "executing"
+
+
+async def test_cancelled_wait_does_not_hold_the_status(task):
+    waiting = asyncio.create_task(InteractionManager.request_input(1, "form", "Name?", []))
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    later = asyncio.create_task(InteractionManager.request_input(1, "form", "Name?", []))
+    await asyncio.sleep(0.01)
+    task.answer(2, {})
+    await later
+    assert task.status == TaskStatus.EXECUTING
@@ -0,0 +1,52 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.db import message_sink
+from app.db.message_sink import MessageSink
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Stores inserted messages; a message whose content starts with "bad" fails any insert it is in."""
+    class Database:
+        contents = []
+        inserts = 0
+
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    async def bulk_create(db, rows):
+        Database.inserts += 1
+        if any(row["content"].startswith("bad") for row in rows):
+            raise ValueError("rejected")
+        Database.contents.extend(row["content"] for row in rows)
+
+    monkeypatch.setattr(message_sink, "bulk_create_agent_messages", bulk_create)
+    Database.session = session
+    return Database
+
+
+async def test_a_rejected_message_is_dropped_after_the_retries(database):
+    sink = MessageSink(1, max_batch=100, max_delay=0, session_factory=database.session)
+    sink.max_attempts = 3
+    for content in ("one", "bad", "two"):
+        await sink.add("Agent", content)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await sink.flush()
+    await sink.add("Agent", "three")
+    await sink.flush()
+
+    assert database.contents == ["one", "two", "three"]
+    assert sink.dropped_count == 1
+    assert sink.flushed_count == 3
+
+    await sink.add("Agent", "four")
+    await sink.close()
+    assert database.contents[-1] == "four"
+    assert database.inserts == 3 + 4 + 1
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+import uvicorn
+from autogen_core.models import UserMessage
+
+from app.agents import model_client
+from app.agents.model_client import LANES, ModelClientManager, RateLimiter
+from benchmarks.fake_openai_server import create_app
+
+pytestmark = pytest.mark.anyio
+
+INTERACTIVE, SCHEDULED = LANES.index("interactive"), LANES.index("scheduled")
+
+
+@pytest.fixture
+async def fake_openai(monkeypatch):
+    """Start benchmarks.fake_openai_server and return a factory for managers pointed at it."""
+    servers = []
+
+    async def start(latency: float = 0.0, rate_limit_every: int = 0) -> ModelClientManager:
+        config = uvicorn.Config(
+            create_app(latency, rate_limit_every, retry_after=0.05), host="127.0.0.1", port=0, log_level="warning",
+        )
+        server = uvicorn.Server(config)
+        servers.append((server, asyncio.create_task(server.serve())))
+        while not server.started:
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        monkeypatch.setattr(model_client.settings, "openai_base_url", f"http://127.0.0.1:{port}/v1")
+        monkeypatch.setattr(model_client.settings, "openai_api_key", "sk-test")
+        return ModelClientManager()
+
+    yield start
+    for server, serve in servers:
+        server.should_exit = True
+        await serve
+
+
+def _message(text: str):
+    return [UserMessage(content=text, source="user")]
+
+
+async def test_rate_limiter_waits_for_token_budget():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=6000)  # 100 tokens/s
+    assert await limiter.acquire(6000, INTERACTIVE) < 0.05
+    waited = await limiter.acquire(30, INTERACTIVE)
+    assert 0.2 < waited < 1.0
+
+
+async def test_rate_limiter_waits_for_request_budget():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=10 ** 9)  # 10 requests/s
+    for _ in range(600):
+        await limiter.acquire(1, INTERACTIVE)
+    waited = await limiter.acquire(1, INTERACTIVE)
+    assert 0.05 < waited < 0.5
+
+
+async def test_rate_limiter_pause_holds_everyone_back():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=10 ** 9)
+    limiter.pause(0.3)
+    assert await limiter.acquire(1, INTERACTIVE) >= 0.25
+
+
+async def test_settle_returns_unused_reservation():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=6000)
+    await limiter.acquire(6000, INTERACTIVE)
+    limiter.settle(reserved=6000, used=100)
+    assert await limiter.acquire(5000, INTERACTIVE) < 0.05
+
+
+async def test_interactive_lane_is_served_before_scheduled():
+    limiter = RateLimiter(requests_per_minute=1200, tokens_per_minute=10 ** 9)  # One request per 50 ms
+    for _ in range(1200):
+        await limiter.acquire(1, INTERACTIVE)
+    order = []
+
+    async def call(lane: str, priority: int):
+        await limiter.acquire(1, priority)
+        order.append(lane)
+
+    scheduled = [asyncio.create_task(call("scheduled", SCHEDULED)) for _ in range(2)]
+    await asyncio.sleep(0.01)  # The scheduled calls queue first
+    interactive = [asyncio.create_task(call("interactive", INTERACTIVE)) for _ in range(2)]
+    await asyncio.gather(*scheduled, *interactive)
+    assert order == ["interactive", "interactive", "scheduled", "scheduled"]
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=10 ** 9)
+    for _ in range(60):
+        await limiter.acquire(1, INTERACTIVE)
+    waiter = asyncio.create_task(limiter.acquire(1, INTERACTIVE))
+    await asyncio.sleep(0.01)
+    assert limiter.waiting == 1
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.waiting == 0
+
+
+async def test_identical_concurrent_requests_share_one_call(fake_openai):
+    manager = await fake_openai(latency=0.2)
+    try:
+        results = await asyncio.gather(*(
+            manager.create(lane, _message("same prompt"), [], "auto", None, {}, None)
+            for lane in ("interactive", "interactive", "scheduled")
+        ))
+        assert len({r.content for r in results}) == 1
+        stats = manager.stats()["lanes"]
+        assert stats["interactive"]["requests"] + stats["scheduled"]["requests"] == 1
+        assert stats["interactive"]["coalesced"] + stats["scheduled"]["coalesced"] == 2
+        assert manager.stats()["inflight"] == 0
+
+        await manager.create("interactive", _message("other prompt"), [], "auto", None, {}, None)
+        stats = manager.stats()["lanes"]
+        assert stats["interactive"]["requests"] + stats["scheduled"]["requests"] == 2
+    finally:
+        await manager.close()
+
+
+async def test_rate_limited_call_is_retried(fake_openai):
+    manager = await fake_openai(rate_limit_every=2)
+    try:
+        await manager.create("interactive", _message("first"), [], "auto", None, {}, None)
+        started = time.monotonic()
+        result = await manager.create("interactive", _message("second"), [], "auto", None, {}, None)
+        assert "second" in result.content
+        assert time.monotonic() - started >= 0.04  # Retry-After of the 429
+        lane = manager.stats()["lanes"]["interactive"]
+        assert (lane["rate_limited"], lane["retries"], lane["errors"]) == (1, 1, 0)
+    finally:
+        await manager.close()
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from autogen_agentchat.messages import TextMessage
+
+from app.agents import parallel_executor
+from app.agents.compaction import TaskContextCompactor
+from app.agents.parallel_executor import execute_plan
+from app.agents.plan import Plan, Subtask
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeAgent:
+    """Says "step 1", "step 2", ... with a pause between messages."""
+
+    def __init__(self, name: str, steps: int, delay: float):
+        self.name, self.steps, self.delay = name, steps, delay
+        self.finished = False
+
+    async def run_stream(self, task: str):
+        for step in range(1, self.steps + 1):
+            await asyncio.sleep(self.delay)
+            yield TextMessage(content=f"step {step}", source=self.name)
+        self.finished = True
+
+
+@pytest.fixture
+def agents(monkeypatch):
+    created = {}
+
+    def create(model_client, model_context, name, max_tool_iterations):
+        created[name] = FakeAgent(name, steps=5, delay=0.02)
+        return created[name]
+
+    monkeypatch.setattr(parallel_executor, "create_executor_agent", create)
+    monkeypatch.setattr(parallel_executor, "get_model_client", lambda lane: None)
+    monkeypatch.setattr(parallel_executor.settings, "parallel_subtask_limit", 3)
+    return created
+
+
+@pytest.fixture
+def compactor():
+    compactor = TaskContextCompactor(1)
+    yield compactor
+    compactor.close()
+
+
+def _plan() -> Plan:
+    return Plan(subtasks=[Subtask(1, "a"), Subtask(2, "b"), Subtask(3, "c", dependencies=[1])])
+
+
+async def test_report_has_every_subtask(agents, compactor):
+    messages = []
+
+    async def on_message(agent_name, content):
+        messages.append(content)
+        return True
+
+    report = await execute_plan(1, "objective", _plan(), "interactive", compactor, on_message)
+    assert report.endswith("EXECUTION_COMPLETE")
+    assert report.count("step 5") == 3
+    assert len(messages) == 15
+
+
+async def test_stopping_cancels_the_running_subtasks(agents, compactor):
+    messages = []
+
+    async def on_message(agent_name, content):
+        messages.append(content)
+        return not content.endswith("step 2")
+
+    report = await execute_plan(1, "objective", _plan(), "interactive", compactor, on_message)
+    assert report is None
+    assert not any(agent.finished for agent in agents.values())
+    assert "Executor_3" not in agents  # Its dependency never finished
+    assert len(messages) <= 4
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from app.agents.tools import sandbox_pool
+from app.agents.tools.sandbox_pool import SandboxPool
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.skipif(not hasattr(os, "fork"), reason="the sandbox pool needs os.fork"),
+]
+
+
+@pytest.fixture
+async def pool(monkeypatch):
+    monkeypatch.setattr(sandbox_pool.settings, "sandbox_workers", 1)
+    monkeypatch.setattr(sandbox_pool.settings, "sandbox_preload_modules", [])
+    pool = SandboxPool()
+    yield pool
+    await pool.close()
+
+
+async def test_output_above_the_stream_buffer_is_returned(pool):
+    result = await pool.run("print('a' * 70000)", timeout=10)
+    assert result["stdout"] == "a" * 70000 + "\n"
+    assert result["truncated_bytes"] == 0
+    assert pool.stats["worker_failures"] == 0
+
+
+async def test_output_at_the_cap_survives_json_escaping(pool):
+    max_output = sandbox_pool.settings.sandbox_max_output_bytes
+    code = (
+        "import os\n"
+        f"os.write(1, b'\\xff' * {max_output + 10})\n"
+        f"os.write(2, b'\\x01' * {max_output})\n"
+    )
+    result = await pool.run(code, timeout=10)
+    assert result["stdout"] == "�" * max_output
+    assert len(result["stderr"]) == max_output
+    assert result["truncated_bytes"] == 10
+    assert pool.stats["worker_failures"] == 0
+
+    # The worker is still usable
+    assert (await pool.run("print(1)", timeout=10))["stdout"] == "1\n"
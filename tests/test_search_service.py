@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.agents.tools import search_service
+from app.agents.tools.search_service import SearchBackend, SearchService
+
+pytestmark = pytest.mark.anyio
+
+
+class StubBackend(SearchBackend):
+    """Counts calls per kind; optionally slow, or failing for the next `fail` calls."""
+
+    def __init__(self, latency: float = 0.0, fail: int = 0):
+        self.latency = latency
+        self.fail = fail
+        self.calls = {"text": 0, "news": 0}
+        self._lock = threading.Lock()
+
+    def _results(self, kind: str, query: str, max_results: int):
+        with self._lock:
+            self.calls[kind] += 1
+            failing, self.fail = self.fail > 0, max(self.fail - 1, 0)
+        time.sleep(self.latency)
+        if failing:
+            raise RuntimeError("backend down")
+        return [{"title": f"{kind} {query} #{i}", "href": f"https://example.com/{i}", "body": "stub"} for i in range(max_results)]
+
+    def text(self, query: str, max_results: int):
+        return self._results("text", query, max_results)
+
+    def news(self, query: str, max_results: int):
+        return self._results("news", query, max_results)
+
+
+@pytest.fixture
+def service_factory(monkeypatch):
+    services = []
+    monkeypatch.setattr(search_service.settings, "search_text_ttl_seconds", 60)
+    monkeypatch.setattr(search_service.settings, "search_news_ttl_seconds", 60)
+
+    def create(backend: SearchBackend, cache_path=None) -> SearchService:
+        service = SearchService(backend, str(cache_path) if cache_path else None)
+        services.append(service)
+        return service
+
+    yield create
+    for service in services:
+        service.close()
+
+
+def test_backend_must_implement_both_kinds():
+    class TextOnly(SearchBackend):
+        def text(self, query, max_results):
+            return []
+
+    with pytest.raises(TypeError):
+        TextOnly()
+
+
+async def test_repeated_search_is_served_from_memory(service_factory):
+    backend = StubBackend()
+    service = service_factory(backend)
+    first = await service.search("text", "python  asyncio", 3)
+    assert await service.search("text", "Python asyncio ", 3) == first
+    assert backend.calls["text"] == 1
+    assert service.stats["memory_hits"] == 1
+
+
+async def test_ttl_expires_per_kind(service_factory, monkeypatch):
+    monkeypatch.setattr(search_service.settings, "search_news_ttl_seconds", 0.1)
+    backend = StubBackend()
+    service = service_factory(backend)
+    await service.search("text", "q", 3)
+    await service.search("news", "q", 3)
+    await asyncio.sleep(0.2)
+
+    await service.search("text", "q", 3)
+    await service.search("news", "q", 3)
+    assert backend.calls == {"text": 1, "news": 2}
+
+
+async def test_concurrent_identical_searches_share_one_call(service_factory):
+    backend = StubBackend(latency=0.1)
+    service = service_factory(backend)
+    results = await asyncio.gather(*(service.search("text", "same", 3) for _ in range(5)))
+    assert all(result == results[0] for result in results)
+    assert backend.calls["text"] == 1
+    assert service.stats["coalesced"] == 4
+
+
+async def test_failures_are_not_cached(service_factory):
+    backend = StubBackend(latency=0.05, fail=1)
+    service = service_factory(backend)
+    outcomes = await asyncio.gather(*(service.search("text", "q", 3) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert backend.calls["text"] == 1
+
+    assert len(await service.search("text", "q", 3)) == 3
+    assert backend.calls["text"] == 2
+    assert service.stats["errors"] == 1
+
+
+async def test_disk_cache_survives_a_restart(service_factory, tmp_path):
+    cache_path = tmp_path / "search.sqlite3"
+    first = service_factory(StubBackend(), cache_path)
+    results = await first.search("news", "q", 2)
+    first.close()
+
+    backend = StubBackend()
+    second = service_factory(backend, cache_path)
+    assert await second.search("news", "q", 2) == results
+    assert backend.calls["news"] == 0
+    assert second.stats["disk_hits"] == 1
+
+
+async def test_followers_of_a_cancelled_search_still_share_one_call(service_factory):
+    backend = StubBackend(latency=0.1)
+    service = service_factory(backend)
+    leader = asyncio.create_task(service.search("text", "q", 3))
+    await asyncio.sleep(0.01)
+    followers = [asyncio.create_task(service.search("text", "q", 3)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    results = await asyncio.gather(*followers)
+    assert all(len(result) == 3 for result in results)
+    assert backend.calls["text"] == 2  # The cancelled call and one shared retry
+    assert not service._inflight